@@ -10,7 +10,83 @@ Each analyser module provides the following:
  - An is_metric() method which returns whether this analyser is a performance metric or not.
  - a model_type() method which returns what model types (classification, regression, agnostic) this analyser supports.
 
+Metric analysers may additionally provide accumulator(model) and finalise(acc, model) methods, which allow them to be
+evaluated chunk by chunk over data that does not fit in memory (see analysers.accumulators).
+
+Analysers may also provide an interval(hdlr) method, which returns a confidence interval around the result of
+analyse(hdlr) when the handler's data is only a random sample of the data file (see handlers.sampling and
+analysers.intervals).
+
 """
+import functools
+from streamlit import cache_resource
+from analysers.intervals import DEFAULT_CONFIDENCE
+from handlers.simple import StandardHandler
+from profiling import note_cache_miss
+
+
+def hash_handler(hdlr):
+    """
+    Hash a StandardHandler for streamlit caching by its content fingerprint.
+    This avoids streamlit hashing the entire dataframe and model on every call to analyse().
+
+    :param hdlr: the StandardHandler being hashed.
+    :return: the handler's fingerprint.
+    """
+    return hdlr.fingerprint
+
+
+def analysis_cache(func):
+    """
+    Cache the result of an analyse(StandardHandler) method.
+    Results are keyed by the analyse function, the handler's fingerprint and any other parameters passed in,
+    so a cache lookup costs O(1) rather than O(dataset).
+
+    Results are held with st.cache_resource rather than st.cache_data, which would pickle (and so copy) the possibly
+    large result on every cache hit. The result is shared, so callers must treat cached results as read-only.
+    st.cache_resource only stores results computed within a streamlit session (on the script thread, or on a worker
+    thread given the session's context, see pages.execution), so headless callers such as batch.py simply compute.
+    No spinner is shown, as analyses may run on worker threads.
+    Cache misses are reported to the profiler (see profiling).
+
+    :param func: the analyse method to cache.
+    :return: the cached function.
+    """
+
+    # The analyser itself is not hashed (the leading underscore tells streamlit so), as analysers hold no state: the
+    # cache is per method, as the cached function takes the method's module and qualified name.
+    def compute(_analyser, *args, **kwargs):
+        note_cache_miss()
+        return func(_analyser, *args, **kwargs)
+
+    compute.__module__, compute.__qualname__ = func.__module__, func.__qualname__
+    cached = cache_resource(compute, hash_funcs={StandardHandler: hash_handler}, show_spinner=False)
+
+    @functools.wraps(func)
+    def analyse(self, *args, **kwargs):
+        return cached(self, *args, **kwargs)
+
+    return analyse
+
+
+def handler_cache(func):
+    """
+    Cache the result of a function whose first parameter is a StandardHandler, such as analysers.show_data's
+    view_positions(). Unlike analysis_cache, every parameter is part of the key: the handler is hashed by its
+    fingerprint, so results are never shared between handlers of different content.
+
+    :param func: the function to cache.
+    :return: the cached function.
+    """
+
+    def compute(*args, **kwargs):
+        note_cache_miss()
+        return func(*args, **kwargs)
+
+    compute.__module__, compute.__qualname__ = func.__module__, func.__qualname__
+    cached = cache_resource(compute, hash_funcs={StandardHandler: hash_handler}, show_spinner=False)
+    return functools.wraps(func)(cached)
+
 
 """
 The Analyser class defines the methods which all Analyser subclasses should implement.
@@ -29,6 +105,36 @@ class Analyser:
         """
         pass
 
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return a confidence interval around the result of analyse(hdlr), if the handler's data is a random sample
+        of a larger data file (see handlers.sampling).
+
+        :param hdlr: the handler.
+        :param confidence: the confidence level, between 0 and 1.
+        :return: the interval, in a format matching analyse(), or None if the data is not a sample or this analyser
+        does not give intervals.
+        """
+        return None
+
+    def accumulator(self, model):
+        """
+        Return a new, empty accumulator (see analysers.accumulators) which can compute this analyser's result
+        chunk by chunk, or None if this analyser does not support accumulation.
+
+        :param model: the sklearn model being evaluated.
+        """
+        return None
+
+    def finalise(self, acc, model):
+        """
+        Return the result of this analyser from a filled accumulator, in the same format as analyse().
+
+        :param acc: an accumulator returned by accumulator(model) which has been updated with all of the data.
+        :param model: the sklearn model being evaluated.
+        """
+        raise NotImplementedError('finalise must be overridden by analysers that support accumulation!')
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
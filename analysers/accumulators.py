@@ -0,0 +1,492 @@
+"""
+This module contains mergeable accumulators for evaluating a model out-of-core.
+
+An accumulator holds the partial state of one or more metrics. It can be updated chunk by chunk with
+update(y_true, y_pred), and the partial states of accumulators built on different workers can be combined with
+merge(other). The final metric values are then read from the accumulator, so a model can be evaluated over a
+dataset that is larger than memory in a single streaming pass.
+
+MomentsAccumulator is used by MeanStdAnalyser to compute the moments of every feature in a single pass.
+The metric analysers expose the others through Analyser::accumulator and Analyser::finalise, and the functions at the
+bottom of this module drive the streaming pass over a .csv file, which batch.py uses for data which exceeds its
+memory limit.
+"""
+import numpy as np
+from handlers.chunked import DEFAULT_CHUNKSIZE, iter_csv_chunks
+from handlers.layout import model_input
+
+
+AVERAGES = ['macro', 'weighted', 'micro']  # The ways per-class scores can be averaged (see ConfusionAccumulator).
+
+
+class ConfusionAccumulator:
+    """
+    Accumulates a confusion matrix, from which accuracy, precision, recall and F1 scores are computed.
+    Rows of the matrix correspond to the actual labels, and columns to the predicted labels.
+
+    The labels of each chunk are encoded to integer codes with a single sort, and the whole chunk is then counted
+    into the matrix with one bincount, so a chunk costs O(n log n) however many classes there are. Every score is
+    then read from the matrix's diagonal and margins, at a cost which depends only on the number of classes.
+    """
+
+    def __init__(self, labels=None):
+        """
+        :param labels: the known class labels (e.g. model.classes_). Labels that are seen later are added as needed.
+        """
+        self.labels = np.unique(labels) if labels is not None else np.array([])  # Sorted class labels.
+        self.matrix = np.zeros((len(self.labels), len(self.labels)), dtype=np.int64)
+
+    def add_labels(self, labels):
+        """
+        Add any unseen labels to this accumulator, growing the confusion matrix to match.
+
+        :param labels: an array of labels, possibly containing labels that have already been seen.
+        """
+
+        new_labels = np.union1d(self.labels, labels) if len(self.labels) > 0 else np.unique(labels)
+        if len(new_labels) == len(self.labels):
+            return
+
+        # Copy the existing counts into their positions within the larger matrix.
+        positions = np.searchsorted(new_labels, self.labels)
+        matrix = np.zeros((len(new_labels), len(new_labels)), dtype=np.int64)
+        matrix[np.ix_(positions, positions)] = self.matrix
+
+        self.labels = new_labels
+        self.matrix = matrix
+
+    def update(self, y_true, y_pred):
+        """
+        Add the counts of a chunk of actual and predicted labels to the confusion matrix.
+
+        :param y_true: the actual labels of the chunk.
+        :param y_pred: the predicted labels of the chunk.
+        """
+
+        y_true = np.asarray(y_true)
+        y_pred = np.asarray(y_pred)
+        if len(y_true) != len(y_pred):
+            raise ValueError('Precondition: length of actuals does not match length of preds')
+        if len(y_true) == 0:
+            return
+
+        # Encode both label vectors at once, then map the chunk's codes onto the codes of self.labels.
+        chunk_labels, codes = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        self.add_labels(chunk_labels)
+        codes = np.searchsorted(self.labels, chunk_labels)[codes]
+
+        n, n_labels = len(y_true), len(self.labels)
+        counts = np.bincount(codes[:n] * n_labels + codes[n:], minlength=n_labels * n_labels)
+        self.matrix += counts.reshape(n_labels, n_labels)
+
+    def merge(self, other):
+        """
+        Merge the counts of another ConfusionAccumulator into this one.
+
+        :param other: a ConfusionAccumulator.
+        :return: this accumulator.
+        """
+
+        self.add_labels(other.labels)
+        positions = np.searchsorted(self.labels, other.labels)
+        self.matrix[np.ix_(positions, positions)] += other.matrix
+        return self
+
+    def count(self):
+        """Return the number of samples accumulated."""
+        return int(self.matrix.sum())
+
+    def support(self):
+        """Return the number of samples of each actual class, in the order of self.labels."""
+        return self.matrix.sum(axis=1)
+
+    def present(self):
+        """
+        Return which labels are present in the actual or predicted labels accumulated, in the order of self.labels.
+        Known labels (e.g. from model.classes_) which were never seen are left out of averages and tables, as in
+        sklearn, which scores only the labels of y_true and y_pred.
+
+        :return: a boolean array of shape (n_classes,).
+        """
+        return (self.matrix.sum(axis=0) + self.support()) > 0
+
+    def accuracy(self):
+        """Return the fraction of samples whose predicted label matches the actual label."""
+        return np.trace(self.matrix) / self.count()
+
+    def precision(self, average=None):
+        """
+        Return the precision of each class (the fraction of its predictions which were correct), or their average.
+        Classes that are never predicted have a precision of 0, as in sklearn.
+
+        :param average: None for the score of each class, or one of AVERAGES.
+        :return: an array of shape (n_classes,), or a number if averaged.
+        """
+        return self.average(self.ratio(np.diag(self.matrix), self.matrix.sum(axis=0)), average)
+
+    def recall(self, average=None):
+        """
+        Return the recall of each class (the fraction of its samples which were predicted), or their average.
+        Classes that are not present have a recall of 0, as in sklearn.
+
+        :param average: None for the score of each class, or one of AVERAGES.
+        :return: an array of shape (n_classes,), or a number if averaged.
+        """
+        return self.average(self.ratio(np.diag(self.matrix), self.support()), average)
+
+    def f1(self, average=None):
+        """
+        Return the F1 score of each class, in the order of self.labels, or their average.
+        Classes that are neither predicted nor present have a score of 0, as in sklearn.
+
+        :param average: None for the score of each class, or one of AVERAGES.
+        :return: an array of shape (n_classes,), or a number if averaged.
+        """
+
+        denominator = self.matrix.sum(axis=0) + self.support()
+        return self.average(self.ratio(2 * np.diag(self.matrix), denominator), average)
+
+    def ratio(self, numerator, denominator):
+        """Divide two arrays of per-class counts, giving 0 wherever the denominator is 0."""
+        scores = np.zeros(len(self.labels))
+        np.divide(numerator, denominator, out=scores, where=denominator > 0)
+        return scores
+
+    def average(self, scores, average):
+        """
+        Average per-class scores over the labels which are present (see present()).
+        For single-label classification, the micro average of precision, recall and F1 is the accuracy.
+
+        :param scores: an array of shape (n_classes,)
+        :param average: None to return the scores unchanged, 'macro' for their mean, 'weighted' for their mean
+        weighted by each class's support, or 'micro' for the score of the pooled counts.
+        :return: the scores, or a number if averaged.
+        """
+
+        if average is None:
+            return scores
+        present = self.present()
+        if average == 'macro':
+            return scores[present].mean() if present.any() else 0.0
+        if average == 'weighted':
+            return np.average(scores, weights=self.support()) if self.count() > 0 else 0.0
+        if average == 'micro':
+            return self.accuracy()
+        raise ValueError(f'Precondition: average must be None or one of {AVERAGES}, got {average}')
+
+
+def confusion(y_true, y_pred, labels=None):
+    """
+    Build the confusion matrix of a whole vector of actual and predicted labels, in a single pass.
+
+    :param y_true: the actual labels.
+    :param y_pred: the predicted labels.
+    :param labels: the known class labels (e.g. model.classes_), or None to use only the labels seen.
+    :return: a filled ConfusionAccumulator.
+    """
+
+    acc = ConfusionAccumulator(labels)
+    acc.update(y_true, y_pred)
+    return acc
+
+
+class RegressionAccumulator:
+    """
+    Accumulates the sums of absolute errors and squared errors, the largest absolute error and the moments of y,
+    from which the MSE, RMSE, MAE, max error and R^2 score are computed.
+
+    Each chunk's residuals are computed once, as a float64 numpy array, and every sum is then reduced from that
+    one array, so all of the metrics cost a single pass over the chunk.
+    """
+
+    def __init__(self):
+        self.n = 0  # The number of samples accumulated.
+        self.sum_abs_error = 0.0  # The sum of |y - pred|.
+        self.sum_sq_error = 0.0  # The sum of (y - pred)^2.
+        self.max_abs_error = 0.0  # The largest |y - pred|.
+        self.mean_y = 0.0  # The running mean of y.
+        self.m2_y = 0.0  # The running sum of squared deviations of y from its mean.
+
+    def update(self, y_true, y_pred):
+        """
+        Add the errors of a chunk of actual and predicted values.
+
+        :param y_true: the actual values of the chunk.
+        :param y_pred: the predicted values of the chunk.
+        """
+
+        self.merge(RegressionAccumulator.of_residuals(residuals(y_true, y_pred), y_true))
+
+    @staticmethod
+    def of_residuals(errors, y_true):
+        """
+        Return an accumulator holding the sums of an array of residuals.
+
+        :param errors: the residuals y - pred, as returned by residuals().
+        :param y_true: the actual values the residuals were computed from.
+        :return: a RegressionAccumulator.
+        """
+
+        acc = RegressionAccumulator()
+        if len(errors) == 0:
+            return acc
+
+        y_true = np.asarray(y_true, dtype=np.float64)
+        abs_errors = np.abs(errors)
+        deviations = y_true - y_true.mean()
+
+        acc.n = len(errors)
+        acc.sum_abs_error = float(abs_errors.sum())
+        acc.max_abs_error = float(abs_errors.max())
+        acc.sum_sq_error = float(np.dot(errors, errors))
+        acc.mean_y = float(y_true.mean())
+        acc.m2_y = float(np.dot(deviations, deviations))
+        return acc
+
+    def merge(self, other):
+        """
+        Merge the state of another RegressionAccumulator into this one.
+        The moments of y are combined with Chan et al.'s parallel update, which avoids the cancellation
+        error of subtracting large sums of squares.
+
+        :param other: a RegressionAccumulator.
+        :return: this accumulator.
+        """
+
+        if other.n == 0:
+            return self
+
+        n = self.n + other.n
+        delta = other.mean_y - self.mean_y
+        self.mean_y += delta * other.n / n
+        self.m2_y += other.m2_y + delta * delta * self.n * other.n / n
+        self.sum_abs_error += other.sum_abs_error
+        self.sum_sq_error += other.sum_sq_error
+        self.max_abs_error = max(self.max_abs_error, other.max_abs_error)
+        self.n = n
+        return self
+
+    def count(self):
+        """Return the number of samples accumulated."""
+        return self.n
+
+    def mse(self):
+        """Return the mean squared error."""
+        return self.sum_sq_error / self.n
+
+    def rmse(self):
+        """Return the root mean squared error."""
+        return np.sqrt(self.mse())
+
+    def mae(self):
+        """Return the mean absolute error."""
+        return self.sum_abs_error / self.n
+
+    def max_error(self):
+        """Return the largest absolute error."""
+        return self.max_abs_error
+
+    def r2(self):
+        """
+        Return the R^2 (coefficient of determination) score.
+        As in sklearn, a constant y gives a score of 1 for perfect predictions and 0 otherwise.
+        """
+
+        if self.m2_y == 0:
+            return 1.0 if self.sum_sq_error == 0 else 0.0
+        return 1 - self.sum_sq_error / self.m2_y
+
+
+def residuals(y_true, y_pred):
+    """
+    Compute the residuals y - pred in a single vectorised subtraction, as a float64 numpy array.
+    Pandas series are unwrapped to their numpy arrays first, so no index is aligned or built.
+
+    :param y_true: the actual values, as an array or Pandas series.
+    :param y_pred: the predicted values, as an array or Pandas series.
+    :return: an array of shape (n_samples,)
+    """
+
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    if len(y_true) != len(y_pred):
+        raise ValueError('Precondition: length of actuals does not match length of preds')
+
+    return np.subtract(y_true, y_pred, dtype=np.float64)
+
+
+class MomentsAccumulator:
+    """
+    Accumulates the count, mean, sum of squared deviations, minimum and maximum of each column of numeric data,
+    from which the mean and standard deviation of each column are computed in a single pass.
+    """
+
+    def __init__(self, n_columns, extremes=True):
+        """
+        :param n_columns: the number of columns being accumulated.
+        :param extremes: whether to accumulate the minimum and maximum, which can be left out if they are already
+        known (e.g. from the data's profile, see handlers.validation).
+        """
+        self.extremes = extremes
+        self.n = 0  # The number of rows accumulated.
+        self.mean = np.zeros(n_columns)  # The running mean of each column.
+        self.m2 = np.zeros(n_columns)  # The running sum of squared deviations of each column from its mean.
+        self.min = np.full(n_columns, np.inf)  # The minimum of each column.
+        self.max = np.full(n_columns, -np.inf)  # The maximum of each column.
+
+    def update(self, values):
+        """
+        Add a chunk of rows. The chunk is summarised with vectorised operations and then merged in,
+        so the cost per chunk is a couple of passes over that chunk only.
+
+        :param values: a numeric array of shape (n_rows, n_columns). It is up-cast to float64 for accumulation.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.mean):
+            raise ValueError(f'Precondition: expected a chunk with {len(self.mean)} columns, got shape {values.shape}')
+        if len(values) == 0:
+            return
+
+        chunk = MomentsAccumulator(values.shape[1], self.extremes)
+        chunk.n = len(values)
+        chunk.mean = values.mean(axis=0)
+        chunk.m2 = np.square(values - chunk.mean).sum(axis=0)
+        if self.extremes:
+            chunk.min = values.min(axis=0)
+            chunk.max = values.max(axis=0)
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Merge the state of another MomentsAccumulator into this one, using Chan et al.'s parallel update.
+
+        :param other: a MomentsAccumulator over the same columns.
+        :return: this accumulator.
+        """
+
+        if other.n == 0:
+            return self
+
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.n / n)
+        self.m2 = self.m2 + other.m2 + np.square(delta) * (self.n * other.n / n)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.n = n
+        return self
+
+    def count(self):
+        """Return the number of rows accumulated."""
+        return self.n
+
+    def std(self):
+        """Return the (population) standard deviation of each column, as np.std does."""
+        return np.sqrt(self.m2 / self.n)
+
+
+def accumulate_moments(tbl, chunksize=DEFAULT_CHUNKSIZE, extremes=True):
+    """
+    Accumulate the moments of every numeric column of a table, a bounded number of rows at a time.
+
+    :param tbl: the data as a Pandas dataframe.
+    :param chunksize: the number of rows converted and summarised at a time.
+    :param extremes: whether to accumulate the minimum and maximum of each column too.
+    :return: a tuple (columns, MomentsAccumulator) where columns are the names of the numeric columns.
+    """
+
+    numeric = tbl.select_dtypes('number')
+    acc = MomentsAccumulator(numeric.shape[1], extremes)
+    for start in range(0, len(numeric), chunksize):
+        acc.update(numeric.iloc[start:start + chunksize].to_numpy(dtype=np.float64))
+    return numeric.columns, acc
+
+
+def stream_moments(file, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """
+    Accumulate the moments of every numeric column of a .csv file in a single streaming pass,
+    without loading the whole file into memory. Rows with missing values are dropped.
+
+    :param file: the .csv file.
+    :param chunksize: the number of rows parsed per chunk.
+    :param progress: an optional callable taking a float between 0 and 1, called after each chunk is read.
+    :return: a tuple (columns, MomentsAccumulator) where columns are the names of the numeric columns.
+    """
+
+    columns = None
+    acc = None
+    for chunk, _ in iter_csv_chunks(file, chunksize, progress):
+        if acc is None:
+            columns = chunk.select_dtypes('number').columns
+            acc = MomentsAccumulator(len(columns))
+        acc.update(chunk[columns].to_numpy(dtype=np.float64))
+
+    # Post-condition check: as with a loaded dataframe, there must be at least one complete row.
+    if acc is None or acc.count() == 0:
+        raise ValueError('Data cannot be empty!')
+
+    return columns, acc
+
+
+def accumulate(analysers, model, chunks, target_idx=-1):
+    """
+    Update the accumulators of the given analysers with each chunk of data.
+    Analysers that share an accumulator type share a single accumulator, so each chunk is predicted once, in the
+    model's dtype as a handler would predict it (see handlers.layout.model_input).
+
+    This function can be run by several workers over different parts of a dataset, and the returned
+    accumulators of each type merged afterwards with their merge() methods.
+
+    :param analysers: a list of metric analysers which support accumulation (see Analyser::accumulator).
+    :param model: the sklearn model to evaluate.
+    :param chunks: an iterable of dataframes holding the data, with no missing values.
+    :param target_idx: the index of the target feature in the dataset.
+    :return: a dictionary mapping accumulator types to accumulators.
+    """
+
+    accumulators = {}
+    for analyser in analysers:
+        acc = analyser.accumulator(model)
+        if acc is None:
+            raise ValueError(f'Precondition: {type(analyser).__name__} does not support accumulation')
+        accumulators.setdefault(type(acc), acc)
+
+    for chunk in chunks:
+        if len(chunk) == 0:
+            continue
+        target = chunk.columns[target_idx]
+        y_pred = model.predict(model_input(model, chunk.drop(target, axis=1)))
+        for acc in accumulators.values():
+            acc.update(chunk[target], y_pred)
+
+    return accumulators
+
+
+def stream_evaluate(analysers, model, file, target_idx=-1, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """
+    Evaluate the given metric analysers over a .csv file in a single streaming pass, without loading the whole
+    file into memory. Rows with missing values are dropped, as in handlers.validation.validate_data.
+
+    :param analysers: a list of metric analysers which support accumulation (see Analyser::accumulator).
+    :param model: the sklearn model to evaluate.
+    :param file: the .csv file.
+    :param target_idx: the index of the target feature in the dataset.
+    :param chunksize: the number of rows parsed per chunk.
+    :param progress: an optional callable taking a float between 0 and 1, called after each chunk is read.
+    :return: a list of results, one for each analyser, in the same format as that analyser's analyse().
+    """
+
+    chunks = (chunk for chunk, _ in iter_csv_chunks(file, chunksize, progress))
+    accumulators = accumulate(analysers, model, chunks, target_idx)
+
+    # Post-condition check: as with a loaded dataframe, there must be at least one complete row.
+    for acc in accumulators.values():
+        if acc.count() == 0:
+            raise ValueError('Data cannot be empty!')
+
+    results = []
+    for analyser in analysers:
+        acc_type = type(analyser.accumulator(model))
+        results.append(analyser.finalise(accumulators[acc_type], model))
+    return results
@@ -1,17 +1,18 @@
+import numpy as np
 from multimethod import multimethod
-from sklearn.metrics import accuracy_score
-from analysers import Analyser
-from streamlit import cache
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import ConfusionAccumulator, confusion
+from analysers.intervals import DEFAULT_CONFIDENCE, proportion_interval
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
 
 
 class AccuracyAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Perform an analysis to return the accuracy in the model.
@@ -26,8 +27,7 @@ class AccuracyAnalyser(Analyser):
         if hdlr.problem_type != 'classification':  # Check that the current problem type is classification.
             raise ValueError(f'Precondition: problem type of {hdlr.problem_type} is not supported')
 
-        df = hdlr.predict()
-        acc = accuracy_score(df['actual'], df['predicted'])
+        acc = confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_).accuracy()
 
         return acc
 
@@ -46,12 +46,42 @@ class AccuracyAnalyser(Analyser):
         if hdlr.problem_type != 'classification':  # Check that the current problem type is classification.
             raise ValueError(f'Precondition: problem type of {hdlr.problem_type} is not supported')
 
-        df = hdlr.predict()
-        acc = accuracy_score(df['actual'], df['predicted'])
+        acc = confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_).accuracy()
 
         # Display the results.
         print(f'Accuracy is {round(acc * 100, 3)}% (3 dp)')
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the Wilson confidence interval of the accuracy, if the handler's data is a sample.
+
+        :return: a tuple (low, high), or None if the data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        correct = np.count_nonzero(np.asarray(hdlr.y) == hdlr.get_predictions())
+        return proportion_interval(correct, len(hdlr.y), hdlr.population_size, confidence)
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the accuracy chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a ConfusionAccumulator.
+        """
+        return ConfusionAccumulator(model.classes_)
+
+    def finalise(self, acc, model):
+        """
+        Return the accuracy from a filled ConfusionAccumulator.
+
+        :return: an accuracy score between 0 and 1.
+        """
+        return acc.accuracy()
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
@@ -0,0 +1,215 @@
+"""
+This module contains a blockwise, memory-bounded engine for computing the correlations between features.
+
+The columns of the data are standardized once, so that the correlation between two features is simply the dot product
+of their standardized columns. The correlation matrix is then computed one tile at a time with matrix products, and
+the strong pairs are streamed out of each tile as it is computed. The full p x p matrix is only kept if it is small
+enough to hold in memory, or if it is spilled to a memory-mapped file. Otherwise, the standardized copy of the data is
+dropped once the strong pairs are found, and only the mean and norm of each column are kept: any window of the matrix
+is recomputed on demand by standardizing just the columns it spans, read again from the source table.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+DEFAULT_BLOCK_SIZE = 1024  # The number of features along each side of a tile.
+DENSE_LIMIT = 2000  # The maximum number of features for which the full matrix is kept in memory.
+
+
+def standardize(values):
+    """
+    Standardize the columns of a float array in place, so that each column has a mean of 0 and a norm of 1.
+    The correlation between columns i and j is then the dot product of those columns.
+    Constant columns have no defined correlation, so they are filled with NaN (as DataFrame.corr() does).
+
+    :param values: a float array of shape (n_samples, n_features), which is overwritten.
+    :return: a tuple (values, means, norms) of the standardized array and the mean and norm (after centering) of each
+    column, with which the same columns can be standardized again (see CorrelationMatrix::window).
+    """
+
+    means = values.mean(axis=0)
+    values -= means
+    norms = np.sqrt(np.einsum('ij,ij->j', values, values))
+    norms[norms == 0] = np.nan
+    values /= norms
+    return values, means, norms
+
+
+def sort_pairs(rows, cols, values, names, top_k=None):
+    """
+    Sort pairs of features by decreasing strength of correlation, keeping only the strongest k if top_k is given.
+
+    :param rows: the index of the first feature of each pair.
+    :param cols: the index of the second feature of each pair.
+    :param values: the correlation of each pair.
+    :param names: the names of the features.
+    :param top_k: if given, only the k strongest pairs are returned.
+    :return: a dataframe with columns ['feature_1', 'feature_2', 'r'], sorted by decreasing strength |r|.
+    """
+
+    if top_k is not None and top_k < 0:
+        raise ValueError(f'Precondition: top_k must not be negative, got {top_k}')
+
+    strengths = np.abs(values)
+
+    # Sort by decreasing strength, only partially sorting the candidates if just the top k are wanted.
+    if top_k is not None and top_k < len(strengths):
+        order = np.argpartition(-strengths, top_k)[:top_k] if top_k > 0 else np.array([], dtype=int)
+        order = order[np.argsort(-strengths[order], kind='stable')]
+    else:
+        order = np.argsort(-strengths, kind='stable')
+
+    names = np.asarray(names)
+    return pd.DataFrame({'feature_1': names[rows[order]], 'feature_2': names[cols[order]], 'r': values[order]})
+
+
+class CorrelationMatrix:
+    """
+    The result of the blockwise correlation engine.
+    Holds the strong pairs of features, and gives access to any window of the full correlation matrix, either from
+    the stored (possibly memory-mapped) matrix or by recomputing it from the source table.
+    """
+
+    def __init__(self, columns, pairs, matrix=None, source=None, positions=None, means=None, norms=None):
+        """
+        :param columns: the names of the features.
+        :param pairs: the strong pairs, as returned by sort_pairs().
+        :param matrix: the full correlation matrix (an array or memmap), or None if it was not kept.
+        :param source: the table the features were read from (not a copy), used to recompute windows when matrix is
+        None.
+        :param positions: the position of each feature among the source's columns.
+        :param means: the mean of each feature, as returned by standardize().
+        :param norms: the norm of each centered feature, as returned by standardize().
+        """
+        if matrix is None and source is None:
+            raise ValueError('Precondition: either the matrix or the source table must be kept')
+
+        self.columns = pd.Index(columns)  # The names of the features.
+        self.pairs = pairs  # The strong pairs of features.
+        self.matrix = matrix  # The full correlation matrix, or None.
+        self.source = source  # The source table, or None if the matrix is kept.
+        self.positions = positions  # The position of each feature in the source table.
+        self.means = means  # The mean of each feature.
+        self.norms = norms  # The norm of each centered feature.
+
+    @property
+    def shape(self):
+        """The shape of the full correlation matrix."""
+        return len(self.columns), len(self.columns)
+
+    def standardized(self, start, end):
+        """
+        Standardize the features [start, end) again from the source table, exactly as blockwise_correlation() did.
+
+        :param start: the index of the first feature.
+        :param end: the index after the last feature.
+        :return: a float array of shape (n_samples, end - start).
+        """
+
+        values = self.source.iloc[:, self.positions[start:end]].to_numpy(dtype=np.float64, copy=True)
+        values -= self.means[start:end]
+        values /= self.norms[start:end]
+        return values
+
+    def window(self, row_start=0, col_start=0, size=None):
+        """
+        Return a square window of the correlation matrix as a dataframe.
+
+        :param row_start: the index of the first feature along the rows.
+        :param col_start: the index of the first feature along the columns.
+        :param size: the number of features along each side of the window, or None for the whole matrix.
+        :return: a dataframe of shape at most [size, size].
+        """
+
+        n_features = len(self.columns)
+        if size is None:
+            size = n_features
+        if not (0 <= row_start < n_features and 0 <= col_start < n_features):
+            raise ValueError(f'Precondition: window start ({row_start}, {col_start}) is outside the matrix')
+
+        row_end = min(row_start + size, n_features)
+        col_end = min(col_start + size, n_features)
+
+        if self.matrix is not None:
+            values = np.array(self.matrix[row_start:row_end, col_start:col_end])
+        else:
+            values = self.standardized(row_start, row_end).T @ self.standardized(col_start, col_end)
+
+        return pd.DataFrame(values, index=self.columns[row_start:row_end], columns=self.columns[col_start:col_end])
+
+
+def blockwise_correlation(tbl, threshold, top_k=None, block_size=DEFAULT_BLOCK_SIZE, spill_path=None):
+    """
+    Compute the correlations between the numeric features of a table, tile by tile.
+
+    Only the tiles on or below the diagonal are computed, as the matrix is symmetric. Strong pairs are taken from the
+    strict lower triangle of each tile as it is computed; when top_k is given, only the strongest k seen so far
+    are carried over between tiles.
+
+    :param tbl: the data as a Pandas dataframe. If the full matrix is not kept, a reference to it is kept instead.
+    :param threshold: the minimum absolute correlation for a pair to be reported.
+    :param top_k: if given, only the k strongest pairs are reported.
+    :param block_size: the number of features along each side of a tile.
+    :param spill_path: if given, the full matrix is written to a memory-mapped .npy file at this path.
+    :return: a CorrelationMatrix.
+    """
+
+    if block_size <= 0:
+        raise ValueError(f'Precondition: block_size must be positive, got {block_size}')
+
+    positions = np.flatnonzero([is_numeric_dtype(dtype) and not is_bool_dtype(dtype) for dtype in tbl.dtypes])
+    columns = tbl.columns[positions]
+    standardized, means, norms = standardize(tbl.iloc[:, positions].to_numpy(dtype=np.float64, copy=True))
+    n_features = standardized.shape[1]
+
+    # Decide where (if anywhere) the full matrix is kept.
+    if spill_path is not None:
+        matrix = np.lib.format.open_memmap(spill_path, mode='w+', dtype=np.float64, shape=(n_features, n_features))
+    elif n_features <= DENSE_LIMIT:
+        matrix = np.empty((n_features, n_features))
+    else:
+        matrix = None
+
+    rows, cols, values = [np.array([], dtype=int)], [np.array([], dtype=int)], [np.array([])]
+    n_kept = 0
+    for row_start in range(0, n_features, block_size):
+        row_end = min(row_start + block_size, n_features)
+        row_block = standardized[:, row_start:row_end]
+
+        for col_start in range(0, row_end, block_size):
+            col_end = min(col_start + block_size, n_features)
+            tile = row_block.T @ standardized[:, col_start:col_end]
+
+            if matrix is not None:
+                matrix[row_start:row_end, col_start:col_end] = tile
+                matrix[col_start:col_end, row_start:row_end] = tile.T
+
+            # Select the strong entries, excluding the diagonal and above on tiles that straddle the diagonal.
+            mask = np.abs(tile) >= threshold
+            if col_start == row_start:
+                mask = np.tril(mask, k=-1)
+            tile_rows, tile_cols = np.nonzero(mask)
+            rows.append(tile_rows + row_start)
+            cols.append(tile_cols + col_start)
+            values.append(tile[tile_rows, tile_cols])
+            n_kept += len(tile_rows)
+
+            # Bound the number of pairs carried between tiles when only the top k are wanted.
+            if top_k is not None and n_kept > 2 * max(top_k, block_size):
+                kept = sort_pairs(np.concatenate(rows), np.concatenate(cols), np.concatenate(values),
+                                  np.arange(n_features), top_k)
+                rows = [kept['feature_1'].to_numpy()]
+                cols = [kept['feature_2'].to_numpy()]
+                values = [kept['r'].to_numpy()]
+                n_kept = len(kept)
+
+    if isinstance(matrix, np.memmap):
+        matrix.flush()
+
+    pairs = sort_pairs(np.concatenate(rows), np.concatenate(cols), np.concatenate(values), columns, top_k)
+
+    if matrix is not None:
+        return CorrelationMatrix(columns, pairs, matrix=matrix)
+
+    # Keep only the scale of each column rather than the standardized copy of the data.
+    return CorrelationMatrix(columns, pairs, source=tbl, positions=positions, means=means, norms=norms)
@@ -1,90 +1,95 @@
+import os
 from multimethod import multimethod
-from analysers import Analyser
-from streamlit import cache
+from analysers import Analyser, analysis_cache
+from analysers.blockwise_corr import blockwise_correlation
+from analysers.intervals import DEFAULT_CONFIDENCE, correlation_interval
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
 
+STRONG_CORRELATION = 0.7  # Correlations at least this strong (in absolute value) are reported as strong.
+
+
+def correlations(tbl, threshold=STRONG_CORRELATION, top_k=None, spill_path=None):
+    """
+    Calculate the correlation between the numeric features of a table with the blockwise engine
+    (see analysers.blockwise_corr), and find the strong correlations.
+
+    :param tbl: the data as a Pandas dataframe.
+    :param threshold: the minimum absolute correlation for a pair to be reported.
+    :param top_k: if given, only the k strongest pairs are returned.
+    :param spill_path: if given, the full correlation matrix is spilled to a memory-mapped file at this path.
+    :return: a tuple (CorrelationMatrix, strong correlations) - see blockwise_correlation().
+    """
+
+    corr_matrix = blockwise_correlation(tbl, threshold, top_k, spill_path=spill_path)
+    return corr_matrix, corr_matrix.pairs
+
 
 class CorrAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
-    def analyse(self, hdlr: StandardHandler):
+    @analysis_cache
+    def analyse(self, hdlr: StandardHandler, threshold=STRONG_CORRELATION, top_k=None, spill_dir=None):
         """
-        Calculate and return the correlation between features as a dataframe.
-        Also returns any strong correlations (> 0.7) as a dictionary of key-value pairs where the key is
-        a string of the form 'feature1 & feature2', and the value is the correlation strength.
-
-        :return: a tuple (dataframe, dictionary)
+        Calculate and return the correlation between features as a CorrelationMatrix, from which any window of the
+        matrix can be taken (see analysers.blockwise_corr).
+        Also returns any strong correlations (|r| >= threshold) as a dataframe with columns
+        ['feature_1', 'feature_2', 'r'], sorted from strongest to weakest.
+
+        :param threshold: the minimum absolute correlation for a pair to be considered strong.
+        :param top_k: if given, only the k strongest pairs are returned.
+        :param spill_dir: if given, the full correlation matrix is spilled to a memory-mapped file in this directory.
+        :return: a tuple (CorrelationMatrix, dataframe)
         """
 
         if hdlr is None:
             raise ValueError('Precondition: handler cannot be None')
 
-        tbl = hdlr.get_tabular()
-        corr_tbl = tbl.corr()
-
-        # Find any strong correlations by checking each entry in the correlation table.
-        strong_corrs = {}
-        for i in range(corr_tbl.shape[0]):
-            for j in range(corr_tbl.shape[0]):
-                # Once we reach the diagonal we stop searching this row, because we want
-                # to restrict our search to the 'lower triangle' to avoid duplicates.
-                if i == j:
-                    break
-
-                r = abs(corr_tbl.iloc[i, j])  # Take the strength of the correlation.
-
-                # If the correlation is stronger or equal to 0.7, consider it to be strong.
-                if r >= 0.7:
-                    key = str(tbl.columns[i]) + ' & ' + str(tbl.columns[j])
-                    strong_corrs[key] = r
+        spill_path = None
+        if spill_dir is not None:
+            spill_path = os.path.join(spill_dir, f'corr_{hdlr.fingerprint}.npy')
 
-        # Return the correlation table as well as any strong correlations as a dictionary.
-        return corr_tbl, strong_corrs
+        return correlations(hdlr.get_tabular(), threshold, top_k, spill_path)
 
     @multimethod
-    def analyse(self, hdlr: TestHandler):
+    def analyse(self, hdlr: TestHandler, threshold=STRONG_CORRELATION, top_k=None):
         """
         Calculate and display the correlations between features.
-        Also reports any strong correlations (> 0.7).
+        Also reports any strong correlations (|r| >= threshold).
         """
 
         if hdlr is None:
             raise ValueError('Precondition: handler cannot be None')
 
-        tbl = hdlr.get_tabular()
-        corr_tbl = tbl.corr()
-        print(corr_tbl)
-
-        # Find any strong correlations by checking each entry in the correlation table.
-        strong_corrs = {}
-        for i in range(corr_tbl.shape[0]):
-            for j in range(corr_tbl.shape[0]):
-                # Once we reach the diagonal we stop searching this row, because we want
-                # to restrict our search to the 'lower triangle'.
-                if i == j:
-                    break
-
-                r = abs(corr_tbl.iloc[i, j])  # Take the strength of the correlation.
-
-                # If the correlation is stronger or equal to 0.7, consider it to be strong.
-                if r >= 0.7:
-                    key = str(tbl.columns[i]) + ' & ' + str(tbl.columns[j])
-                    strong_corrs[key] = r
+        corr_matrix, strong_corrs = correlations(hdlr.get_tabular(), threshold, top_k)
+        print(corr_matrix.window())
 
         # Report any strong correlations.
-        if len(strong_corrs) >= 0:
+        if len(strong_corrs) > 0:
             print(f'{len(strong_corrs)} strong correlations found:')
-            for kv in strong_corrs.items():
-                key = kv[0]
-                value = kv[1]
-                print(f'{key}: {round(value, 3)}')
+            for first, second, r in strong_corrs.itertuples(index=False):
+                print(f'{first} & {second}: {round(r, 3)}')
         else:
             print('No strong correlations found.')
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the confidence intervals of the strong correlations, if the handler's data is a sample.
+
+        :return: a dataframe with columns ['feature_1', 'feature_2', 'r', 'low', 'high'], in the order of the
+        strong correlations returned by analyse(), or None if the data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        _, strong_corrs = self.analyse(hdlr)
+        low, high = correlation_interval(strong_corrs['r'].to_numpy(), len(hdlr.get_tabular()), confidence)
+        return strong_corrs.assign(low=low, high=high)
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
@@ -1,19 +1,20 @@
+import numpy as np
 import pandas as pd
 from multimethod import multimethod
-from sklearn.metrics import f1_score
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import ConfusionAccumulator, confusion
+from analysers.intervals import DEFAULT_CONFIDENCE, bootstrap_interval
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
 from exceptions import UnsupportedMethodException
-from streamlit import cache
 
 
 class F1Analyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Calculate and return the f1 score(s) for the current model.
@@ -30,15 +31,8 @@ class F1Analyser(Analyser):
         if hdlr.problem_type != 'classification':
             raise UnsupportedMethodException('F1 score cannot be used on non-classification model.')
 
-        # Give the f1 scores for each class if not binary classification.
-        if len(hdlr.model.classes_) == 2:
-            score = f1_score(hdlr.y, hdlr.model.predict(hdlr.X))
-            return score
-        else:
-            scores = f1_score(hdlr.y, hdlr.model.predict(hdlr.X), average=None)
-            score_table = pd.DataFrame(columns=hdlr.model.classes_)
-            score_table.loc[0] = scores
-            return score_table
+        # Give the f1 scores for each class if not binary classification (see finalise()).
+        return self.finalise(confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_), hdlr.model)
 
     @multimethod
     def analyse(self, hdlr: TestHandler):
@@ -57,15 +51,75 @@ class F1Analyser(Analyser):
             raise UnsupportedMethodException('F1 score cannot be used on non-classification model.')
 
         # Give the f1 scores for each class if not binary classification.
+        scores = self.finalise(confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_), hdlr.model)
         if len(hdlr.model.classes_) == 2:
-            score = f1_score(hdlr.y, hdlr.model.predict(hdlr.X))
-            print('The F1 score is:', score)
+            print('The F1 score is:', scores)
         else:
-            scores = f1_score(hdlr.y, hdlr.model.predict(hdlr.X), average=None)
-            score_table = pd.DataFrame(columns=hdlr.model.classes_)
-            score_table.loc[0] = scores
             print('The F1 scores for each class are:')
-            print(score_table)
+            print(scores)
+
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the bootstrap confidence interval of the f1 score(s), if the handler's data is a sample.
+        The labels are encoded once, so each resample only has to count its confusion matrix.
+
+        :return: a tuple (low, high), or a dataframe of shape [2, c] with rows low and high, or None if the data
+        is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        # Use the same labels as analyse(): the model's classes, of which only those present are shown.
+        y_true = np.asarray(hdlr.y)
+        values = np.concatenate([y_true, hdlr.get_predictions()])
+        labels = np.union1d(hdlr.model.classes_, values)
+        codes = np.searchsorted(labels, values)
+        n, n_labels = len(y_true), len(labels)
+        pairs = codes[:n] * n_labels + codes[n:]  # The confusion matrix cell of each row.
+        acc = ConfusionAccumulator(labels)
+        acc.matrix = np.bincount(pairs, minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+        present = acc.present()
+
+        def f1(rows):
+            acc.matrix = np.bincount(pairs[rows], minlength=n_labels * n_labels).reshape(n_labels, n_labels)
+            return acc.f1()
+
+        low, high = bootstrap_interval(f1, n, confidence)
+
+        # For binary classification, the positive class is the second of the model's classes.
+        if len(hdlr.model.classes_) == 2:
+            positive = np.searchsorted(labels, hdlr.model.classes_[1])
+            return low[positive], high[positive]
+
+        return pd.DataFrame([low[present], high[present]], index=['low', 'high'], columns=labels[present])
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the f1 score(s) chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a ConfusionAccumulator.
+        """
+        return ConfusionAccumulator(model.classes_)
+
+    def finalise(self, acc, model):
+        """
+        Return the f1 score(s) from a filled ConfusionAccumulator.
+
+        :returns: a score between 0 and 1, or a dataframe of shape [1, c] where c is the number of classes present
+        in the actual or predicted labels (see ConfusionAccumulator::present).
+        """
+
+        scores = acc.f1()
+
+        # For binary classification, the positive class is the second of the model's classes.
+        if len(model.classes_) == 2:
+            return scores[np.searchsorted(acc.labels, model.classes_[1])]
+
+        present = acc.present()
+        return pd.DataFrame([scores[present]], columns=acc.labels[present])
 
     def is_metric(self):
         """
@@ -0,0 +1,155 @@
+"""
+This module computes confidence intervals for results estimated from a random sample of the data (see
+handlers.sampling), so that approximate results can be shown with their uncertainty.
+
+Means (including the MSE and MAE, which are means of per-row losses) use the normal approximation, proportions (the
+accuracy) use the Wilson score interval, standard deviations use the delta method with the sample's own kurtosis
+rather than assuming normal data, and correlations use Fisher's z transform. Statistics without a simple standard
+error (F1 and R^2 scores) use the percentile bootstrap.
+
+Samples are drawn without replacement from a file whose size is known, so the standard errors of the closed form
+intervals are scaled by the finite population correction: a sample of most of the file gives a narrow interval.
+"""
+from statistics import NormalDist
+import numpy as np
+
+DEFAULT_CONFIDENCE = 0.95  # The confidence level of the intervals shown.
+N_RESAMPLES = 200  # The number of bootstrap resamples.
+RANDOM_STATE = 0  # Fixes the bootstrap resamples, so that an interval is the same every time it is computed.
+
+
+def z_value(confidence):
+    """
+    Return the two-sided critical value of the standard normal distribution at a confidence level.
+
+    :param confidence: the confidence level, between 0 and 1.
+    :return: e.g. 1.96 for a confidence of 0.95.
+    """
+
+    # Pre-condition checks.
+    if not 0 < confidence < 1:
+        raise ValueError(f'Precondition: confidence must be between 0 and 1, got {confidence}')
+
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def finite_population_correction(n, population_size):
+    """
+    Return the factor by which the standard error of a sample of n rows shrinks because the rows were drawn without
+    replacement from population_size rows.
+
+    :param n: the number of rows sampled.
+    :param population_size: the number of rows sampled from, or None for an infinite population.
+    :return: a number between 0 and 1.
+    """
+
+    if population_size is None or population_size <= 1:
+        return 1.0
+    return np.sqrt(max(population_size - n, 0) / (population_size - 1))
+
+
+def mean_interval(values, population_size=None, confidence=DEFAULT_CONFIDENCE):
+    """
+    Return the confidence interval of the mean of the population the values were sampled from.
+
+    :param values: an array of shape (n,) or (n, m), in which case each column's mean has an interval.
+    :param population_size: the number of rows sampled from.
+    :param confidence: the confidence level.
+    :return: a tuple (low, high), each a number or an array of shape (m,).
+    """
+
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    mean = values.mean(axis=0)
+    if n < 2:
+        return mean, mean
+
+    error = values.std(axis=0, ddof=1) / np.sqrt(n) * finite_population_correction(n, population_size)
+    margin = z_value(confidence) * error
+    return mean - margin, mean + margin
+
+
+def std_interval(values, population_size=None, confidence=DEFAULT_CONFIDENCE):
+    """
+    Return the confidence interval of the standard deviation of the population the values were sampled from.
+
+    :param values: an array of shape (n,) or (n, m), in which case each column's standard deviation has an interval.
+    :param population_size: the number of rows sampled from.
+    :param confidence: the confidence level.
+    :return: a tuple (low, high), each a number or an array of shape (m,).
+    """
+
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    std = values.std(axis=0, ddof=1)
+    if n < 2:
+        return std, std
+
+    # The variance of the sample variance is (m4 - s^4) / n, so by the delta method se(s) = sqrt((m4 / s^4 - 1) / 4n) s.
+    centred = values - values.mean(axis=0)
+    variance = (centred ** 2).mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        kurtosis = np.where(variance > 0, (centred ** 4).mean(axis=0) / variance ** 2, 1.0)
+    error = std * np.sqrt(np.maximum(kurtosis - 1, 0) / (4 * n)) * finite_population_correction(n, population_size)
+    margin = z_value(confidence) * error
+    return np.maximum(std - margin, 0), std + margin
+
+
+def proportion_interval(successes, n, population_size=None, confidence=DEFAULT_CONFIDENCE):
+    """
+    Return the Wilson score interval of the proportion of the population the successes were sampled from.
+    Unlike the normal approximation, it stays within [0, 1] for proportions close to 0 or 1.
+
+    :param successes: the number of successes in the sample.
+    :param n: the number of rows sampled.
+    :param population_size: the number of rows sampled from.
+    :param confidence: the confidence level.
+    :return: a tuple (low, high).
+    """
+
+    # Pre-condition checks.
+    if n <= 0:
+        raise ValueError(f'Precondition: n must be positive, got {n}')
+
+    z = z_value(confidence) * finite_population_correction(n, population_size)
+    p = successes / n
+    centre = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    margin = z * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2)) / (1 + z ** 2 / n)
+    return max(centre - margin, 0.0), min(centre + margin, 1.0)
+
+
+def correlation_interval(r, n, confidence=DEFAULT_CONFIDENCE):
+    """
+    Return the confidence interval of a correlation coefficient, by Fisher's z transform.
+
+    :param r: the sample correlation, a number or an array.
+    :param n: the number of rows sampled.
+    :param confidence: the confidence level.
+    :return: a tuple (low, high), each of the same shape as r.
+    """
+
+    r = np.asarray(r, dtype=float)
+    if n <= 3:
+        return np.full_like(r, -1.0), np.full_like(r, 1.0)
+
+    z = np.arctanh(np.clip(r, -0.999999, 0.999999))
+    margin = z_value(confidence) / np.sqrt(n - 3)
+    return np.tanh(z - margin), np.tanh(z + margin)
+
+
+def bootstrap_interval(statistic, n, confidence=DEFAULT_CONFIDENCE, n_resamples=N_RESAMPLES, seed=RANDOM_STATE):
+    """
+    Return the percentile bootstrap confidence interval of a statistic of a sample.
+
+    :param statistic: a function taking an array of row indices (a resample) and returning a number or an array.
+    :param n: the number of rows in the sample.
+    :param confidence: the confidence level.
+    :param n_resamples: the number of resamples.
+    :param seed: the seed of the resamples.
+    :return: a tuple (low, high), each of the same shape as the statistic.
+    """
+
+    rng = np.random.default_rng(seed)
+    estimates = np.array([statistic(rng.integers(0, n, n)) for _ in range(n_resamples)])
+    tail = (1 - confidence) / 2
+    return np.quantile(estimates, tail, axis=0), np.quantile(estimates, 1 - tail, axis=0)
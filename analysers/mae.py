@@ -1,18 +1,20 @@
+import numpy as np
 from multimethod import multimethod
-from sklearn.metrics import mean_absolute_error
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import RegressionAccumulator, residuals
+from analysers.intervals import DEFAULT_CONFIDENCE, mean_interval
+from analysers.residuals import residual_summary
 from exceptions import UnsupportedMethodException
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
 
 
 class MAEAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Calculate and return the MAE (Mean Absolute Error) for the current model.
@@ -28,7 +30,7 @@ class MAEAnalyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('MAE cannot be used on non-regression model.')
 
-        score = mean_absolute_error(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.mae()
         return score
 
     @multimethod
@@ -46,10 +48,40 @@ class MAEAnalyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('MAE cannot be used on non-regression model.')
 
-        score = mean_absolute_error(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.mae()
 
         print('The MAE score is:', score)
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the confidence interval of the MAE, as the mean of the absolute errors,
+        if the handler's data is a sample.
+
+        :return: a tuple (low, high), or None if the data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        errors = np.abs(residuals(hdlr.y, hdlr.get_predictions()))
+        return mean_interval(errors, hdlr.population_size, confidence)
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the MAE chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a RegressionAccumulator.
+        """
+        return RegressionAccumulator()
+
+    def finalise(self, acc, model):
+        """
+        Return the MAE from a filled RegressionAccumulator.
+        """
+        return acc.mae()
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
@@ -1,41 +1,52 @@
 import numpy as np
 import pandas as pd
 from multimethod import multimethod
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import accumulate_moments
+from analysers.intervals import DEFAULT_CONFIDENCE, mean_interval, std_interval
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
+
+
+def moments_table(columns, acc, extremes=None):
+    """
+    Build the table of results from a filled MomentsAccumulator.
+
+    :param columns: the names of the accumulated columns.
+    :param acc: a MomentsAccumulator.
+    :param extremes: a tuple (minimums, maximums) of the columns, if they were not accumulated by acc.
+    :returns: dataframe of shape [5, n] with rows Mean, Std, Count, Min and Max.
+    """
+
+    minimums, maximums = extremes if extremes is not None else (acc.min, acc.max)
+    values = np.vstack([acc.mean, acc.std(), np.full(len(columns), acc.count()), minimums, maximums])
+    return pd.DataFrame(values, index=['Mean', 'Std', 'Count', 'Min', 'Max'], columns=columns)
 
 
 class MeanStdAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
-        Calculate and return the mean and standard deviation for every feature of the data.
-        Returns a table of n columns and 2 rows. Columns represent the features, and rows are the
-        mean and standard deviation respectively.
+        Calculate and return the mean and standard deviation for every numeric feature of the data.
+        Returns a table of n columns and 5 rows. Columns represent the features, and rows are the
+        mean, standard deviation, count, minimum and maximum respectively, all computed in a single pass.
 
-        :returns: dataframe of shape [2, n]
+        :returns: dataframe of shape [5, n]
         """
 
         if hdlr is None:
             raise ValueError('Precondition: handler cannot be None')
 
+        # Compute every statistic in a single pass over the numeric features, reading the minimum and maximum of
+        # each from the data's profile (see handlers.validation) where it has them.
         tbl = hdlr.get_tabular()
-
-        # Calculate and transpose the returned results so that the columns correspond to the feature names.
-        means = pd.DataFrame(np.mean(tbl, axis=0)).T
-        stds = pd.DataFrame(np.std(tbl, axis=0)).T
-
-        # Join the two rows into one table.
-        displayed_table = pd.concat([means, stds])
-        displayed_table.index = ['Mean', 'Std']
-
-        return displayed_table
+        extremes = hdlr.profile.extremes(tbl.select_dtypes('number').columns)
+        columns, acc = accumulate_moments(tbl, extremes=extremes is None)
+        return moments_table(columns, acc, extremes)
 
     @multimethod
     def analyse(self, hdlr: TestHandler):
@@ -44,19 +55,36 @@ class MeanStdAnalyser(Analyser):
         if hdlr is None:
             raise ValueError('Precondition: handler cannot be None')
 
+        # Compute every statistic in a single pass over the numeric features.
         tbl = hdlr.get_tabular()
-
-        # Calculate and transpose the returned results so that the columns correspond to the feature names.
-        means = pd.DataFrame(np.mean(tbl, axis=0)).T
-        stds = pd.DataFrame(np.std(tbl, axis=0)).T
-
-        # Join the two rows into one table.
-        displayed_table = pd.concat([means, stds])
-        displayed_table.index = ['Mean', 'Std']
+        extremes = hdlr.profile.extremes(tbl.select_dtypes('number').columns)
+        columns, acc = accumulate_moments(tbl, extremes=extremes is None)
+        displayed_table = moments_table(columns, acc, extremes)
 
         # Display the results.
         print(displayed_table)
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the confidence intervals of the mean and standard deviation of every numeric feature, if the
+        handler's data is a sample.
+
+        :returns: dataframe of shape [4, n] with rows Mean low, Mean high, Std low and Std high, or None if the
+        data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        tbl = hdlr.get_tabular()
+        columns = tbl.select_dtypes('number').columns
+        values = tbl[columns].to_numpy(dtype=float)
+        bounds = mean_interval(values, hdlr.population_size, confidence) \
+            + std_interval(values, hdlr.population_size, confidence)
+        return pd.DataFrame(np.vstack(bounds), index=['Mean low', 'Mean high', 'Std low', 'Std high'],
+                            columns=columns)
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
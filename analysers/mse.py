@@ -1,18 +1,20 @@
+import numpy as np
 from multimethod import multimethod
-from sklearn.metrics import mean_squared_error
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import RegressionAccumulator, residuals
+from analysers.intervals import DEFAULT_CONFIDENCE, mean_interval
+from analysers.residuals import residual_summary
 from exceptions import UnsupportedMethodException
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
 
 
 class MSEAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Calculate and return the MSE (Mean Squared Error) for the current model.
@@ -29,7 +31,7 @@ class MSEAnalyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('MSE cannot be used on non-regression model.')
 
-        score = mean_squared_error(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.mse()
         return score
 
     @multimethod
@@ -48,9 +50,39 @@ class MSEAnalyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('MSE cannot be used on non-regression model.')
 
-        score = mean_squared_error(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.mse()
         print('The MSE is:', score)
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the confidence interval of the MSE, as the mean of the squared errors,
+        if the handler's data is a sample.
+
+        :return: a tuple (low, high), or None if the data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        errors = np.square(residuals(hdlr.y, hdlr.get_predictions()))
+        return mean_interval(errors, hdlr.population_size, confidence)
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the MSE chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a RegressionAccumulator.
+        """
+        return RegressionAccumulator()
+
+    def finalise(self, acc, model):
+        """
+        Return the MSE from a filled RegressionAccumulator.
+        """
+        return acc.mse()
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from multimethod import multimethod
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import ConfusionAccumulator, confusion
+from exceptions import UnsupportedMethodException
+from handlers.simple import StandardHandler
+from handlers.testing import TestHandler
+
+
+def report_table(acc):
+    """
+    Build the table of per-class and averaged scores from a filled ConfusionAccumulator.
+
+    :param acc: a ConfusionAccumulator.
+    :returns: dataframe of shape [c + 2, 4] with a row for each of the c classes present in the actual or predicted
+    labels (see ConfusionAccumulator::present), then rows Macro average and Weighted average, and columns Precision,
+    Recall, F1 and Support.
+    """
+
+    # The labels are given as strings, so that the index has one type alongside the names of the averages.
+    present = acc.present()
+    index = [str(label) for label in acc.labels[present]] + ['Macro average', 'Weighted average']
+    columns = {}
+    for column, score in [('Precision', acc.precision), ('Recall', acc.recall), ('F1', acc.f1)]:
+        columns[column] = np.append(score()[present], [score('macro'), score('weighted')])
+    columns['Support'] = np.append(acc.support()[present], [acc.count(), acc.count()])
+    return pd.DataFrame(columns, index=index)
+
+
+class PrecisionRecallAnalyser(Analyser):
+
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
+    # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
+    @multimethod
+    @analysis_cache
+    def analyse(self, hdlr: StandardHandler):
+        """
+        Calculate and return the precision, recall and F1 score of each class, and their averages, from a single
+        confusion matrix (see analysers.accumulators.ConfusionAccumulator).
+        Raises UnsupportedMethodException if current model is not a classification model.
+
+        :raises: UnsupportedMethodException
+        :returns: dataframe of shape [c + 2, 4] - see report_table().
+        """
+
+        # Preconditions.
+        if hdlr is None:
+            raise ValueError('Precondition: handler cannot be None')
+        if hdlr.problem_type != 'classification':
+            raise UnsupportedMethodException('Precision and recall cannot be used on non-classification model.')
+
+        return report_table(confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_))
+
+    @multimethod
+    def analyse(self, hdlr: TestHandler):
+        """
+        Calculate and show the precision, recall and F1 score of each class, and their averages.
+        Raises UnsupportedMethodException if current model is not a classification model.
+
+        :raises: UnsupportedMethodException
+        """
+
+        # Preconditions.
+        if hdlr is None:
+            raise ValueError('Precondition: handler cannot be None')
+        if hdlr.problem_type != 'classification':
+            raise UnsupportedMethodException('Precision and recall cannot be used on non-classification model.')
+
+        print(report_table(confusion(hdlr.y, hdlr.get_predictions(), hdlr.model.classes_)))
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the precision and recall chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a ConfusionAccumulator.
+        """
+        return ConfusionAccumulator(model.classes_)
+
+    def finalise(self, acc, model):
+        """
+        Return the table of precision and recall from a filled ConfusionAccumulator.
+
+        :returns: dataframe of shape [c + 2, 4] - see report_table().
+        """
+        return report_table(acc)
+
+    def is_metric(self):
+        """
+        Returns whether the result of the analysis is a performance metric or not.
+        :return: True if this analyser is a metric, false otherwise.
+        """
+        return False
+
+    def model_type(self):
+        """
+        Returns the type of model this analyser supports.
+        :return: can return any of the strings: 'classification', 'regression', or 'agnostic'.
+        """
+        return "classification"
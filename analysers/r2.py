@@ -1,18 +1,20 @@
+import numpy as np
 from multimethod import multimethod
-from sklearn.metrics import r2_score
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import RegressionAccumulator, residuals
+from analysers.intervals import DEFAULT_CONFIDENCE, bootstrap_interval
+from analysers.residuals import residual_summary
 from exceptions import UnsupportedMethodException
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
 
 
 class R2Analyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Calculate and return the R^2 (Coefficient of Determination) score for the current model.
@@ -28,7 +30,7 @@ class R2Analyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('R^2 cannot be used on non-regression model.')
 
-        score = r2_score(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.r2()
         return score
 
     @multimethod
@@ -46,9 +48,45 @@ class R2Analyser(Analyser):
         if hdlr.problem_type != 'regression':
             raise UnsupportedMethodException('R^2 cannot be used on non-regression model.')
 
-        score = r2_score(hdlr.y, hdlr.model.predict(hdlr.X))
+        score = residual_summary(hdlr).metrics.r2()
         print('The R^2 score is:', score)
 
+    @analysis_cache
+    def interval(self, hdlr, confidence=DEFAULT_CONFIDENCE):
+        """
+        Return the bootstrap confidence interval of the R^2 score, if the handler's data is a sample.
+
+        :return: a tuple (low, high), or None if the data is not a sample.
+        """
+
+        if not hdlr.sampled:
+            return None
+
+        y_true = np.asarray(hdlr.y, dtype=float)
+        errors = residuals(y_true, hdlr.get_predictions())
+
+        def r2(rows):
+            residual = np.dot(errors[rows], errors[rows])
+            total = np.sum((y_true[rows] - y_true[rows].mean()) ** 2)
+            return 1 - residual / total if total > 0 else 0.0
+
+        return bootstrap_interval(r2, len(y_true), confidence)
+
+    def accumulator(self, model):
+        """
+        Return an empty accumulator which can compute the R^2 score chunk by chunk.
+
+        :param model: the sklearn model being evaluated.
+        :return: a RegressionAccumulator.
+        """
+        return RegressionAccumulator()
+
+    def finalise(self, acc, model):
+        """
+        Return the R^2 score from a filled RegressionAccumulator.
+        """
+        return acc.r2()
+
     def is_metric(self):
         """
         Returns whether the result of the analysis is a performance metric or not.
@@ -0,0 +1,121 @@
+"""
+This module evaluates regression models from a single residual vector.
+
+The residuals y - pred of a handler are computed once, and every regression metric (MSE, RMSE, MAE, R^2, max error
+and the quantiles of the residuals) is reduced from that one array (see analysers.accumulators.RegressionAccumulator).
+The summary is stored on the handler alongside its predictions (see StandardHandler::derived), so the MSE, MAE and
+R^2 analysers (and the residuals analyser below) share a single pass over the data rather than each scanning y and
+the predictions again.
+"""
+import numpy as np
+import pandas as pd
+from multimethod import multimethod
+from analysers import Analyser, analysis_cache
+from analysers.accumulators import RegressionAccumulator, residuals
+from exceptions import UnsupportedMethodException
+from handlers.simple import StandardHandler
+from handlers.testing import TestHandler
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]  # The quantiles of the residuals reported.
+
+
+class ResidualSummary:
+    """
+    The regression metrics of a model's predictions, all reduced from one residual vector.
+    """
+
+    def __init__(self, y_true, y_pred, quantiles=QUANTILES):
+        """
+        :param y_true: the actual values.
+        :param y_pred: the predicted values.
+        :param quantiles: the quantiles of the residuals to compute.
+        """
+
+        errors = residuals(y_true, y_pred)
+
+        # Pre-condition checks.
+        if len(errors) == 0:
+            raise ValueError('Precondition: there must be at least one residual')
+
+        self.metrics = RegressionAccumulator.of_residuals(errors, y_true)  # The MSE, RMSE, MAE, R^2 and max error.
+        self.quantiles = pd.Series(np.quantile(errors, quantiles), index=quantiles)  # The quantiles of y - pred.
+
+    def table(self):
+        """
+        Return every metric as a table.
+
+        :return: a Pandas series indexed by the name of each metric.
+        """
+
+        values = {'MSE': self.metrics.mse(), 'RMSE': self.metrics.rmse(), 'MAE': self.metrics.mae(),
+                  'R2': self.metrics.r2(), 'Max error': self.metrics.max_error()}
+        for quantile, value in self.quantiles.items():
+            values[f'Residual quantile {quantile:g}'] = value
+        return pd.Series(values, name='Value')
+
+
+def residual_summary(hdlr):
+    """
+    Return the ResidualSummary of a handler's model and data, computing it the first time it is asked for.
+    The summary is stored on the handler, so every analyser shares it.
+
+    :param hdlr: the handler.
+    :return: a ResidualSummary.
+    """
+
+    return hdlr.derived('residual_summary', lambda: ResidualSummary(hdlr.y, hdlr.get_predictions()))
+
+
+class ResidualsAnalyser(Analyser):
+
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
+    # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
+    @multimethod
+    @analysis_cache
+    def analyse(self, hdlr: StandardHandler):
+        """
+        Calculate and return every regression metric of the current model, and the quantiles of its residuals.
+        Raises UnsupportedMethodException if current model is not a regression model.
+
+        :raises: UnsupportedMethodException
+        :returns: a Pandas series indexed by the name of each metric - see ResidualSummary::table.
+        """
+
+        # Preconditions.
+        if hdlr is None:
+            raise ValueError('Precondition: handler cannot be None')
+        if hdlr.problem_type != 'regression':
+            raise UnsupportedMethodException('Residuals cannot be used on non-regression model.')
+
+        return residual_summary(hdlr).table()
+
+    @multimethod
+    def analyse(self, hdlr: TestHandler):
+        """
+        Calculate and show every regression metric of the current model, and the quantiles of its residuals.
+        Raises UnsupportedMethodException if current model is not a regression model.
+
+        :raises: UnsupportedMethodException
+        """
+
+        # Preconditions.
+        if hdlr is None:
+            raise ValueError('Precondition: handler cannot be None')
+        if hdlr.problem_type != 'regression':
+            raise UnsupportedMethodException('Residuals cannot be used on non-regression model.')
+
+        print(residual_summary(hdlr).table())
+
+    def is_metric(self):
+        """
+        Returns whether the result of the analysis is a performance metric or not.
+        :return: True if this analyser is a metric, false otherwise.
+        """
+        return False
+
+    def model_type(self):
+        """
+        Returns the type of model this analyser supports.
+        :return: can return any of the strings: 'classification', 'regression', or 'agnostic'.
+        """
+        return "regression"
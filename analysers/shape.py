@@ -1,16 +1,30 @@
 from multimethod import multimethod
-from analysers import Analyser
+from analysers import Analyser, analysis_cache
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
+
+
+def n_classes(hdlr):
+    """
+    Return the number of distinct classes in the target, read from the data's profile (see handlers.validation)
+    rather than scanning the target again where the profile has it.
+
+    :param hdlr: the handler.
+    :return: the number of classes.
+    """
+
+    nclasses = hdlr.profile.stat(hdlr.y.name, 'Distinct')
+    if nclasses is None:
+        nclasses = len(hdlr.y.unique())
+    return int(nclasses)
 
 
 class ShapeAnalyser(Analyser):
 
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """
         Perform an analysis to get the number of samples, features, and the ratio between
@@ -37,7 +51,7 @@ class ShapeAnalyser(Analyser):
 
         # If doing a classification problem also return the number of classes.
         if hdlr.problem_type == 'classification':
-            nclasses = len(hdlr.y.unique())
+            nclasses = n_classes(hdlr)
             return [nrows, ncols, samples_per_feature, nclasses]
         else:
             return [nrows, ncols, samples_per_feature]
@@ -66,7 +80,7 @@ class ShapeAnalyser(Analyser):
 
         # If doing a classification problem also print the number of classes.
         if hdlr.problem_type == 'classification':
-            nclasses = len(hdlr.y.unique())
+            nclasses = n_classes(hdlr)
             print(f'Data has {nrows} samples, {ncols} features (including target feature), and {nclasses} classes.')
         else:
             print(f'Data has {nrows} samples, {ncols} features (including target feature).')
@@ -1,15 +1,123 @@
+"""
+This module shows the loaded data.
+
+Rather than sending the whole table to the browser, the data is viewed a page at a time. Sorting and filtering are
+done once, server side, on the column arrays, and produce an array of row positions (in display order) which is
+cached against the handler's fingerprint. Fetching a page then only indexes that array and takes those rows, so it
+costs O(page size) regardless of the size of the dataset.
+"""
+import numpy as np
+import pandas as pd
 from multimethod import multimethod
-from analysers import Analyser
+from pandas.api.types import is_numeric_dtype
+from analysers import Analyser, analysis_cache, handler_cache
 from handlers.simple import StandardHandler
 from handlers.testing import TestHandler
-from streamlit import cache
+
+PAGE_SIZE = 100  # The default number of rows in a page.
+
+
+def sorted_positions(tbl, sort_by, ascending=True):
+    """
+    Return the row positions of a table, sorted by a column.
+    The sort is stable in both directions, so rows with equal values keep their original order, and missing values
+    are always placed last.
+
+    :param tbl: the table, as a Pandas dataframe.
+    :param sort_by: the name of the column to sort by, or None to keep the table's order.
+    :param ascending: whether to sort in ascending order.
+    :return: an array of row positions.
+    """
+
+    if sort_by is None:
+        return np.arange(len(tbl))
+
+    # Rank the values by their position among the sorted distinct values (missing values get -1), so that a
+    # descending sort is a stable sort of the reversed ranks rather than the reverse of an ascending sort.
+    ranks, distinct = pd.factorize(tbl[sort_by], sort=True)
+    if not ascending:
+        ranks = np.where(ranks < 0, ranks, len(distinct) - 1 - ranks)
+    ranks = np.where(ranks < 0, len(distinct), ranks)
+    return np.argsort(ranks, kind='stable')
+
+
+def filter_mask(column, low=None, high=None, contains=None):
+    """
+    Return which rows of a column pass a filter.
+    Numeric columns are filtered to an inclusive range, and other columns by whether their text contains a substring.
+
+    :param column: the column, as a Pandas series.
+    :param low: the smallest value to keep, or None for no lower bound (numeric columns only).
+    :param high: the largest value to keep, or None for no upper bound (numeric columns only).
+    :param contains: the substring the values must contain, or None to keep every value (other columns only).
+    :return: a boolean array with an entry for every row.
+    """
+
+    if is_numeric_dtype(column):
+        values = column.to_numpy()
+        mask = np.ones(len(values), dtype=bool)
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+        return mask
+
+    if contains is None or contains == '':
+        return np.ones(len(column), dtype=bool)
+    return column.astype(str).str.contains(contains, case=False, regex=False).to_numpy()
+
+
+@handler_cache
+def view_positions(hdlr, sort_by=None, ascending=True, filter_by=None, low=None, high=None, contains=None):
+    """
+    Return the row positions of the handler's data that pass a filter, in sorted order.
+    The result is cached, so paging through the same view does not sort or filter the data again.
+
+    :param hdlr: the StandardHandler.
+    :param sort_by: the name of the column to sort by, or None to keep the data's order.
+    :param ascending: whether to sort in ascending order.
+    :param filter_by: the name of the column to filter on, or None for no filter.
+    :param low: see filter_mask().
+    :param high: see filter_mask().
+    :param contains: see filter_mask().
+    :return: an array of row positions.
+    """
+
+    tbl = hdlr.get_data()
+    positions = sorted_positions(tbl, sort_by, ascending)
+    if filter_by is None:
+        return positions
+
+    mask = filter_mask(tbl[filter_by], low, high, contains)
+    return positions[mask[positions]]
+
+
+def page(tbl, positions, page_number, page_size=PAGE_SIZE):
+    """
+    Return one page of rows of a table, in the order given by an array of row positions.
+
+    :param tbl: the table, as a Pandas dataframe.
+    :param positions: the row positions in display order, e.g. as returned by view_positions().
+    :param page_number: the number of the page, starting from 0.
+    :param page_size: the number of rows in a page.
+    :return: a dataframe with at most page_size rows.
+    """
+
+    # Pre-condition checks.
+    if page_number < 0:
+        raise ValueError(f'Precondition: page_number must not be negative, got {page_number}')
+    if page_size <= 0:
+        raise ValueError(f'Precondition: page_size must be positive, got {page_size}')
+
+    start = page_number * page_size
+    return tbl.iloc[positions[start:start + page_size]]
 
 
 class ShowDataAnalyser(Analyser):
-    # cache annotation is for streamlit caching (google it).
+    # analysis_cache annotation is for streamlit caching, keyed by the handler's fingerprint.
     # multimethod annotation is for multiple dispatch to different handler types (google multimethod package).
     @multimethod
-    @cache
+    @analysis_cache
     def analyse(self, hdlr: StandardHandler):
         """Return the data."""
         return hdlr.get_data()
@@ -1,5 +1,17 @@
+import os
+import pandas as pd
 import streamlit as st
 import pages as pages
+from handlers.models import MODEL_CACHE
+from pages.samples import prewarm_samples
+from profiling import PROFILER, configure_log, profiled, start_metrics_server
+
+# Load the sample models and their analyses in the background, once per server process.
+prewarm_samples()
+
+# Export the profiling measurements, if configured (see profiling).
+configure_log()
+start_metrics_server()
 
 # Initialise the current page if using fresh session.
 if 'current_page' not in st.session_state:
@@ -7,4 +19,14 @@ if 'current_page' not in st.session_state:
 
 # Display the page by displaying each of its sections.
 for segment in st.session_state['current_page'].sections:
-    segment.display()
+    with profiled('section', type(segment).__name__):
+        segment.display()
+
+# Show the profiling measurements in a debug sidebar, if enabled.
+if os.environ.get('PROFILING_PANEL'):
+    st.sidebar.header('Profiling')
+    st.sidebar.dataframe(pd.DataFrame(PROFILER.summary()))
+    st.sidebar.subheader('Caches')
+    st.sidebar.dataframe(pd.DataFrame(PROFILER.cache_summary()))
+    st.sidebar.caption(f'Model cache: {len(MODEL_CACHE)} models, {MODEL_CACHE.total_bytes / 2 ** 20:.1f} MB '
+                       f'of {MODEL_CACHE.max_bytes / 2 ** 20:.0f} MB')
@@ -0,0 +1,332 @@
+"""
+Evaluate many model/dataset pairs without the web app, e.g. as a nightly job.
+
+The jobs are read from a manifest: a .json file holding a list of jobs, or a .jsonl file with one job per line.
+Each job is an object such as:
+
+    {"model": "models/forest.sav", "data": "data/test.csv", "target_idx": -1, "analysers": ["accuracy", "f1"]}
+
+target_idx defaults to -1 and analysers defaults to every analyser compatible with the model (see ANALYSERS).
+
+Jobs are grouped by their dataset, and each group is run in a worker process, so a dataset is loaded and validated
+once and then shared by every model evaluated on it (see StandardHandler.with_model). Each worker holds one dataset at
+a time, parsed in chunks within the optional memory limit, and is replaced after a number of groups so that its
+memory is returned to the OS. A .csv dataset which exceeds the memory limit is not loaded at all: its metrics are
+instead computed in a streaming pass over the file (see stream_analysers), and the analysers which need the whole
+data in memory are reported as errors. The results are written as one record per (job, analyser) to a .json, .jsonl
+or .parquet file.
+
+Usage:
+    python batch.py manifest.json results.parquet --jobs 8 --memory-limit 4096
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.base import is_classifier
+from analysers import accuracy, corr, f1, mae, mean_std, mse, precision_recall, r2, residuals, shape
+from analysers.accumulators import stream_evaluate, stream_moments
+from analysers.blockwise_corr import CorrelationMatrix
+from analysers.mean_std import moments_table
+from exceptions import MemoryLimitException
+from handlers.chunked import DEFAULT_CHUNKSIZE
+from handlers.models import load_shared_model
+from handlers.parallel import effective_jobs
+from handlers.simple import StandardHandler
+
+# Maps the name of each analyser that can be requested in a manifest to its class.
+ANALYSERS = {
+    'accuracy': accuracy.AccuracyAnalyser,
+    'f1': f1.F1Analyser,
+    'precision_recall': precision_recall.PrecisionRecallAnalyser,
+    'mse': mse.MSEAnalyser,
+    'mae': mae.MAEAnalyser,
+    'r2': r2.R2Analyser,
+    'residuals': residuals.ResidualsAnalyser,
+    'corr': corr.CorrAnalyser,
+    'mean_std': mean_std.MeanStdAnalyser,
+    'shape': shape.ShapeAnalyser,
+}
+
+GROUPS_PER_WORKER = 8  # The number of dataset groups a worker process runs before it is replaced.
+
+
+def read_manifest(path):
+    """
+    Read the jobs from a manifest file, filling in their defaults.
+
+    :param path: the path of a .json or .jsonl manifest.
+    :return: a list of job dictionaries, each with model, data, target_idx and analysers (a list or None).
+    """
+
+    with open(path) as f:
+        if path.endswith('.jsonl'):
+            jobs = [json.loads(line) for line in f if line.strip() != '']
+        else:
+            jobs = json.load(f)
+
+    for i, job in enumerate(jobs):
+        if 'model' not in job or 'data' not in job:
+            raise ValueError(f'Precondition: job {i} of the manifest must have a model and data')
+        job.setdefault('target_idx', -1)
+        job.setdefault('analysers', None)
+        for name in job['analysers'] or []:
+            if name not in ANALYSERS:
+                raise ValueError(f'Precondition: job {i} asks for an unknown analyser {name}')
+
+    return jobs
+
+
+def group_jobs(jobs):
+    """
+    Group jobs which evaluate on the same dataset, so that the dataset is only loaded once per group.
+
+    :param jobs: a list of job dictionaries.
+    :return: a list of lists of (job number, job) tuples.
+    """
+
+    groups = {}
+    for i, job in enumerate(jobs):
+        key = (os.path.abspath(job['data']), job['target_idx'])
+        groups.setdefault(key, []).append((i, job))
+    return list(groups.values())
+
+
+def to_jsonable(value):
+    """
+    Convert an analyser's result into plain lists, dictionaries and numbers, so that it can be written out.
+
+    :param value: the result of an analyse() call.
+    :return: the result as JSON serialisable values.
+    """
+
+    if isinstance(value, CorrelationMatrix):
+        return {'columns': [str(col) for col in value.columns]}  # The strong pairs are returned alongside it.
+    if isinstance(value, pd.DataFrame):
+        return {'columns': [str(col) for col in value.columns], 'index': [str(idx) for idx in value.index],
+                'data': to_jsonable(value.to_numpy().tolist())}
+    if isinstance(value, pd.Series):
+        return {str(idx): to_jsonable(v) for idx, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return to_jsonable(value.tolist())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def compatible_analysers(problem_type):
+    """
+    Return the names of every analyser compatible with a type of model.
+
+    :param problem_type: 'classification' or 'regression'.
+    :return: a list of names from ANALYSERS.
+    """
+    return [name for name, cls in ANALYSERS.items() if cls().model_type() in (problem_type, 'agnostic')]
+
+
+def run_analysers(hdlr, names):
+    """
+    Run the requested analysers (or every compatible one) on a handler.
+
+    :param hdlr: the StandardHandler.
+    :param names: a list of names from ANALYSERS, or None for every analyser compatible with the model.
+    :return: a list of (analyser name, result, error, seconds) tuples.
+    """
+
+    if names is None:
+        names = compatible_analysers(hdlr.problem_type)
+
+    outcomes = []
+    for name in names:
+        start = time.perf_counter()
+        try:
+            outcomes.append((name, to_jsonable(ANALYSERS[name]().analyse(hdlr)), None, time.perf_counter() - start))
+        except Exception as e:
+            outcomes.append((name, None, f'{type(e).__name__}: {e}', time.perf_counter() - start))
+    return outcomes
+
+
+def stream_analysers(job, chunksize):
+    """
+    Run a job's analysers in streaming passes over its .csv file, without loading the data, for data which exceeds
+    the memory limit. The metric analysers which can be accumulated chunk by chunk (see analysers.accumulators)
+    share a single pass, whose time each of them is given, and mean_std takes a pass of its own. Every other analyser
+    needs the whole data in memory, so it is reported as an error.
+
+    :param job: the job dictionary.
+    :param chunksize: the number of rows to parse at a time.
+    :return: a list of (analyser name, result, error, seconds) tuples, as returned by run_analysers().
+    """
+
+    with open(job['model'], 'rb') as model_file:
+        model = load_shared_model(model_file)
+    problem_type = 'classification' if is_classifier(model) else 'regression'
+    names = job['analysers'] if job['analysers'] is not None else compatible_analysers(problem_type)
+
+    metrics = [name for name in names
+               if ANALYSERS[name]().model_type() == problem_type and ANALYSERS[name]().accumulator(model) is not None]
+    outcomes = {}
+    if len(metrics) > 0:
+        start = time.perf_counter()
+        try:
+            with open(job['data'], 'rb') as data_file:
+                results = stream_evaluate([ANALYSERS[name]() for name in metrics], model, data_file,
+                                          job['target_idx'], chunksize)
+            outcomes.update({name: (to_jsonable(result), None) for name, result in zip(metrics, results)})
+        except Exception as e:
+            outcomes.update({name: (None, f'{type(e).__name__}: {e}') for name in metrics})
+        seconds = {name: time.perf_counter() - start for name in metrics}
+    else:
+        seconds = {}
+
+    if 'mean_std' in names:
+        start = time.perf_counter()
+        try:
+            with open(job['data'], 'rb') as data_file:
+                outcomes['mean_std'] = (to_jsonable(moments_table(*stream_moments(data_file, chunksize))), None)
+        except Exception as e:
+            outcomes['mean_std'] = (None, f'{type(e).__name__}: {e}')
+        seconds['mean_std'] = time.perf_counter() - start
+
+    unstreamed = 'MemoryLimitException: the data exceeds the memory limit, and this analyser needs it in memory'
+    return [(name, *outcomes.get(name, (None, unstreamed)), seconds.get(name)) for name in names]
+
+
+def load_handler(job, base, chunksize, memory_limit):
+    """
+    Load the handler of a job, sharing the data of the group's first handler if the job's model can use it.
+
+    :param job: the job dictionary.
+    :param base: the handler the group's dataset was loaded with, or None.
+    :param chunksize: the number of rows to parse at a time.
+    :param memory_limit: the maximum number of bytes the data may use, or None for no limit.
+    :return: a StandardHandler.
+    :raises: MemoryLimitException if the data has to be loaded and exceeds the memory limit.
+    """
+
+    with open(job['model'], 'rb') as model_file:
+        if base is not None:
+            try:
+                return base.with_model(model_file)
+            except ValueError:
+                pass  # The shared data lacks this model's features, so load it for this model.
+        with open(job['data'], 'rb') as data_file:
+            return StandardHandler(data_file=data_file, model_file=model_file, target_idx=job['target_idx'],
+                                   chunksize=chunksize, memory_limit=memory_limit)
+
+
+def run_group(group, chunksize, memory_limit):
+    """
+    Run a group of jobs which share a dataset. The dataset is loaded with the first model, and shared with the rest.
+    If it exceeds the memory limit, every job of the group is streamed instead (see stream_analysers).
+    Runs in a worker process.
+
+    :param group: a list of (job number, job) tuples, as returned by group_jobs().
+    :param chunksize: the number of rows to parse at a time.
+    :param memory_limit: the maximum number of bytes the data may use, or None for no limit.
+    :return: a list of result records.
+    """
+
+    records = []
+    base = None  # The handler the dataset was loaded with.
+    streamed = False  # Whether the dataset exceeds the memory limit, so that it is streamed rather than loaded.
+    for job_number, job in group:
+        record = {'job': job_number, 'model': job['model'], 'data': job['data'], 'target_idx': job['target_idx']}
+        hdlr = None
+        try:
+            if not streamed:
+                try:
+                    hdlr = load_handler(job, base, chunksize, memory_limit)
+                    base = base or hdlr
+                except MemoryLimitException:
+                    streamed = base is None  # Unless the dataset was loaded for another of the group's models.
+            if hdlr is not None:
+                outcomes = run_analysers(hdlr, job['analysers'])
+            else:
+                outcomes = stream_analysers(job, chunksize)
+        except Exception as e:
+            records.append({**record, 'analyser': None, 'result': None,
+                            'error': f'{type(e).__name__}: {e}', 'seconds': None})
+            continue
+
+        for name, result, error, seconds in outcomes:
+            records.append({**record, 'analyser': name, 'result': result, 'error': error, 'seconds': seconds})
+
+    return records
+
+
+def write_results(records, path):
+    """
+    Write the result records to a .json, .jsonl or .parquet file.
+    In a Parquet file, each result is stored as a JSON string.
+
+    :param records: a list of result records.
+    :param path: the output path.
+    """
+
+    records = sorted(records, key=lambda record: record['job'])
+    if path.endswith('.parquet'):
+        tbl = pd.DataFrame(records)
+        tbl['result'] = [json.dumps(result) for result in tbl['result']]
+        tbl.to_parquet(path, index=False)
+    elif path.endswith('.jsonl'):
+        with open(path, 'w') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+    else:
+        with open(path, 'w') as f:
+            json.dump(records, f, indent=2)
+
+
+def run_batch(jobs, n_jobs=None, chunksize=DEFAULT_CHUNKSIZE, memory_limit=None):
+    """
+    Run every job, with the dataset groups spread across a pool of worker processes.
+
+    :param jobs: a list of job dictionaries, as returned by read_manifest().
+    :param n_jobs: the number of worker processes (see handlers.parallel.effective_jobs), None for one per CPU.
+    :param chunksize: the number of rows to parse at a time.
+    :param memory_limit: the maximum number of bytes each worker's data may use, or None for no limit.
+    :return: a list of result records.
+    """
+
+    groups = group_jobs(jobs)
+    n_workers = min(effective_jobs(-1 if n_jobs is None else n_jobs), max(1, len(groups)))
+
+    records = []
+    with ProcessPoolExecutor(max_workers=n_workers, max_tasks_per_child=GROUPS_PER_WORKER) as pool:
+        futures = [pool.submit(run_group, group, chunksize, memory_limit) for group in groups]
+        for future in futures:
+            records.extend(future.result())
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate many model/dataset pairs and write the results.')
+    parser.add_argument('manifest', help='a .json or .jsonl file listing the jobs')
+    parser.add_argument('output', help='the .json, .jsonl or .parquet file to write the results to')
+    parser.add_argument('--jobs', type=int, default=None, help='the number of worker processes (default: one per CPU)')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='the number of rows parsed at a time')
+    parser.add_argument('--memory-limit', type=float, default=None,
+                        help='the maximum megabytes of data each worker may hold (default: no limit)')
+    args = parser.parse_args(argv)
+
+    memory_limit = None if args.memory_limit is None else int(args.memory_limit * 1024 * 1024)
+    records = run_batch(read_manifest(args.manifest), args.jobs, args.chunksize, memory_limit)
+    write_results(records, args.output)
+
+    n_errors = sum(record['error'] is not None for record in records)
+    print(f'Wrote {len(records)} results to {args.output} ({n_errors} errors).')
+    return 1 if n_errors > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
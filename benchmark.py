@@ -0,0 +1,240 @@
+"""
+Benchmark the handlers and analysers over synthetic datasets of increasing size.
+
+For every point of a grid of rows x features (x classes, for classification), a dataset is generated with
+sklearn.datasets.make_classification or make_regression, a small model is trained on it, and both are written to
+a temporary directory. The benchmark then times:
+ - StandardHandler construction from the files (with the model cache cleared, so the model is loaded cold),
+ - validate_data on the parsed dataframe,
+ - analyse() of every analyser compatible with the problem (on a new handler, with the analysis cache cleared
+   before the timer starts, so that nothing is reused between repeats).
+
+Each measurement records the median and minimum wall time over the repeats, and the peak memory allocated by one
+further run (from tracemalloc, which slows down every allocation, so the timed repeats run without it). The results are written as JSON, and can be compared against the results of an earlier run:
+any benchmark whose median time grew by more than the tolerance is reported, and the exit code is 1.
+
+Usage:
+    python benchmark.py --output results.json
+    python benchmark.py --output new.json --baseline results.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.datasets import make_classification, make_regression
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from streamlit import cache_resource
+from analysers import accuracy, corr, f1, mae, mean_std, mse, precision_recall, r2, residuals, shape
+from handlers.models import MODEL_CACHE
+from handlers.simple import StandardHandler
+from handlers.validation import validate_data
+
+ANALYSERS = [accuracy.AccuracyAnalyser, f1.F1Analyser, precision_recall.PrecisionRecallAnalyser, mse.MSEAnalyser,
+             mae.MAEAnalyser, r2.R2Analyser, residuals.ResidualsAnalyser, corr.CorrAnalyser, mean_std.MeanStdAnalyser,
+             shape.ShapeAnalyser]
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000]
+DEFAULT_FEATURES = [10, 100]
+DEFAULT_CLASSES = [2, 5]
+DEFAULT_REPEAT = 3
+RANDOM_STATE = 0  # Fixes the generated datasets, so that runs are comparable.
+
+
+def make_dataset(problem_type, n_rows, n_features, n_classes, directory):
+    """
+    Generate a dataset and train a model on it, writing both to files.
+
+    :param problem_type: 'classification' or 'regression'.
+    :param n_rows: the number of rows.
+    :param n_features: the number of features.
+    :param n_classes: the number of classes (ignored for regression).
+    :param directory: the directory to write the files to.
+    :return: a tuple (data path, model path).
+    """
+
+    if problem_type == 'classification':
+        X, y = make_classification(n_samples=n_rows, n_features=n_features, n_informative=min(n_features, 5),
+                                   n_redundant=0, n_classes=n_classes, random_state=RANDOM_STATE)
+        model = LogisticRegression(max_iter=200)
+    else:
+        X, y = make_regression(n_samples=n_rows, n_features=n_features, noise=1.0, random_state=RANDOM_STATE)
+        model = LinearRegression()
+
+    tbl = pd.DataFrame(X, columns=[f'f{i}' for i in range(n_features)])
+    tbl['target'] = y
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model.fit(tbl.iloc[:, :-1], y)
+
+    name = f'{problem_type}_{n_rows}_{n_features}_{n_classes}'
+    data_path = os.path.join(directory, name + '.csv')
+    model_path = os.path.join(directory, name + '.sav')
+    tbl.to_csv(data_path, index=False)
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+
+    return data_path, model_path
+
+
+def measure(func, repeat, setup=None):
+    """
+    Time a function over several repeats, then record the peak memory it allocates in one more run.
+    An extra, unrecorded run is made first, so that one-off costs (imports, caches warming up) are not measured.
+    The timed repeats run without tracemalloc, which would otherwise slow down every allocation they make.
+
+    :param func: the function to time. It is passed the result of setup(), if there is a setup.
+    :param repeat: the number of times to time it.
+    :param setup: an optional untimed function run before each run.
+    :return: a dictionary with seconds_median, seconds_min and peak_bytes.
+    """
+
+    func(*(() if setup is None else (setup(),)))
+
+    times = []
+    for _ in range(repeat):
+        args = () if setup is None else (setup(),)
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    args = () if setup is None else (setup(),)
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds_median': statistics.median(times), 'seconds_min': min(times), 'peak_bytes': peak}
+
+
+def load_handler(data_path, model_path):
+    """Construct a StandardHandler from the files, with the model cache cleared so that the model loads cold."""
+    MODEL_CACHE.clear()
+    with open(data_path) as data_file, open(model_path, 'rb') as model_file:
+        return StandardHandler(data_file=data_file, model_file=model_file, target_idx=-1)
+
+
+def cold_handler(data_path, model_path):
+    """Construct a StandardHandler from the files and clear the analysis cache, so that analysers run cold."""
+    hdlr = load_handler(data_path, model_path)
+    cache_resource.clear()
+    return hdlr
+
+
+def benchmark_dataset(problem_type, n_rows, n_features, n_classes, repeat, directory):
+    """
+    Run every benchmark on one generated dataset.
+
+    :return: a list of result dictionaries.
+    """
+
+    data_path, model_path = make_dataset(problem_type, n_rows, n_features, n_classes, directory)
+    point = {'problem': problem_type, 'rows': n_rows, 'features': n_features,
+             'classes': n_classes if problem_type == 'classification' else None}
+
+    results = [{'benchmark': 'StandardHandler', **point,
+                **measure(lambda: load_handler(data_path, model_path), repeat)}]
+
+    results.append({'benchmark': 'validate_data', **point,
+                    **measure(validate_data, repeat, setup=lambda: pd.read_csv(data_path))})
+
+    for cls in ANALYSERS:
+        analyser = cls()
+        if analyser.model_type() not in (problem_type, 'agnostic'):
+            continue
+        results.append({'benchmark': f'analyse:{cls.__name__}', **point,
+                        **measure(analyser.analyse, repeat, setup=lambda: cold_handler(data_path, model_path))})
+
+    return results
+
+
+def run_benchmarks(rows, features, classes, repeat):
+    """
+    Run the benchmarks over the whole grid.
+
+    :return: a dictionary with the environment (meta) and the list of results.
+    """
+
+    grid = [('classification', n_rows, n_features, n_classes)
+            for n_rows in rows for n_features in features for n_classes in classes]
+    grid += [('regression', n_rows, n_features, None) for n_rows in rows for n_features in features]
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for problem_type, n_rows, n_features, n_classes in grid:
+            print(f'{problem_type}: {n_rows} rows x {n_features} features'
+                  + (f' x {n_classes} classes' if n_classes else ''), file=sys.stderr)
+            results.extend(benchmark_dataset(problem_type, n_rows, n_features, n_classes, repeat, directory))
+
+    meta = {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'sklearn': sklearn.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count(), 'repeat': repeat}
+    return {'meta': meta, 'results': results}
+
+
+def result_key(result):
+    """Return the key identifying a benchmark across runs."""
+    return result['benchmark'], result['problem'], result['rows'], result['features'], result['classes']
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare the median times of two runs.
+
+    :param results: the results of this run, as returned by run_benchmarks().
+    :param baseline: the results of an earlier run, in the same format.
+    :param tolerance: the fraction by which a median time may grow before it counts as a regression.
+    :return: a list of (key, baseline seconds, new seconds) for every benchmark which regressed.
+    """
+
+    old = {result_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in results['results']:
+        before = old.get(result_key(result))
+        if before is not None and result['seconds_median'] > before['seconds_median'] * (1 + tolerance):
+            regressions.append((result_key(result), before['seconds_median'], result['seconds_median']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the handlers and analysers on synthetic data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--features', type=int, nargs='+', default=DEFAULT_FEATURES)
+    parser.add_argument('--classes', type=int, nargs='+', default=DEFAULT_CLASSES)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', default='benchmark_results.json', help='the JSON file to write the results to')
+    parser.add_argument('--baseline', default=None, help='the JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='the fraction a median time may grow before it counts as a regression')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.rows, args.features, args.classes, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {len(results["results"])} benchmarks to {args.output}.')
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for key, before, after in regressions:
+        print(f'REGRESSION {key}: {before:.4f}s -> {after:.4f}s')
+    print(f'{len(regressions)} regressions against {args.baseline}.')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
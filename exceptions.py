@@ -10,3 +10,7 @@ class FileLoadingException(Exception):
         if not (isinstance(message, str)):
             raise ValueError('Parameter \'message\' is not a string!')
         super().__init__(message)
+
+
+class MemoryLimitException(FileLoadingException):
+    pass
@@ -57,6 +57,21 @@ class Handler:
         """Load and return the file as a model in some format."""
         raise NotImplementedError('load_model must be overridden!')
 
+    def get_predictions(self):
+        """
+        Return the predicted labels for each datapoint using the stored model in this Handler.
+        Implementations should compute the predictions once and reuse them on subsequent calls.
+        """
+        raise NotImplementedError('get_predictions must be overridden!')
+
+    def derived(self, key, compute):
+        """
+        Return a value derived from the model's predictions which several analysers share, computing it with
+        compute() on first use.
+        Implementations should compute each value once and reuse it on subsequent calls.
+        """
+        raise NotImplementedError('derived must be overridden!')
+
     def predict(self):
         """
         Return the predictions for each datapoint using the stored model in this ModelHandler.
@@ -0,0 +1,172 @@
+"""
+This module provides a chunked, memory-bounded alternative to reading a whole .csv file with pd.read_csv.
+
+The file is parsed in blocks of a bounded number of rows. Each block is validated on its own (rows with missing
+values are dropped straight away), and its columns are appended to a compact columnar store. The full dataframe
+is only assembled at the end, one column at a time, so the peak memory stays close to the size of the cleaned data
+rather than several times the size of the file. The numeric columns of each chunk are narrowed to compact dtypes
+(see handlers.dtypes) before they are stored, so the memory limit is measured against the compact data.
+"""
+import os
+import numpy as np
+import pandas as pd
+from exceptions import MemoryLimitException
+from handlers.dtypes import compact_frame
+from handlers.validation import drop_missing
+
+DEFAULT_CHUNKSIZE = 100_000  # The default number of rows parsed per chunk.
+
+
+def memory_limit_from_env(name='DATA_MEMORY_LIMIT'):
+    """
+    Read the memory ceiling for ingested data (in megabytes) from an environment variable.
+
+    :param name: the name of the environment variable.
+    :return: the memory ceiling in bytes, or None if the variable is not set.
+    """
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return None
+    return int(float(value) * 1024 * 1024)
+
+
+def file_size(file):
+    """
+    Return the size of a file in bytes (or characters, for text mode files) without reading it.
+    The file position is restored afterwards.
+
+    :param file: the file.
+    :return: the size of the file.
+    """
+
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def validate_chunk(chunk):
+    """
+    Validate a single chunk of a dataframe by dropping the rows with missing values (see
+    handlers.validation.drop_missing).
+    The overall checks (empty data, too few columns) are done on the assembled dataframe instead.
+
+    :param chunk: a dataframe holding one chunk of the data.
+    :return: a tuple (chunk, missing) where chunk has had its incomplete rows removed, and missing is an array of
+    the number of missing values dropped from each column.
+    """
+    return drop_missing(chunk)
+
+
+class ColumnarStore:
+    """
+    Accumulates the columns of successive dataframe chunks as lists of numpy arrays, then assembles them
+    into a single dataframe column by column without building an intermediate copy of the whole table.
+    """
+
+    def __init__(self, memory_limit=None):
+        """
+        :param memory_limit: the maximum number of bytes the stored columns may use, or None for no limit.
+        """
+        self.memory_limit = memory_limit
+        self.columns = None  # The column names, taken from the first chunk.
+        self.blocks = {}  # Maps each column name to the list of arrays that make up that column.
+        self.nbytes = 0  # The number of bytes currently held by the store.
+        self.nrows = 0  # The number of rows currently held by the store.
+
+    def append(self, chunk):
+        """
+        Append the columns of a chunk to the store.
+        Raises a MemoryLimitException (a FileLoadingException) if doing so would exceed the memory limit.
+
+        :param chunk: a dataframe with the same columns as every other chunk.
+        """
+
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.blocks = {col: [] for col in self.columns}
+
+        chunk_bytes = int(chunk.memory_usage(index=False, deep=True).sum())
+        if self.memory_limit is not None and self.nbytes + chunk_bytes > self.memory_limit:
+            raise MemoryLimitException(f'The data exceeds the memory limit of '
+                                       f'{self.memory_limit // (1024 * 1024)} MB after {self.nrows} rows.')
+
+        for col in self.columns:
+            self.blocks[col].append(chunk[col].to_numpy())
+        self.nbytes += chunk_bytes
+        self.nrows += len(chunk)
+
+    def to_frame(self):
+        """
+        Assemble the stored columns into a dataframe. The store is emptied as each column is concatenated,
+        so that at most one column is held twice at any moment.
+
+        :return: the data as a Pandas dataframe.
+        """
+
+        if self.columns is None:
+            return pd.DataFrame()
+
+        columns = {}
+        for col in self.columns:
+            columns[col] = np.concatenate(self.blocks.pop(col))
+
+        self.nbytes = 0
+        return pd.DataFrame(columns, columns=self.columns, copy=False)
+
+
+def iter_csv_chunks(file, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """
+    Parse a .csv file chunk by chunk, yielding each chunk once it has been validated.
+
+    :param file: the .csv file.
+    :param chunksize: the number of rows parsed per chunk.
+    :param progress: an optional callable taking a float between 0 and 1, called after each chunk is read.
+    :return: a generator of tuples (chunk, missing) where missing is an array of the number of missing values
+    dropped from each column.
+    """
+
+    # Pre-condition checks.
+    if file is None:
+        raise ValueError('Precondition check: File cannot be None')
+    if chunksize <= 0:
+        raise ValueError(f'Precondition: chunksize must be positive, got {chunksize}')
+
+    size = file_size(file)
+
+    for chunk in pd.read_csv(file, chunksize=chunksize):
+        yield validate_chunk(chunk)
+
+        if progress is not None and size > 0:
+            progress(min(file.tell() / size, 1.0))
+
+    if progress is not None:
+        progress(1.0)
+
+
+def read_csv_chunked(file, chunksize=DEFAULT_CHUNKSIZE, memory_limit=None, progress=None):
+    """
+    Read a .csv file chunk by chunk, validating each chunk as it is read.
+
+    :param file: the .csv file.
+    :param chunksize: the number of rows parsed per chunk.
+    :param memory_limit: the maximum number of bytes the cleaned data may use, or None for no limit.
+    :param progress: an optional callable taking a float between 0 and 1, called after each chunk is read.
+    :raises: MemoryLimitException
+    :return: a tuple (data, missing, n_saved) where missing is an array of the number of missing values that were
+    dropped from each column, and n_saved is the number of bytes saved by narrowing the numeric columns.
+    """
+
+    store = ColumnarStore(memory_limit)
+    missing = 0
+    n_saved = 0
+
+    for chunk, chunk_missing in iter_csv_chunks(file, chunksize, progress):
+        missing = missing + chunk_missing
+        chunk, chunk_saved = compact_frame(chunk, strings=False)
+        n_saved += chunk_saved
+        store.append(chunk)
+
+    return store.to_frame(), missing, n_saved
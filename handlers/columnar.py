@@ -0,0 +1,122 @@
+"""
+This module loads data from columnar file formats: Parquet, Feather and Arrow IPC.
+
+Unlike .csv, these formats store a schema and allow individual columns to be read, so only the columns that the
+model was trained on (plus the target) are read from the file. Feather/Arrow files on disk are memory-mapped, and
+uploaded files are read straight from their in-memory buffer, so that numeric columns without missing values are
+converted to pandas without copying where pyarrow allows it.
+"""
+import os
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+COLUMNAR_EXTENSIONS = ['.parquet', '.feather', '.arrow']
+
+
+def file_extension(file):
+    """
+    Return the lower case extension of a file's name, e.g. '.csv'.
+
+    :param file: a file with a name attribute, such as one returned by open() or a streamlit UploadedFile.
+    :return: the extension, or an empty string if the file has no name.
+    """
+
+    name = getattr(file, 'name', '')
+    if not isinstance(name, str):
+        return ''
+    return os.path.splitext(name)[1].lower()
+
+
+def arrow_source(file):
+    """
+    Wrap a file as a pyarrow source without copying its contents where possible.
+    Files on disk are memory-mapped, and in-memory files (e.g. uploads) are wrapped around their buffer.
+
+    :param file: the file.
+    :return: a pyarrow NativeFile.
+    """
+
+    if hasattr(file, 'getbuffer'):
+        return pa.BufferReader(pa.py_buffer(file.getbuffer()))
+
+    name = getattr(file, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return pa.memory_map(name, 'r')
+
+    file.seek(0)
+    return pa.BufferReader(pa.py_buffer(file.read()))
+
+
+def schema_names(source, extension):
+    """
+    Read the column names of a columnar file from its schema, without reading any data.
+
+    :param source: a pyarrow source, as returned by arrow_source().
+    :param extension: the file's extension, one of COLUMNAR_EXTENSIONS.
+    :return: a list of column names.
+    """
+
+    if extension == '.parquet':
+        names = pq.read_schema(source).names
+    else:
+        names = pa.ipc.open_file(source).schema.names
+
+    source.seek(0)
+    return names
+
+
+def projected_columns(names, model, target_idx):
+    """
+    Choose the columns to read for a model: its training features plus the target.
+    The target is placed so that it can still be found at target_idx within the projected columns.
+
+    :param names: the column names in the file.
+    :param model: the sklearn model. Models trained without feature names have every column read.
+    :param target_idx: the index of the target feature in the file.
+    :return: a list of column names, or None if every column should be read.
+    """
+
+    features = getattr(model, 'feature_names_in_', None)
+    if features is None:
+        return None
+
+    target = names[target_idx]
+    wanted = set(features)
+    columns = [name for name in names if name in wanted and name != target]
+
+    # The target's position must be expressible by the same target_idx among the projected columns.
+    position = target_idx if target_idx >= 0 else len(columns) + 1 + target_idx
+    if not 0 <= position <= len(columns):
+        return None
+
+    columns.insert(position, target)
+    return columns
+
+
+def read_columnar(file, model, target_idx):
+    """
+    Load a Parquet, Feather or Arrow IPC file as a Pandas dataframe, reading only the columns the model needs.
+
+    :param file: the file.
+    :param model: the sklearn model the data will be used with.
+    :param target_idx: the index of the target feature in the file.
+    :return: the data as a Pandas dataframe.
+    """
+
+    extension = file_extension(file)
+    if extension not in COLUMNAR_EXTENSIONS:
+        raise ValueError(f'Precondition: {extension} is not a columnar file extension')
+
+    source = arrow_source(file)
+    columns = projected_columns(schema_names(source, extension), model, target_idx)
+
+    if extension == '.parquet':
+        table = pq.read_table(source, columns=columns)
+    else:
+        table = feather.read_table(source, columns=columns, memory_map=True)
+        if columns is not None:
+            table = table.select(columns)  # Feather may return the columns in the file's order instead.
+
+    # Avoid consolidating the columns into 2D blocks, so that they can be handed over without copying.
+    return table.to_pandas(split_blocks=True, self_destruct=True)
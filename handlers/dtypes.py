@@ -0,0 +1,115 @@
+"""
+This module shrinks loaded data to the most compact dtypes that hold it exactly.
+
+pd.read_csv gives every integer column int64, every float column float64 and every text column Python string
+objects, which is several times larger than most data needs. Each column is profiled once it has been read (and its
+missing values dropped), and then converted:
+ - integer columns to the smallest signed integer type that holds their minimum and maximum,
+ - float columns to float32, if every value survives the round trip unchanged,
+ - text columns to categoricals if they have few distinct values, and to Arrow strings otherwise.
+
+Every value is kept exactly, but analysers must up-cast before accumulating (e.g. the squares of an int8 column
+overflow), as analysers.accumulators does. The numeric feature block built by handlers.layout uses the model's
+dtype if it holds every compact feature exactly, and otherwise the narrowest float dtype which does, so features
+which all fit float32 can stay float32 for as long as the data is held, as do compact targets and non-numeric data.
+Narrowing the stored data never changes a result; only the copy of the features passed to a tree-based model's
+predict method is rounded to float32, as sklearn would do itself (see handlers.layout.model_input).
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_float_dtype, is_integer_dtype, is_object_dtype
+
+INTEGER_DTYPES = [np.int8, np.int16, np.int32]  # The integer dtypes tried, smallest first.
+CATEGORY_RATIO = 0.5  # Text columns with at most this fraction of distinct values become categoricals.
+ARROW_STRING = pd.StringDtype('pyarrow')  # The dtype of text columns with many distinct values.
+
+
+def compact_numeric(values, low=None, high=None):
+    """
+    Return a numeric array in the smallest dtype which holds every one of its values exactly.
+
+    :param values: a numpy array of integers or floats.
+    :param low: the array's minimum, if already known (e.g. from the data's profile, see handlers.validation).
+    :param high: the array's maximum, if already known.
+    :return: the array, converted if a smaller dtype holds it, otherwise unchanged.
+    """
+
+    if len(values) == 0:
+        return values
+
+    if is_integer_dtype(values.dtype):
+        if low is None or high is None:
+            low, high = values.min(), values.max()
+        for dtype in INTEGER_DTYPES:
+            if np.dtype(dtype).itemsize >= values.dtype.itemsize:
+                break
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+        return values
+
+    if values.dtype == np.float64:
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow, values, equal_nan=True):
+            return narrow
+    return values
+
+
+def compact_column(column, strings=True, stats=None):
+    """
+    Return a column in the most compact dtype which holds every one of its values exactly (see the module docs).
+    Boolean columns, and object columns which are not all text, are returned unchanged.
+
+    :param column: a Pandas series.
+    :param strings: whether text columns are converted too.
+    :param stats: the column's row of the data's profile (see handlers.validation.DataProfile), whose minimum,
+    maximum and number of distinct values are used rather than scanning the column again, or None.
+    :return: a Pandas series with the same index and name.
+    """
+
+    low = high = n_distinct = None
+    if stats is not None:
+        low, high, n_distinct = [None if pd.isna(stats[name]) else stats[name] for name in ['Min', 'Max', 'Distinct']]
+
+    if is_bool_dtype(column.dtype):
+        return column
+
+    if is_integer_dtype(column.dtype) or is_float_dtype(column.dtype):
+        if not isinstance(column.dtype, np.dtype):
+            return column  # Nullable and Arrow-backed numbers are left as they were read.
+        values = compact_numeric(column.to_numpy(), low, high)
+        if values.dtype == column.dtype:
+            return column
+        return pd.Series(values, index=column.index, name=column.name, copy=False)
+
+    if strings and is_object_dtype(column.dtype) and infer_dtype(column, skipna=False) == 'string':
+        if n_distinct is None:
+            n_distinct = column.nunique()
+        if n_distinct <= CATEGORY_RATIO * len(column):
+            return column.astype('category')
+        return column.astype(ARROW_STRING)
+
+    return column
+
+
+def compact_frame(data, strings=True, profile=None):
+    """
+    Convert every column of a dataframe to its most compact dtype, one column at a time so that at most one extra
+    column is held at once.
+
+    :param data: the loaded dataframe. It is not modified.
+    :param strings: whether text columns are converted too. Chunks that are later concatenated as numpy arrays (see
+    handlers.chunked) only have their numeric columns converted.
+    :param profile: the data's DataProfile (see handlers.validation), whose statistics are reused, or None.
+    :return: a tuple (data, n_saved) where n_saved is the number of bytes saved.
+    """
+
+    data = data.copy(deep=False)
+    n_saved = 0
+    for i in range(data.shape[1]):
+        column = data.iloc[:, i]
+        compact = compact_column(column, strings, profile.table.iloc[i] if profile is not None else None)
+        if compact is not column:
+            n_saved += int(column.memory_usage(index=False, deep=True) - compact.memory_usage(index=False, deep=True))
+            data.isetitem(i, compact)
+    return data, n_saved
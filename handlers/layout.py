@@ -0,0 +1,169 @@
+"""
+This module lays the loaded data out in memory so that the handler holds it only once.
+
+The numeric feature columns are copied into a single column-major (Fortran-ordered) block, optionally memory-mapped
+from a spill file. The handler's data, X and y are then zero-copy views of that block: a column-major 2D array is
+exactly the layout pandas uses for its own blocks, slicing off the leading feature columns keeps the view
+contiguous, and sklearn estimators accept it without converting it again.
+
+The block's dtype is chosen for the model when the handler is built (see block_dtype): the model's own dtype
+(see feature_dtype) if it holds every feature exactly, so that predict reads X in place, and otherwise the narrowest
+float dtype which does, so the data the user sees and the analysers read keeps the values it was loaded with. Only in
+that last case, e.g. float64 features for a tree-based model, is the copy of X passed to predict converted (see
+model_input), as sklearn would otherwise do itself. The column-major layout is kept for every model, as sklearn's
+forests and linear models read a column-major array of their dtype without copying it.
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+def spill_dir_from_env(name='DATA_SPILL_DIR'):
+    """
+    Read the directory to memory-map loaded data from, from an environment variable.
+
+    :param name: the name of the environment variable.
+    :return: the directory, or None if the variable is not set.
+    """
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return None
+    return value
+
+
+def feature_dtype(model):
+    """
+    Choose the dtype of the feature block for a model, so that its predict method does not convert X again.
+
+    :param model: the sklearn model.
+    :return: np.float32 for tree-based models, np.float64 otherwise.
+    """
+
+    if hasattr(model, 'tree_'):
+        return np.float32
+
+    estimators = getattr(model, 'estimators_', None)
+    if estimators is not None:
+        first = np.ravel(estimators)[0] if len(estimators) > 0 else None
+        if hasattr(first, 'tree_'):
+            return np.float32
+
+    return np.float64
+
+
+def block_dtype(dtypes, model=None):
+    """
+    Choose the dtype of the feature block: the model's dtype (see feature_dtype) if it holds every feature's values
+    exactly, and otherwise the narrowest float dtype which does. Features narrowed to float32 or small integers
+    (see handlers.dtypes) fit a float32 block, and any wider feature needs a float64 block.
+
+    :param dtypes: the dtypes of the features.
+    :param model: the sklearn model the data is loaded for, or None.
+    :return: np.float32 or np.float64.
+    """
+
+    exact = np.result_type(np.float32, *dtypes).type
+    if model is not None and np.can_cast(exact, feature_dtype(model), casting='safe'):
+        return feature_dtype(model)
+    return exact
+
+
+def model_input(model, X):
+    """
+    Return the features to pass to a model's predict method, in the model's dtype (see feature_dtype).
+    X is returned as is if it already has that dtype, as the features of a handler built for the model do whenever
+    the dtype holds them exactly (see block_dtype). Otherwise X is converted once into a new array, so that the
+    handler's data keeps its loaded values.
+
+    :param model: the sklearn model.
+    :param X: the features, as a dataframe.
+    :return: a dataframe with the model's dtype.
+    """
+
+    dtype = feature_dtype(model)
+    if not all(is_numeric_dtype(column_dtype) for column_dtype in X.dtypes):
+        return X  # Non-numeric features are left for the model (e.g. a pipeline with an encoder) to convert.
+    if all(column_dtype == dtype for column_dtype in X.dtypes):
+        return X
+    return X.astype(dtype)
+
+
+def allocate_block(n_rows, n_columns, dtype, spill_dir=None):
+    """
+    Allocate an uninitialised column-major block, either in memory or memory-mapped from a .npy spill file.
+    The spill file gets a unique name, and is unlinked straight away where the OS allows it, so that its space is
+    freed once the block is no longer referenced.
+
+    :param n_rows: the number of rows.
+    :param n_columns: the number of columns.
+    :param dtype: the dtype of the block.
+    :param spill_dir: if given, the block is memory-mapped from a new .npy file in this directory.
+    :return: an array (or memmap) of shape (n_rows, n_columns) in Fortran order.
+    """
+
+    if spill_dir is None:
+        return np.empty((n_rows, n_columns), dtype=dtype, order='F')
+
+    fd, path = tempfile.mkstemp(suffix='.npy', prefix='data_', dir=spill_dir)
+    os.close(fd)
+    block = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_rows, n_columns), fortran_order=True)
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # The file is still mapped (e.g. on Windows), so it is left in spill_dir.
+    return block
+
+
+def build_views(data, target_idx, spill_dir=None, model=None):
+    """
+    Copy the numeric features of a dataframe into a single block (see block_dtype), and return the data, features
+    and target as zero-copy views of it. The target joins the block only if its dtype already matches; otherwise (e.g.
+    for string class labels or integer targets) it is kept as its own column so that its values are unchanged. The
+    target is always placed last, so that the features form one contiguous slice of the block.
+
+    If any feature is non-numeric, the data cannot be held in a single numeric block, so the data and features are
+    built from the dataframe's own columns instead, without copying them. If the column names are not unique, the
+    features are copied out of the dataframe as before.
+
+    :param data: the loaded dataframe.
+    :param target_idx: the index of the target feature in the dataframe.
+    :param spill_dir: if given, the block is memory-mapped from a .npy file in this directory.
+    :param model: the sklearn model the data is loaded for, which the block's dtype is chosen for, or None.
+    :return: a tuple (data, X, y).
+    """
+
+    target = data.columns[target_idx]
+    features = [col for col in data.columns if col != target]
+
+    if not data.columns.is_unique:
+        return data, data.drop(target, axis=1), data[target]
+
+    if not all(is_numeric_dtype(data[col]) for col in features):
+        # Unconsolidated frames of the columns, so that neither X nor the reordered data copies them.
+        X = pd.DataFrame({col: data[col] for col in features}, copy=False)
+        y = data[target]
+        data = pd.DataFrame({**{col: X[col] for col in features}, target: y}, copy=False)
+        return data, X, y
+
+    dtype = block_dtype([data[col].dtype for col in features], model)
+    target_in_block = data[target].dtype == dtype
+    n_columns = len(features) + (1 if target_in_block else 0)
+    block = allocate_block(len(data), n_columns, dtype, spill_dir)
+
+    # Fill the block one column at a time, so that only one extra column is ever converted at once.
+    for i, col in enumerate(features):
+        block[:, i] = data[col].to_numpy()
+
+    X = pd.DataFrame(block[:, :len(features)], index=data.index, columns=features, copy=False)
+    if target_in_block:
+        block[:, -1] = data[target].to_numpy()
+        y = pd.Series(block[:, -1], index=data.index, name=target, copy=False)
+        data = pd.DataFrame(block, index=data.index, columns=features + [target], copy=False)
+    else:
+        y = data[target]
+        data = pd.concat([X, y], axis=1, copy=False)
+
+    return data, X, y
@@ -0,0 +1,323 @@
+"""
+This module loads models, sharing identical model files across sessions.
+
+Models are identified by a hash of their file's content, and kept in a process-wide cache with a size cap and
+least-recently-used eviction, so that every session which uploads (or picks) the same model shares a single
+read-only copy of it rather than unpickling its own.
+
+Besides pickled .sav files, models saved with joblib.dump can be loaded from .joblib files. Their large numpy arrays
+(e.g. the nodes of a random forest's trees) are memory-mapped read-only instead of being read into memory, so they
+load in a fraction of the time and their pages are shared by the OS. Uploaded .joblib files are first written to
+MODEL_DIR, as joblib can only memory-map a file on disk, and the file is removed when its model leaves the cache
+(or straight after loading, if the model is too large to be cached). Models still in use keep their mapping, as the
+OS only frees a removed file's pages once they are unmapped (where it does not allow removing a mapped file, e.g. on
+Windows, the file is left in MODEL_DIR).
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+import joblib
+from handlers.chunked import file_size
+from handlers.columnar import file_extension
+from profiling import note_cache_miss
+
+DEFAULT_CACHE_LIMIT = 2048  # The default size cap of the model cache, in megabytes.
+
+MODEL_DIR = os.environ.get('MODEL_DIR') or os.path.join(tempfile.gettempdir(), 'model-analyser-models')
+
+
+def update_digest(digest, file, block_size=1 << 20):
+    """
+    Feed the contents of a file into a hashlib digest, block by block, then rewind the file so that it can
+    still be loaded afterwards. Works with both binary and text mode files.
+
+    :param digest: a hashlib digest object, e.g. hashlib.sha256().
+    :param file: the file to hash.
+    :param block_size: the number of bytes (or characters) to read at a time.
+    """
+
+    file.seek(0)
+    block = file.read(block_size)
+    while len(block) > 0:
+        if isinstance(block, str):
+            block = block.encode('utf-8')
+        digest.update(block)
+        block = file.read(block_size)
+    file.seek(0)
+
+
+def cache_limit_from_env(name='MODEL_CACHE_LIMIT'):
+    """
+    Read the size cap of the model cache (in megabytes) from an environment variable.
+
+    :param name: the name of the environment variable.
+    :return: the size cap in bytes, DEFAULT_CACHE_LIMIT megabytes if the variable is not set.
+    """
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        value = DEFAULT_CACHE_LIMIT
+    return int(float(value) * 1024 * 1024)
+
+
+def uploaded_path(digest):
+    """
+    Return the path in MODEL_DIR an uploaded model file with the given content hash is written to.
+
+    :param digest: the file's content hash.
+    :return: the path.
+    """
+    return os.path.join(MODEL_DIR, digest + '.joblib')
+
+
+class ModelCache:
+    """
+    A thread-safe, size-capped cache of loaded models keyed by their file's content hash, evicting the least
+    recently used models first. The cached models are shared, so they must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes, on_evict=None):
+        """
+        :param max_bytes: the total size of the models the cache may hold. Models larger than this are not cached.
+        :param on_evict: if given, called with the key of every model which leaves the cache (or is not cached as it
+        is too large), with the key's loading lock held rather than the cache's lock.
+        """
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0  # The total size of the cached models.
+        self.hits = 0  # The number of loads served from the cache.
+        self.misses = 0  # The number of loads which had to read the model file.
+        self._entries = OrderedDict()  # Maps each key to (model, size), least recently used first.
+        self._loading = {}  # Maps each key being loaded to a lock, so that a model is only loaded once at a time.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _get(self, key):
+        """Return the cached model for the key (marking it as recently used), or None. Must hold self._lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get_or_load(self, key, size, loader):
+        """
+        Return the cached model for the key, or call loader() to load it and cache the result.
+        Concurrent calls for the same key wait for a single load rather than each loading the model. If the load
+        raises, the exception propagates to its caller, and each waiting call tries to load the model itself.
+
+        :param key: the model file's content hash.
+        :param size: the size of the model in bytes, used for the size cap.
+        :param loader: a callable with no arguments which loads and returns the model.
+        :return: the model.
+        """
+
+        with self._lock:
+            model = self._get(key)
+            if model is not None:
+                self.hits += 1
+                return model
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        evicted = []
+        with key_lock:
+            with self._lock:
+                model = self._get(key)
+                if model is not None:
+                    self.hits += 1
+                    return model
+                self.misses += 1
+
+            try:
+                model = loader()
+                with self._lock:
+                    evicted = self._put(key, model, size)
+            finally:
+                self._forget_key_lock(key, key_lock)
+
+        self._evicted(evicted)
+        return model
+
+    def _forget_key_lock(self, key, key_lock):
+        """Forget a key's loading lock, unless it has been replaced, so that a later call can try again."""
+        with self._lock:
+            if self._loading.get(key) is key_lock:
+                del self._loading[key]
+
+    def _put(self, key, model, size):
+        """
+        Add a model, evicting the least recently used models to stay within max_bytes. Must hold self._lock.
+        Returns the keys of the evicted models, including the key itself if the model is too large to be cached.
+        """
+
+        if size > self.max_bytes:
+            return [key]
+
+        evicted = []
+        while self._entries and self.total_bytes + size > self.max_bytes:
+            evicted_key, (_, evicted_size) = self._entries.popitem(last=False)
+            self.total_bytes -= evicted_size
+            evicted.append(evicted_key)
+
+        self._entries[key] = (model, size)
+        self.total_bytes += size
+        return evicted
+
+    def _evicted(self, keys):
+        """
+        Pass the keys of models which left the cache to on_evict. Must not hold self._lock or any key's loading lock.
+        Each key's loading lock is held while on_evict runs, so that it never runs alongside a load of the same model,
+        and it is skipped if the model was loaded into the cache again in the meantime.
+        """
+
+        if self.on_evict is None:
+            return
+
+        for key in keys:
+            with self._lock:
+                key_lock = self._loading.setdefault(key, threading.Lock())
+            with key_lock:
+                try:
+                    with self._lock:
+                        cached = key in self._entries
+                    if not cached:
+                        self.on_evict(key)
+                finally:
+                    self._forget_key_lock(key, key_lock)
+
+    def clear(self):
+        """
+        Remove every model from the cache.
+        """
+
+        with self._lock:
+            evicted = list(self._entries)
+            self._entries.clear()
+            self.total_bytes = 0
+        self._evicted(evicted)
+
+
+def remove_model_file(digest):
+    """
+    Remove the copy of an uploaded model file written to MODEL_DIR (see model_path()), if there is one.
+
+    :param digest: the file's content hash.
+    """
+
+    try:
+        os.remove(uploaded_path(digest))
+    except OSError:
+        pass  # There is no copy (the model was not uploaded), or the OS does not allow removing a mapped file.
+
+
+MODEL_CACHE = ModelCache(cache_limit_from_env(), on_evict=remove_model_file)  # The process-wide model cache.
+
+
+def model_digest(file):
+    """
+    Compute the content hash of a model file.
+
+    :param file: the model file.
+    :return: a hex string.
+    """
+
+    digest = hashlib.sha256()
+    update_digest(digest, file)
+    return digest.hexdigest()
+
+
+def model_path(file, digest):
+    """
+    Return a path on disk holding the model file's content, writing it to MODEL_DIR if the file is not on disk
+    (e.g. an upload). The file is named after its content hash, so it is only ever written once.
+
+    :param file: the model file.
+    :param digest: the file's content hash, as returned by model_digest().
+    :return: the path.
+    """
+
+    name = getattr(file, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+
+    path = uploaded_path(digest)
+    if not os.path.isfile(path):
+        os.makedirs(MODEL_DIR, exist_ok=True)
+
+        # Write to a temporary name first, so that a partially written file is never loaded by another session.
+        fd, tmp_path = tempfile.mkstemp(dir=MODEL_DIR, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as out:
+            file.seek(0)
+            block = file.read(1 << 20)
+            while len(block) > 0:
+                out.write(block)
+                block = file.read(1 << 20)
+        os.replace(tmp_path, path)
+        file.seek(0)
+
+    return path
+
+
+def read_model(file, digest):
+    """
+    Load a model from a .joblib file (memory-mapping its arrays read-only) or from any other pickled file.
+
+    :param file: the model file.
+    :param digest: the file's content hash, as returned by model_digest().
+    :return: the model.
+    """
+
+    if file_extension(file) == '.joblib':
+        return joblib.load(model_path(file, digest), mmap_mode='r')
+
+    file.seek(0)
+    return pickle.load(file)
+
+
+def mapped_model_path(file):
+    """
+    Return the path a .joblib model file is memory-mapped from, so that other processes can map the same file
+    (see handlers.parallel). Nothing is written: an uploaded file's copy may already have been removed from
+    MODEL_DIR, if its model has left the cache.
+
+    :param file: the model file, after its model has been loaded.
+    :return: the path, or None if the model is not a .joblib file or its file is no longer on disk.
+    """
+
+    if file_extension(file) != '.joblib':
+        return None
+
+    name = getattr(file, 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+
+    path = uploaded_path(model_digest(file))
+    return path if os.path.isfile(path) else None
+
+
+def load_shared_model(file, cache=MODEL_CACHE):
+    """
+    Load a model, sharing it through the cache with every other load of a file with the same content.
+
+    :param file: the model file, opened in binary mode.
+    :param cache: the ModelCache to share the model through, or None to always load it.
+    :return: the model.
+    """
+
+    digest = model_digest(file)
+    if cache is None:
+        return read_model(file, digest)
+
+    def loader():
+        note_cache_miss()
+        return read_model(file, digest)
+
+    return cache.get_or_load(digest, file_size(file), loader)
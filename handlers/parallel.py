@@ -0,0 +1,213 @@
+"""
+This module provides sharded, parallel inference for models which do not parallelise predict themselves.
+
+The rows of X are split into contiguous shards, and each shard is predicted on a process pool. The model is loaded
+once per worker process (by the pool's initializer) rather than once per shard, and the shard results are
+reassembled in their original order. A heuristic skips parallelism when there are too few rows for the cost of
+sending them to the workers to pay off.
+
+Each model gets its own pool, which is kept and reused for as long as the model is predicted with the same number of
+processes (e.g. for both the predictions and the probabilities of a handler), so the workers are only started when
+either changes. Only the lookup of a pool is serialised: sessions predicting at the same time share the pool's
+workers, and sessions with different models run on different pools. At most MAX_POOLS pools are kept, the least
+recently used being shut down once no prediction is running on it.
+
+The workers are started with the 'forkserver' method (or 'spawn' where it is not available), as forking a process
+which runs threads, as the app does, can deadlock the child. Models memory-mapped from a .joblib file
+(see handlers.models) are loaded by each worker from the file, also memory-mapped, so the workers share the
+model's pages with the app rather than each receiving a pickled copy. Other models are pickled once per pool. Models
+must therefore not be refitted in place once predicted with.
+"""
+import multiprocessing
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import joblib
+import numpy as np
+
+MIN_ROWS_PER_SHARD = 50_000  # Shards smaller than this are not worth sending to another process.
+
+MAX_POOLS = 2  # The number of models whose pools are kept at once.
+
+_worker_model = None  # The model loaded by each worker process.
+
+_pools = OrderedDict()  # Maps (model key, number of workers) to a SharedPool, least recently used first.
+_pools_lock = threading.Lock()  # Guards _pools. It is not held while a pool predicts.
+
+
+def jobs_from_env(name='PREDICT_JOBS'):
+    """
+    Read the number of processes to use for prediction from an environment variable.
+
+    :param name: the name of the environment variable.
+    :return: the number of processes, or None if the variable is not set.
+    """
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def effective_jobs(n_jobs):
+    """
+    Resolve an sklearn-style n_jobs value into a number of processes.
+
+    :param n_jobs: None or 1 for no parallelism, -1 for every CPU, or a positive number of processes.
+    :return: a positive number of processes.
+    """
+
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def should_parallelize(model, n_rows, n_jobs, min_rows_per_shard=MIN_ROWS_PER_SHARD):
+    """
+    Decide whether sharded prediction is worth it.
+    It is skipped if only one process is requested, if the data would not fill at least two shards, or if the
+    model already parallelises its own predictions (i.e. it has an n_jobs other than None or 1).
+
+    :param model: the sklearn model.
+    :param n_rows: the number of rows to predict.
+    :param n_jobs: the requested number of processes (see effective_jobs).
+    :param min_rows_per_shard: the minimum number of rows per shard.
+    :return: True if the prediction should be sharded, false otherwise.
+    """
+
+    if effective_jobs(n_jobs) <= 1:
+        return False
+    if n_rows < 2 * min_rows_per_shard:
+        return False
+    return getattr(model, 'n_jobs', None) in (None, 1)
+
+
+def start_context():
+    """
+    Return the multiprocessing context the pools start their workers with: 'forkserver' if the platform supports it,
+    'spawn' otherwise.
+    """
+
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def _init_worker(model_path, model_bytes):
+    """Load the model once in each worker process, memory-mapping it from its file if it has one."""
+    global _worker_model
+    if model_path is not None:
+        _worker_model = joblib.load(model_path, mmap_mode='r')
+    else:
+        _worker_model = pickle.loads(model_bytes)
+
+
+def _worker_ready(_):
+    """Do nothing, so that a worker is started and has loaded its model."""
+
+
+def _predict_shard(method, shard):
+    """Run the given prediction method of the worker's model on one shard."""
+    return getattr(_worker_model, method)(shard)
+
+
+class SharedPool:
+    """
+    A process pool whose workers have loaded one model, with the number of predictions running on it.
+    """
+
+    def __init__(self, model, model_path, n_workers):
+        """
+        :param model: the sklearn model.
+        :param model_path: the .joblib file the model was memory-mapped from, or None to pickle the model.
+        :param n_workers: the number of worker processes.
+        """
+        self.model = model  # Kept so that the id the pool is keyed by is not reused by another model.
+        self.users = 0  # The number of predictions running on the pool.
+        self.retired = False  # Whether the pool was evicted, and is to be shut down once it has no users.
+
+        if model_path is not None and os.path.isfile(model_path):
+            initargs = (model_path, None)
+        else:
+            initargs = (None, pickle.dumps(model))
+        self.executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=start_context(),
+                                            initializer=_init_worker, initargs=initargs)
+
+        # Start the workers now, while the model file is known to exist (see handlers.models.ModelCache).
+        list(self.executor.map(_worker_ready, range(n_workers)))
+
+    def shutdown(self):
+        """Shut the workers down, without waiting for them to exit."""
+        self.executor.shutdown(wait=False)
+
+
+def _acquire_pool(model, model_path, n_workers):
+    """
+    Return the pool for a model, starting it if there is none, and count the caller as one of its users.
+    Pools beyond MAX_POOLS are evicted, least recently used first. Release the pool with _release_pool().
+
+    :param model: the sklearn model.
+    :param model_path: the .joblib file the model was memory-mapped from, or None.
+    :param n_workers: the number of worker processes.
+    :return: a SharedPool whose workers have loaded the model.
+    """
+
+    key = (model_path if model_path is not None else id(model), n_workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or (model_path is None and pool.model is not model):
+            pool = SharedPool(model, model_path, n_workers)
+            _pools[key] = pool
+        _pools.move_to_end(key)
+        pool.users += 1
+
+        while len(_pools) > MAX_POOLS:
+            _, evicted = _pools.popitem(last=False)
+            evicted.retired = True
+            if evicted.users == 0:
+                evicted.shutdown()
+
+    return pool
+
+
+def _release_pool(pool):
+    """Count the caller out of a pool's users, shutting the pool down if it was evicted and is no longer used."""
+    with _pools_lock:
+        pool.users -= 1
+        if pool.retired and pool.users == 0:
+            pool.shutdown()
+
+
+def parallel_predict(model, X, n_jobs, method='predict', min_rows_per_shard=MIN_ROWS_PER_SHARD, model_path=None):
+    """
+    Predict X with the model, splitting the rows into shards which are predicted on a process pool.
+    Falls back to a single call of the model if should_parallelize() decides against sharding.
+
+    :param model: the sklearn model.
+    :param X: the features, as a dataframe or array.
+    :param n_jobs: the number of processes to use (see effective_jobs).
+    :param method: the prediction method to call, e.g. 'predict' or 'predict_proba'.
+    :param min_rows_per_shard: the minimum number of rows per shard.
+    :param model_path: the .joblib file the model was memory-mapped from, if any, for the workers to load it from.
+    :return: the predictions for every row of X, in order.
+    """
+
+    n_rows = len(X)
+    if not should_parallelize(model, n_rows, n_jobs, min_rows_per_shard):
+        return getattr(model, method)(X)
+
+    n_shards = min(effective_jobs(n_jobs), n_rows // min_rows_per_shard)
+    bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    rows = X.iloc if hasattr(X, 'iloc') else X
+    shards = [rows[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    pool = _acquire_pool(model, model_path, effective_jobs(n_jobs))
+    try:
+        results = list(pool.executor.map(_predict_shard, [method] * n_shards, shards))
+    finally:
+        _release_pool(pool)
+
+    return np.concatenate(results)
@@ -0,0 +1,276 @@
+"""
+This module draws a fixed-size random sample of the data while it streams in, for approximate analysis of files too
+large to analyse interactively.
+
+Every row is given a uniform random key as it is read, and the rows with the smallest keys are kept, which is a
+uniform random sample of the rows seen so far (a reservoir). Once the reservoir is full, a chunk's rows can only
+enter it if their keys are below the largest key held, so most of a large file is discarded as soon as it is parsed
+and the memory used stays bounded by the sample size plus one chunk.
+
+For classifiers the sample can instead be stratified by the target: the final sample takes from each class in
+proportion to its count in the whole file (but at least one row, so that rare classes still appear). Its memory stays
+bounded by the sample size, plus a few rows per class: one reservoir of the sample size is kept over every row, and a
+small reservoir per class keeps its minimum number of rows. Both reservoirs share each row's key, so the rows of a
+class in either are the ones with its smallest keys, and a class's rows in the sample are a uniform sample of the
+class. A class whose proportional share exceeds its rows in the reservoirs (a chance shortfall, of the order of the
+square root of its share) gives its remaining rows to the classes with spare rows. Either way the exact number of rows in the file is known once it has streamed in, which the
+confidence intervals of the analysers use (see analysers.intervals).
+
+The keys are drawn from a fixed seed, so the same file always gives the same sample.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+DEFAULT_SAMPLE_SIZE = 100_000  # The number of rows sampled in approximate mode.
+RANDOM_STATE = 0  # Fixes the sample drawn from a file, so that its fingerprint identifies its results.
+MIN_ROWS_PER_CLASS = 1  # The minimum number of rows of each class in a stratified sample.
+
+
+def sample_size_from_env(name='DATA_SAMPLE_SIZE'):
+    """
+    Read the number of rows to sample in approximate mode from an environment variable.
+
+    :param name: the name of the environment variable.
+    :return: the number of rows, DEFAULT_SAMPLE_SIZE if the variable is not set.
+    """
+
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return DEFAULT_SAMPLE_SIZE
+    return int(value)
+
+
+class ReservoirSampler:
+    """
+    Keeps a uniform random sample of at most size rows of a stream of dataframe chunks.
+    """
+
+    def __init__(self, size, rng):
+        """
+        :param size: the maximum number of rows kept.
+        :param rng: the numpy random Generator the keys are drawn from.
+        """
+
+        # Pre-condition checks.
+        if size <= 0:
+            raise ValueError(f'Precondition: size must be positive, got {size}')
+
+        self.size = size
+        self.rng = rng
+        self.n_seen = 0  # The number of rows streamed through the sampler.
+        self.rows = None  # The rows kept, as a dataframe.
+        self.keys = np.empty(0)  # The random key of each row kept.
+        self.positions = np.empty(0, dtype=np.int64)  # The position in the stream of each row kept.
+
+    def update(self, chunk, positions=None, keys=None):
+        """
+        Stream a chunk of rows through the sampler.
+
+        :param chunk: a dataframe.
+        :param positions: the positions of the chunk's rows in the stream, or None if the chunk directly follows the
+        rows seen so far.
+        :param keys: the random keys of the chunk's rows, or None to draw them.
+        """
+
+        if positions is None:
+            positions = np.arange(self.n_seen, self.n_seen + len(chunk))
+        if keys is None:
+            keys = self.rng.random(len(chunk))
+        self.n_seen += len(chunk)
+
+        # Once the reservoir is full, only rows with a smaller key than one already kept can enter it.
+        if len(self.keys) >= self.size:
+            entering = np.flatnonzero(keys < self.keys.max())
+            if len(entering) == 0:
+                return
+            chunk, keys, positions = chunk.iloc[entering], keys[entering], positions[entering]
+
+        rows = chunk if self.rows is None else pd.concat([self.rows, chunk])
+        keys = np.concatenate([self.keys, keys])
+        positions = np.concatenate([self.positions, positions])
+
+        if len(keys) > self.size:
+            kept = np.argpartition(keys, self.size - 1)[:self.size]
+            rows, keys, positions = rows.iloc[kept], keys[kept], positions[kept]
+
+        self.rows, self.keys, self.positions = rows, keys, positions
+
+    def take(self, n=None):
+        """
+        Return the n rows with the smallest keys, which are a uniform random sample of every row seen.
+
+        :param n: the number of rows, or None for every row kept.
+        :return: a tuple (rows, positions).
+        """
+
+        if n is None or n >= len(self.keys):
+            return self.rows, self.positions
+
+        taken = np.argpartition(self.keys, n - 1)[:n]
+        return self.rows.iloc[taken], self.positions[taken]
+
+
+def proportional_allocation(counts, size, minimum=MIN_ROWS_PER_CLASS):
+    """
+    Split a number of rows between strata in proportion to their counts, rounding by the largest remainder so that
+    the shares add up to exactly size. Each stratum then gets at least minimum rows (or every row, if it has fewer),
+    taken from the strata with the largest shares, as far as size allows.
+
+    :param counts: the number of rows of each stratum, as an array.
+    :param size: the total number of rows.
+    :param minimum: the minimum number of rows of each stratum.
+    :return: an array with the number of rows of each stratum.
+    """
+
+    counts = np.asarray(counts, dtype=np.int64)
+    total = counts.sum()
+    if total <= size:
+        return counts.copy()
+
+    quotas = size * counts / total
+    shares = np.floor(quotas).astype(np.int64)
+    by_remainder = np.argsort(shares - quotas, kind='stable')
+    shares[by_remainder[:size - shares.sum()]] += 1
+
+    floors = np.minimum(counts, minimum)
+    for i in np.flatnonzero(shares < floors):
+        while shares[i] < floors[i]:
+            donors = np.flatnonzero(shares > floors)
+            if len(donors) == 0:
+                return shares
+            shares[donors[np.argmax(shares[donors])]] -= 1
+            shares[i] += 1
+    return shares
+
+
+class StratifiedSampler:
+    """
+    Keeps a random sample of a stream of dataframe chunks which is stratified by the values of one column, in at most
+    size rows plus minimum rows per stratum.
+    """
+
+    def __init__(self, size, column, rng, minimum=MIN_ROWS_PER_CLASS):
+        """
+        :param size: the number of rows in the final sample.
+        :param column: the name of the column to stratify by.
+        :param rng: the numpy random Generator the keys are drawn from.
+        :param minimum: the minimum number of rows of each stratum in the final sample.
+        """
+
+        # Pre-condition checks.
+        if size <= 0:
+            raise ValueError(f'Precondition: size must be positive, got {size}')
+
+        self.size = size
+        self.column = column
+        self.rng = rng
+        self.minimum = minimum
+        self.n_seen = 0  # The number of rows streamed through the sampler.
+        self.reservoir = ReservoirSampler(size, rng)  # A uniform sample of every row.
+        self.strata = {}  # Maps each value of the column to a ReservoirSampler of minimum of its rows.
+
+    def update(self, chunk):
+        """
+        Stream a chunk of rows through the sampler: every row goes through the shared reservoir, and through the
+        small reservoir of its stratum, with the same key.
+
+        :param chunk: a dataframe.
+        """
+
+        positions = np.arange(self.n_seen, self.n_seen + len(chunk))
+        keys = self.rng.random(len(chunk))
+        self.reservoir.update(chunk, positions, keys)
+
+        for value, indices in chunk.groupby(self.column, sort=False).indices.items():
+            if value not in self.strata:
+                self.strata[value] = ReservoirSampler(max(1, self.minimum), self.rng)
+            self.strata[value].update(chunk.iloc[indices], positions[indices], keys[indices])
+        self.n_seen += len(chunk)
+
+    def class_counts(self):
+        """
+        Return the number of rows of each stratum in the whole stream.
+
+        :return: a Pandas series indexed by the values of the column.
+        """
+
+        return pd.Series({value: stratum.n_seen for value, stratum in self.strata.items()}).sort_index()
+
+    def kept(self, value):
+        """
+        Return the rows of a stratum held by either reservoir, in order of their keys.
+
+        :param value: the value of the column.
+        :return: a tuple (rows, positions).
+        """
+
+        stratum = self.strata[value]
+        in_reservoir = (self.reservoir.rows[self.column] == value).to_numpy()
+        extra = ~np.isin(stratum.positions, self.reservoir.positions[in_reservoir])
+        rows = pd.concat([self.reservoir.rows.iloc[np.flatnonzero(in_reservoir)], stratum.rows.iloc[extra]])
+        keys = np.concatenate([self.reservoir.keys[in_reservoir], stratum.keys[extra]])
+        positions = np.concatenate([self.reservoir.positions[in_reservoir], stratum.positions[extra]])
+        order = np.argsort(keys, kind='stable')
+        return rows.iloc[order], positions[order]
+
+    def take(self):
+        """
+        Return the sample of at most size rows, taking from each stratum in proportion to its share of the stream
+        (see proportional_allocation). A stratum with fewer rows kept than its share gives the rest to the strata with
+        spare rows, the furthest below their own share first.
+
+        :return: a tuple (rows, positions).
+        """
+
+        values = list(self.strata)
+        counts = np.array([self.strata[value].n_seen for value in values])
+        kept = [self.kept(value) for value in values]
+        available = np.array([len(positions) for _, positions in kept])
+
+        shares = proportional_allocation(counts, self.size, self.minimum)
+        quotas = min(self.size, self.n_seen) * counts / self.n_seen
+        taken = np.minimum(shares, available)
+        for _ in range(min(self.size, available.sum()) - taken.sum()):
+            spare = np.flatnonzero(taken < available)
+            taken[spare[np.argmax(quotas[spare] - taken[spare])]] += 1
+
+        return (pd.concat([rows.iloc[:n] for (rows, _), n in zip(kept, taken)]),
+                np.concatenate([positions[:n] for (_, positions), n in zip(kept, taken)]))
+
+
+def sample_chunks(chunks, size, stratify_idx=None, seed=RANDOM_STATE):
+    """
+    Draw a random sample from a stream of validated chunks (see handlers.chunked.iter_csv_chunks).
+    The sampled rows keep the order they had in the stream.
+
+    :param chunks: an iterable of tuples (chunk, missing), where missing is an array of the number of missing values
+    dropped from each column of the chunk.
+    :param size: the number of rows to sample.
+    :param stratify_idx: the index of the column to stratify by (e.g. the target of a classifier), or None to draw
+    a uniform sample.
+    :param seed: the seed of the random keys.
+    :return: a tuple (sample, population size, missing, class counts), where the population size is the number of
+    rows streamed, missing is an array of the number of missing values dropped from each column of them, and the
+    class counts are the number of rows per value of the stratifying column (or None if not stratified).
+    """
+
+    rng = np.random.default_rng(seed)
+    sampler = None
+    missing = 0
+    for chunk, chunk_missing in chunks:
+        missing = missing + chunk_missing
+        if sampler is None:
+            if stratify_idx is None:
+                sampler = ReservoirSampler(size, rng)
+            else:
+                sampler = StratifiedSampler(size, chunk.columns[stratify_idx], rng)
+        sampler.update(chunk)
+
+    if sampler is None or sampler.n_seen == 0:
+        return pd.DataFrame(), 0, missing, None
+
+    rows, positions = sampler.take()
+    sample = rows.iloc[np.argsort(positions, kind='stable')].reset_index(drop=True)
+    class_counts = sampler.class_counts() if isinstance(sampler, StratifiedSampler) else None
+    return sample, sampler.n_seen, missing, class_counts
@@ -1,19 +1,34 @@
-import pickle
+import copy
+import hashlib
+import threading
 import pandas as pd
 from sklearn.base import is_classifier
 from handlers import Handler
+from handlers.chunked import DEFAULT_CHUNKSIZE, file_size, iter_csv_chunks, read_csv_chunked, validate_chunk
+from handlers.columnar import COLUMNAR_EXTENSIONS, arrow_source, file_extension, read_columnar, schema_names
+from handlers.dtypes import compact_frame
+from handlers.layout import build_views, model_input
+from handlers.models import load_shared_model, mapped_model_path, model_digest, update_digest
+from handlers.parallel import parallel_predict
+from handlers.sampling import sample_chunks
+from handlers.validation import validate_data
 from exceptions import FileLoadingException
+from profiling import profiled
 from warnings import warn
 
 
+DATA_EXTENSIONS = ['.csv'] + COLUMNAR_EXTENSIONS  # The extensions of the data files that can be loaded.
+MODEL_EXTENSIONS = ['.sav', '.joblib']  # The extensions of the model files that can be loaded.
+
+
 def supported_file_extensions():
     """
     Return the supported file extensions.
     Used by pages.sections.file_uploader
 
-    :return: an array ['.csv', '.sav']
+    :return: an array ['.csv', '.parquet', '.feather', '.arrow', '.sav', '.joblib']
     """
-    return ['.csv', '.sav']
+    return DATA_EXTENSIONS + MODEL_EXTENSIONS
 
 
 def warning(msg):
@@ -24,51 +39,55 @@ def warning(msg):
     warn(msg)
 
 
-def validate_data(data):
+def fingerprint(data_file, model_file, target_idx):
     """
-    Validates the given dataframe by throwing an exception or warning if the data
-    does not meet the following criteria:
-    1). Dataframe contains atleast one missing value (warning).
-    2). Dataframe contains no rows (exception).
-    3). Dataframe contains only 1 column (exception).
-
-    A warning raised may also be accompanied by a correction to the data, such
-    as in the case of missing values (rows will be dropped).
-
-    :param data: The dataframe loaded in.
+    Compute a stable fingerprint identifying a (data, model, target_idx) combination by its content.
+    Two handlers constructed from identical files and target index will share the same fingerprint,
+    which lets analyser results be cached against the fingerprint rather than the handler itself.
+
+    :param data_file: the data file.
+    :param model_file: the model file.
+    :param target_idx: the index of the target feature in the dataset.
+    :return: a hex string.
     """
 
-    if data is None:
-        raise ValueError('Preconditions: Data cannot be None')
-    if len(data) == 0:
-        raise ValueError('Data cannot be empty!')
-    if data.shape[1] <= 1:
-        raise ValueError('Data must be greater than 1 column.')
-
-    n_missing = data.isnull().sum().sum()
-    if n_missing > 0:
-        # Drop the rows with missing values.
-        data.dropna(axis=0, how='any', inplace=True)
-
-        # Re-check that the data is still of acceptable length.
-        if len(data) == 0:
-            raise ValueError('Data cannot be empty!')
-
-        # Provide a warning with a message informing the user what just happened.
-        warning(f'Warning: {n_missing} missing values were found and dropped.')
+    digest = hashlib.sha256()
+    update_digest(digest, data_file)
+    digest.update(b'\0')  # Separate the two files so that their boundary is part of the hash.
+    update_digest(digest, model_file)
+    digest.update(f'\0{target_idx}'.encode('utf-8'))
+    return digest.hexdigest()
 
 
 class StandardHandler(Handler):
     """
     Loads, validates, and provides methods to access the underlying model and data.
-    Is able to load in tabular data (.csv format) and a pickled sklearn model.
+    Is able to load in tabular data (.csv, .parquet, .feather or .arrow format) and a pickled sklearn model.
+
+    If constructed with lazy=True, only the model and the data file's header are loaded by the constructor, and the
+    rest of the data is parsed on a background thread. The data, X, y and fingerprint attributes then wait for that
+    thread the first time they are accessed.
+
+    If constructed with a sample_size, only a random sample of that many rows is kept as the data is read (see
+    handlers.sampling), so that analyses of huge files are fast but approximate. The analysers can then give a
+    confidence interval around each of their results (see Analyser::interval), and exact() returns a handler for
+    the whole file.
     """
 
     # ================================= FILE LOADING METHODS =================================
 
     def load_data(self, file):
         """
-        Loads and returns the data as a Pandas dataframe from a given .csv file.
+        Loads and returns the data as a Pandas dataframe from a given .csv, .parquet, .feather or .arrow file.
+        Columnar files only have the model's features and the target read from them (see handlers.columnar), so the
+        model must be loaded first.
+        If this handler was constructed with a chunksize, a .csv file is parsed and validated in chunks of that
+        many rows, keeping the memory used within self.memory_limit (see handlers.chunked).
+        If this handler was constructed with a sample_size, only a random sample of the rows is returned (see
+        read_sample()).
+        The rows with missing values are dropped, and every column is profiled (see handlers.validation); the
+        profile is kept as self.profile. Every column is then narrowed to the most compact dtype which holds it
+        exactly (see handlers.dtypes), and the number of bytes saved is recorded as self.memory_saved.
         Raises an Exception if file loading fails.
 
         :raises: FileLoadingException
@@ -79,37 +98,126 @@ class StandardHandler(Handler):
         if file is None:
             raise ValueError('Precondition check: File cannot be None')
 
-        data = pd.read_csv(file)
-        validate_data(data)
+        n_saved = 0
+        if self.sample_size is not None:
+            # Missing values have already been dropped before sampling, so only the shape and profile are left.
+            data, missing = self.read_sample(file)
+            data, self.profile = validate_data(data, missing)
+        elif file_extension(file) in COLUMNAR_EXTENSIONS:
+            data, self.profile = validate_data(read_columnar(file, self.model, self.target_idx))
+        elif self.chunksize is None:
+            data, self.profile = validate_data(pd.read_csv(file))
+        else:
+            # Missing values have already been dropped chunk by chunk, so only the shape and profile are left.
+            data, missing, n_saved = read_csv_chunked(file, self.chunksize, self.memory_limit, self.report_progress)
+            data, self.profile = validate_data(data, missing)
+
+        for msg in self.profile.warnings():
+            warning(msg)
 
         # Post-condition check
         if data is None:
             raise FileLoadingException('Something went wrong when loading in the file: read_csv produced None')
 
+        data, compact_saved = compact_frame(data, profile=self.profile)
+        self.profile.record_dtypes(data)
+        self.memory_saved = n_saved + compact_saved
         return data
 
+    def read_sample(self, file):
+        """
+        Read a random sample of self.sample_size rows from a data file, streaming a .csv file in chunks so that only
+        the sample is held in memory. For classifiers the sample is stratified by the target if self.stratify is set.
+        Records the number of rows in the whole file as self.population_size, and the number of rows of each class
+        as self.class_counts.
+
+        :param file: the data file.
+        :return: a tuple (sample, missing) where missing is an array of the number of missing values dropped from
+        each column.
+        """
+
+        if file_extension(file) in COLUMNAR_EXTENSIONS:
+            chunks = [validate_chunk(read_columnar(file, self.model, self.target_idx))]
+        else:
+            chunks = iter_csv_chunks(file, self.chunksize or DEFAULT_CHUNKSIZE, self.report_progress)
+
+        stratify_idx = self.target_idx if self.stratify and is_classifier(self.model) else None
+        sample, self.population_size, missing, self.class_counts = sample_chunks(chunks, self.sample_size,
+                                                                                 stratify_idx)
+        return sample, missing
+
     def load_model(self, file):
         """
-        Load and return the pickled file as an sklearn model.
+        Load and return the pickled (.sav) or joblib (.joblib) file as an sklearn model.
         The file parameter can be obtained by using open(file_name, 'rb') or by any other means.
+        Models are shared read-only with every other handler loaded from a file with the same content
+        (see handlers.models), so they must not be mutated.
 
         :param: file : the pickled file containing the model.
         """
 
-        return pickle.load(file)
+        with profiled('handler', 'load_model') as state:
+            state['cached'] = True
+            return load_shared_model(file)
+
+    def read_header(self, file):
+        """
+        Read the column names of a .csv, .parquet, .feather or .arrow file without parsing its data.
+        The file is rewound afterwards so that it can still be loaded.
+
+        :param file: the data file.
+        :return: a list of column names.
+        """
+
+        # Pre-condition checks.
+        if file is None:
+            raise ValueError('Precondition check: File cannot be None')
+
+        extension = file_extension(file)
+        if extension in COLUMNAR_EXTENSIONS:
+            names = schema_names(arrow_source(file), extension)
+        else:
+            names = list(pd.read_csv(file, nrows=0).columns)
+
+        file.seek(0)
+        return names
+
+    def report_progress(self, fraction):
+        """
+        Record the fraction of the data file loaded so far, and pass it on to the progress callback if there is one.
+
+        :param fraction: a float between 0 and 1.
+        """
+
+        self.load_progress = fraction
+        if self.progress is not None:
+            self.progress(fraction)
 
     # ================================= CONSTRUCTOR METHOD =================================
 
-    def __init__(self, data_file, model_file, target_idx):
+    def __init__(self, data_file, model_file, target_idx, chunksize=None, memory_limit=None, progress=None,
+                 n_jobs=None, spill_dir=None, lazy=False, sample_size=None, stratify=True):
         """
         Constructs this object by loading in the data and model from the given files and storing them as fields.
-        Raises an exception if file loading fails.
+        Raises an exception if file loading fails (or, if lazy, when the data is first accessed).
         The file parameter can be obtained by using open(file_name, 'rb') or by any other means.
 
         :param: file : the file to handle.
         :param: problem_type : MUST be an item returned by handlers.utilities.get_problem_names() ('classification' or
         'regression')
         :param: target_idx : the index of the target feature in the dataset (should usually be -1 for last).
+        :param: chunksize : if given, parse the data in chunks of this many rows rather than all at once.
+        :param: memory_limit : the maximum number of bytes the chunked data may use, or None for no limit.
+        :param: progress : an optional callable taking a float between 0 and 1, used to report chunked progress.
+        :param: n_jobs : if given, predictions are sharded across this many processes when the data is large enough
+        (see handlers.parallel). -1 uses every CPU.
+        :param: spill_dir : if given, the numeric data is memory-mapped from a file in this directory rather than
+        held in memory (see handlers.layout).
+        :param: lazy : if True, parse the data on a background thread rather than before returning. The data file
+        must not be used by the caller until is_loaded() returns True.
+        :param: sample_size : if given, only a random sample of this many rows of the data is loaded (see
+        handlers.sampling). The files are kept, so that exact() can load the whole of the data later.
+        :param: stratify : if sampling for a classifier, whether to stratify the sample by the target class.
         :raises: FileLoadingException
         """
 
@@ -118,12 +226,51 @@ class StandardHandler(Handler):
         # Pre-condition checks.
         if not isinstance(target_idx, int):
             raise ValueError('Precondition: target_idx must be an int')
+        if chunksize is not None and chunksize <= 0:
+            raise ValueError(f'Precondition: chunksize must be positive, got {chunksize}')
+        if sample_size is not None and sample_size <= 0:
+            raise ValueError(f'Precondition: sample_size must be positive, got {sample_size}')
+
+        self.chunksize = chunksize  # The number of rows to parse at a time, or None to parse the whole file.
+        self.memory_limit = memory_limit  # The maximum number of bytes the chunked data may use.
+        self.progress = progress  # Called with the fraction of the file read so far during chunked loading.
+        self.n_jobs = n_jobs  # The number of processes to shard predictions across, or None for a single call.
+        self.spill_dir = spill_dir  # The directory the numeric data is memory-mapped from, or None.
+        self.sample_size = sample_size  # The number of rows to sample, or None to load every row.
+        self.stratify = stratify  # Whether a classifier's sample is stratified by the target class.
+        self.population_size = None  # The number of rows in the data file, once loaded (after dropping missing values).
+        self.class_counts = None  # The number of rows of each class in the data file, if the sample was stratified.
+        self._sources = (data_file, model_file, target_idx) if sample_size is not None else None  # For exact().
+        self._exact = None  # The handler for the whole data file, once exact() has been called.
 
         self.target_idx = target_idx  # The column index of the target class from the data.
-        self.data = self.load_data(data_file)  # The raw data as loaded by load_data().
-        self.X = self.data.drop(self.data.columns[self.target_idx], axis=1)  # The training features.
-        self.y = self.data.iloc[::, self.target_idx]  # The target column.
         self.model = self.load_model(model_file)  # The sklearn trained model.
+        self.model_path = mapped_model_path(model_file)  # The .joblib file the model is memory-mapped from, or None.
+        self.columns = self.read_header(data_file)  # The column names, as read from the data file's header.
+        self.file_size = file_size(data_file)  # The size of the data file in bytes.
+        self.load_progress = 0.0  # The fraction of the data file loaded so far.
+        self.memory_saved = 0  # The number of bytes saved by loading the data with compact dtypes.
+        self.profile = None  # The DataProfile of the data's columns, once loaded (see handlers.validation).
+
+        self._data = None  # The data, as loaded by load_data() and laid out by handlers.layout.
+        self._X = None  # The training features.
+        self._y = None  # The target column.
+        self._fingerprint = None  # Identifies the files' content.
+        self._load_error = None  # The exception raised by the background loader, if any.
+        self._loader = None  # The thread loading the data in the background, if lazy.
+
+        if lazy:
+            self._loader = threading.Thread(target=self._load_in_background, args=(data_file, model_file, spill_dir),
+                                            name='data-loader', daemon=True)
+            self._loader.start()
+        else:
+            self._load(data_file, model_file, spill_dir)
+
+        self._predictions = None  # The model's predicted labels for self.X, computed on first use.
+        self._probabilities = None  # The model's class probabilities for self.X, computed on first use.
+        self._prediction_lock = threading.Lock()  # Ensures concurrent analysers share a single inference pass.
+        self._derived = {}  # Values derived from the predictions, shared between analysers (see derived()).
+        self._derived_lock = threading.Lock()  # Ensures concurrent analysers share a single computation of each.
 
         # Set the problem type.
         problem_type = 'regression'
@@ -132,8 +279,223 @@ class StandardHandler(Handler):
 
         self.problem_type = problem_type
 
+    # ================================= DATA LOADING METHODS =================================
+
+    def _load(self, data_file, model_file, spill_dir):
+        """
+        Fingerprint the files, then load the data and lay it out as views of a single numeric block
+        (see handlers.layout), with the target moved to the last column.
+        """
+
+        with profiled('handler', 'load_data'):
+            self._fingerprint = fingerprint(data_file, model_file, self.target_idx)
+            if self.sample_size is not None:
+                # Results of a sample must not be confused with the results of the whole file.
+                key = f'{self._fingerprint}\0sample{self.sample_size}\0{self.stratify}'
+                self._fingerprint = hashlib.sha256(key.encode('utf-8')).hexdigest()
+            data = self.load_data(data_file)
+            if self.population_size is None:
+                self.population_size = len(data)
+            self._data, self._X, self._y = build_views(data, self.target_idx, spill_dir, self.model)
+        self.target_idx = -1
+        self.load_progress = 1.0
+
+    def _load_in_background(self, data_file, model_file, spill_dir):
+        """Run _load() on the loader thread, keeping any exception so that it can be re-raised by wait()."""
+        try:
+            self._load(data_file, model_file, spill_dir)
+        except Exception as e:
+            self._load_error = e
+
+    def is_loaded(self):
+        """
+        Returns whether the data has finished loading (successfully or not), i.e. whether wait() would return
+        straight away.
+
+        :return: True if the data has been loaded, false otherwise.
+        """
+
+        return self._loader is None or not self._loader.is_alive()
+
+    def wait(self):
+        """
+        Block until the data has been loaded.
+        Any exception raised while loading the data in the background is re-raised here.
+
+        :raises: FileLoadingException
+        """
+
+        if self._loader is not None:
+            self._loader.join()
+        if self._load_error is not None:
+            raise self._load_error
+
+    @property
+    def data(self):
+        """The raw data as loaded by load_data()."""
+        self.wait()
+        return self._data
+
+    @property
+    def X(self):
+        """The training features, a view of self.data."""
+        self.wait()
+        return self._X
+
+    @property
+    def y(self):
+        """The target column, a view of self.data."""
+        self.wait()
+        return self._y
+
+    @property
+    def sampled(self):
+        """Whether the data is a sample of fewer rows than the data file has, so results are approximate."""
+        self.wait()
+        return self.population_size > len(self._data)
+
+    @property
+    def fingerprint(self):
+        """A hex string identifying the content of the data file, model file and target index."""
+        self.wait()
+        return self._fingerprint
+
+    def with_model(self, model_file):
+        """
+        Return a handler for another model on this handler's data, sharing the loaded data rather than reading and
+        validating the data file again. The data is never copied or converted: it holds the values it was loaded
+        with whichever model it was loaded for (the block's dtype only changes to the first model's when that holds
+        them exactly), and if the other model's dtype differs it is only applied to the copy of X passed to its
+        predict method (see handlers.layout.model_input), so the results for one model do not depend on the models
+        the data was used with before.
+
+        :param model_file: the file of the other model.
+        :return: a new StandardHandler.
+        :raises: ValueError if the data lacks features the model was trained on (e.g. a columnar file read for
+        another model's features).
+        """
+
+        model = self.load_model(model_file)
+
+        # Pre-condition checks.
+        features = getattr(model, 'feature_names_in_', None)
+        if features is not None and not set(features).issubset(self.X.columns):
+            raise ValueError('Precondition: the data does not have every feature the model was trained on')
+
+        other = copy.copy(self)
+        other.model = model
+        other.model_path = mapped_model_path(model_file)
+        other._loader = None
+        key = f'{self.fingerprint}\0{model_digest(model_file)}'  # Identifies the same data with the other model.
+        other._fingerprint = hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+        if self._sources is not None:
+            other._sources = (self._sources[0], model_file, self._sources[2])
+            other._exact = None
+
+        other._predictions = None
+        other._probabilities = None
+        other._prediction_lock = threading.Lock()
+        other._derived = {}
+        other._derived_lock = threading.Lock()
+        other.problem_type = 'classification' if is_classifier(model) else 'regression'
+        return other
+
+    def exact(self):
+        """
+        Return a handler for the whole of the data file this handler's sample was drawn from.
+        The new handler loads its data lazily, on a background thread, with the same settings as this one. It is
+        only constructed once, and then shared by every later call.
+
+        :return: a new StandardHandler, or this handler if it was not constructed with a sample_size.
+        """
+
+        if self._sources is None:
+            return self
+
+        if self._exact is None:
+            self.wait()  # The files must not be read by two loaders at once.
+            data_file, model_file, target_idx = self._sources
+            data_file.seek(0)
+            model_file.seek(0)
+            self._exact = StandardHandler(data_file, model_file, target_idx, chunksize=self.chunksize,
+                                          memory_limit=self.memory_limit, n_jobs=self.n_jobs,
+                                          spill_dir=self.spill_dir, lazy=True)
+        return self._exact
+
     # ================================= PREDICTION METHODS =================================
 
+    def get_predictions(self):
+        """
+        Return the model's predicted labels for every row of self.X.
+        The predictions are computed on first use and then stored, so that every analyser can share the
+        result of a single inference pass. Call invalidate_predictions() if the model or data is changed.
+        If this handler was constructed with n_jobs, large datasets are predicted in parallel shards.
+
+        :return: an array of shape (n_samples,)
+        """
+
+        with self._prediction_lock:
+            if self._predictions is None:
+                with profiled('handler', 'predict'):
+                    predictions = parallel_predict(self.model, model_input(self.model, self.X), self.n_jobs,
+                                                   model_path=self.model_path)
+
+                # Post-condition checks
+                if len(predictions) != len(self.y):
+                    raise ValueError('Post-condition: length of actuals does not match length of preds')
+
+                self._predictions = predictions
+
+        return self._predictions
+
+    def get_probabilities(self):
+        """
+        Return the model's class probabilities for every row of self.X, or None if the model does not
+        support predict_proba. Like get_predictions(), the probabilities are computed once and then stored.
+
+        :return: an array of shape (n_samples, n_classes), or None.
+        """
+
+        if not hasattr(self.model, 'predict_proba'):
+            return None
+
+        with self._prediction_lock:
+            if self._probabilities is None:
+                with profiled('handler', 'predict_proba'):
+                    self._probabilities = parallel_predict(self.model, model_input(self.model, self.X), self.n_jobs,
+                                                           method='predict_proba', model_path=self.model_path)
+
+        return self._probabilities
+
+    def derived(self, key, compute):
+        """
+        Return a value derived from the model's predictions which several analysers share, such as the residual
+        summary of a regression model (see analysers.residuals). Like get_predictions(), the value is computed once
+        and then stored, and concurrent callers wait for the single computation.
+
+        :param key: identifies the value.
+        :param compute: a function of no arguments which computes the value.
+        :return: the value.
+        """
+
+        with self._derived_lock:
+            if key not in self._derived:
+                self._derived[key] = compute()
+        return self._derived[key]
+
+    def invalidate_predictions(self):
+        """
+        Discard any stored predictions, probabilities and values derived from them so that they are recomputed on
+        next use.
+        """
+
+        with self._prediction_lock:
+            self._predictions = None
+            self._probabilities = None
+        with self._derived_lock:
+            self._derived = {}
+
     def predict(self):
         """
         Returns a dataframe with a column for the actual target labels, and a column for the predicted
@@ -145,14 +507,7 @@ class StandardHandler(Handler):
         :return: a dataframe of shape (n_samples, 2)
         """
 
-        actuals = self.y
-        preds = self.model.predict(self.X)
-
-        # Post-condition checks
-        if len(actuals) != len(preds):
-            raise ValueError('Post-condition: length of actuals does not match length of preds')
-
-        return pd.DataFrame({'actual': actuals, 'predicted': preds})
+        return pd.DataFrame({'actual': self.y, 'predicted': self.get_predictions()})
 
     # ================================= DATA GETTER METHODS =================================
 
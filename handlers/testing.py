@@ -1,6 +1,9 @@
 import pickle
 import pandas as pd
 from handlers import Handler
+from handlers.dtypes import compact_frame
+from handlers.layout import build_views, model_input
+from handlers.validation import validate_data
 from exceptions import FileLoadingException
 from warnings import warn
 
@@ -13,40 +16,6 @@ def warning(msg):
     warn(msg)
 
 
-def validate_data(data):
-    """
-    Validates the given dataframe by throwing an exception or warning if the data
-    does not meet the following criteria:
-    1). Dataframe contains atleast one missing value (warning).
-    2). Dataframe contains no rows (exception).
-    3). Dataframe contains only 1 column (exception).
-
-    A warning raised may also be accompanied by a correction to the data, such
-    as in the case of missing values (rows will be dropped).
-
-    :param data: The dataframe loaded in.
-    """
-
-    if data is None:
-        raise ValueError('Preconditions: Data cannot be None')
-    if len(data) == 0:
-        raise ValueError('Data cannot be empty!')
-    if data.shape[1] <= 1:
-        raise ValueError('Data must be greater than 1 column.')
-
-    n_missing = data.isnull().sum().sum()
-    if n_missing > 0:
-        # Drop the rows with missing values.
-        data.dropna(axis=0, how='any', inplace=True)
-
-        # Re-check that the data is still of acceptable length.
-        if len(data) == 0:
-            raise ValueError('Data cannot be empty!')
-
-        # Provide a warning with a message informing the user what just happened.
-        warning(f'{n_missing} missing values were found and dropped.')
-
-
 class TestHandler(Handler):
     """
     This Handler is used for testing.
@@ -57,7 +26,9 @@ class TestHandler(Handler):
 
     def load_data(self, file):
         """
-        Loads and returns the data as a Pandas dataframe from a given .csv file.
+        Loads and returns the data as a Pandas dataframe from a given .csv file, validated and profiled as by
+        StandardHandler (see handlers.validation), with every column narrowed to the most compact dtype which holds
+        it exactly (see handlers.dtypes). The profile is kept as self.profile.
         Raises an Exception if file loading fails.
 
         :raises: FileLoadingException
@@ -68,13 +39,16 @@ class TestHandler(Handler):
         if file is None:
             raise ValueError('Precondition check: File cannot be None')
 
-        data = pd.read_csv(file)
-        validate_data(data)
+        data, self.profile = validate_data(pd.read_csv(file))
+        for msg in self.profile.warnings():
+            warning(msg)
 
         # Post-condition check
         if data is None:
             raise FileLoadingException('Something went wrong when loading in the file: read_csv produced None')
 
+        data, self.memory_saved = compact_frame(data, profile=self.profile)
+        self.profile.record_dtypes(data)
         return data
 
     def load_model(self, file):
@@ -115,13 +89,75 @@ class TestHandler(Handler):
 
         self.problem_type = problem_type  # A string which is either classification or regression.
         self.target_idx = target_idx  # The column index of the target class from the data.
-        self.data = self.load_data(data_file)  # The raw data as loaded by load_data().
-        self.X = self.data.drop(self.data.columns[self.target_idx], axis=1)  # The training features.
-        self.y = self.data.iloc[::, self.target_idx]  # The target column.
         self.model = self.load_model(model_file)  # The sklearn trained model.
 
+        # The data, X and y are views of a single numeric block, with the target moved to the last column.
+        self.data, self.X, self.y = build_views(self.load_data(data_file), target_idx, model=self.model)
+        self.target_idx = -1
+        self._predictions = None  # The model's predicted labels for self.X, computed on first use.
+        self._probabilities = None  # The model's class probabilities for self.X, computed on first use.
+        self._derived = {}  # Values derived from the predictions, shared between analysers (see derived()).
+
     # ================================= PREDICTION METHODS =================================
 
+    def get_predictions(self):
+        """
+        Return the model's predicted labels for every row of self.X.
+        The predictions are computed on first use and then stored, so that every analyser can share the
+        result of a single inference pass. Call invalidate_predictions() if the model or data is changed.
+
+        :return: an array of shape (n_samples,)
+        """
+
+        if self._predictions is None:
+            self._predictions = self.model.predict(model_input(self.model, self.X))
+
+            # Post-condition checks
+            if len(self._predictions) != len(self.y):
+                raise ValueError('Post-condition: length of actuals does not match length of preds')
+
+        return self._predictions
+
+    def get_probabilities(self):
+        """
+        Return the model's class probabilities for every row of self.X, or None if the model does not
+        support predict_proba. Like get_predictions(), the probabilities are computed once and then stored.
+
+        :return: an array of shape (n_samples, n_classes), or None.
+        """
+
+        if not hasattr(self.model, 'predict_proba'):
+            return None
+
+        if self._probabilities is None:
+            self._probabilities = self.model.predict_proba(model_input(self.model, self.X))
+
+        return self._probabilities
+
+    def derived(self, key, compute):
+        """
+        Return a value derived from the model's predictions which several analysers share, such as the residual
+        summary of a regression model (see analysers.residuals), computing it on first use and then storing it.
+
+        :param key: identifies the value.
+        :param compute: a function of no arguments which computes the value.
+        :return: the value.
+        """
+
+        if key not in self._derived:
+            self._derived[key] = compute()
+        return self._derived[key]
+
+    def invalidate_predictions(self):
+        """
+        Discard any stored predictions, probabilities and values derived from them so that they are recomputed on
+        next use.
+        """
+
+        self._predictions = None
+        self._probabilities = None
+        self._derived = {}
+
     def predict(self):
         """
         Returns a dataframe with a column for the actual target labels, and a column for the predicted
@@ -133,14 +169,7 @@ class TestHandler(Handler):
         :return: a dataframe of shape (n_samples, 2)
         """
 
-        actuals = self.y
-        preds = self.model.predict(self.X)
-
-        # Post-condition checks
-        if len(actuals) != len(preds):
-            raise ValueError('Post-condition: length of actuals does not match length of preds')
-
-        return pd.DataFrame({'actual': actuals, 'predicted': preds})
+        return pd.DataFrame({'actual': self.y, 'predicted': self.get_predictions()})
 
     # ================================= DATA GETTER METHODS =================================
 
@@ -0,0 +1,202 @@
+"""
+This module validates loaded data and profiles its columns.
+
+The rows with missing values are found column by column, each column being scanned once, and are then dropped with a
+single boolean mask rather than by counting the missing values and then rescanning (and rewriting) the frame to drop
+them. The kept data is then profiled in one more pass over each column, recording its dtype, minimum and maximum,
+number of distinct values and number of infinite values alongside the number of missing values that were dropped.
+
+The profile is kept on the handler (see StandardHandler::profile), so that analysers and the UI can read these
+statistics rather than scanning the data again, and the warnings it raises are shown to the user.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_numeric_dtype
+
+PROFILE_COLUMNS = ['Dtype', 'Missing', 'Non-finite', 'Min', 'Max', 'Distinct']  # The columns of a profile's table.
+
+
+def validate_shape(data):
+    """
+    Validates the shape of the given dataframe by throwing an exception if:
+    1). Dataframe contains no rows.
+    2). Dataframe contains only 1 column.
+
+    :param data: The dataframe loaded in.
+    """
+
+    if data is None:
+        raise ValueError('Preconditions: Data cannot be None')
+    if len(data) == 0:
+        raise ValueError('Data cannot be empty!')
+    if data.shape[1] <= 1:
+        raise ValueError('Data must be greater than 1 column.')
+
+
+def drop_missing(data):
+    """
+    Drop the rows of a dataframe which have any missing value, with a single boolean mask.
+    Each column is scanned once, so no mask of the whole frame is built.
+
+    :param data: a dataframe. It is not modified.
+    :return: a tuple (data, missing) where missing is an array of the number of missing values in each column.
+    """
+
+    missing = np.zeros(data.shape[1], dtype=np.int64)
+    incomplete = np.zeros(len(data), dtype=bool)
+    for i in range(data.shape[1]):
+        column_missing = data.iloc[:, i].isna().to_numpy()
+        missing[i] = np.count_nonzero(column_missing)
+        if missing[i] > 0:
+            incomplete |= column_missing
+
+    if incomplete.any():
+        data = data[~incomplete]
+    return data, missing
+
+
+def column_stats(column):
+    """
+    Profile a single column with no missing values.
+    The number of distinct values is only counted for columns which are not floats (e.g. class labels and
+    categories), as counting the distinct values of a continuous column costs a hash of every value.
+
+    :param column: a Pandas series.
+    :return: a tuple (dtype, n_non_finite, min, max, n_distinct), where the statistics which do not apply to the
+    column's dtype are None.
+    """
+
+    n_non_finite = minimum = maximum = n_distinct = None
+    if is_numeric_dtype(column.dtype) and len(column) > 0:
+        values = column.to_numpy()
+        minimum, maximum = float(values.min()), float(values.max())
+        if is_float_dtype(values.dtype):
+            # A column with no missing values only has infinite values if its minimum or maximum is one.
+            finite = np.isfinite(minimum) and np.isfinite(maximum)
+            n_non_finite = 0 if finite else int(np.count_nonzero(np.isinf(values)))
+    if not is_float_dtype(column.dtype):
+        n_distinct = int(column.nunique())
+    return str(column.dtype), n_non_finite, minimum, maximum, n_distinct
+
+
+class DataProfile:
+    """
+    A profile of every column of the loaded data: its dtype, the number of missing values dropped, the number of
+    infinite values, its minimum and maximum, and its number of distinct values.
+    """
+
+    def __init__(self, data, missing=None):
+        """
+        Profile a dataframe whose rows with missing values have already been dropped.
+
+        :param data: the validated dataframe.
+        :param missing: the number of missing values that were dropped from each column (e.g. by drop_missing()),
+        in the order of data's columns, or None if none were dropped.
+        """
+
+        n_columns = data.shape[1]
+        missing = np.zeros(n_columns, dtype=np.int64) if missing is None else np.broadcast_to(missing, (n_columns,))
+
+        dtypes, non_finite, minimums, maximums, distinct = zip(*[column_stats(data.iloc[:, i])
+                                                                for i in range(n_columns)])
+
+        self.n_rows = len(data)  # The number of rows kept.
+        self.table = pd.DataFrame({
+            'Dtype': list(dtypes),
+            'Missing': missing.astype(np.int64),
+            'Non-finite': pd.array(non_finite, dtype='Int64'),
+            'Min': np.array(minimums, dtype=float),
+            'Max': np.array(maximums, dtype=float),
+            'Distinct': pd.array(distinct, dtype='Int64'),
+        }, index=data.columns, columns=PROFILE_COLUMNS)  # One row for each column of the data.
+
+    def n_missing(self):
+        """Return the total number of missing values that were dropped."""
+        return int(self.table['Missing'].sum())
+
+    def record_dtypes(self, data):
+        """
+        Update the dtype of each column, after the data has been converted (e.g. to compact dtypes, see
+        handlers.dtypes).
+
+        :param data: the converted dataframe, with the same columns as the profiled one.
+        """
+        self.table['Dtype'] = [str(dtype) for dtype in data.dtypes]
+
+    def stat(self, column, name):
+        """
+        Return one statistic of a column.
+
+        :param column: the name of the column.
+        :param name: one of PROFILE_COLUMNS.
+        :return: the statistic, or None if it was not computed for the column or the column's name is ambiguous.
+        """
+
+        if column not in self.table.index or not self.table.index.is_unique:
+            return None
+        value = self.table.at[column, name]
+        return None if pd.isna(value) else value
+
+    def extremes(self, columns):
+        """
+        Return the minimum and maximum of several columns.
+
+        :param columns: the names of the columns.
+        :return: a tuple (minimums, maximums) of arrays in the order of columns, or None if any of them is unknown.
+        """
+
+        if not self.table.index.is_unique or not set(columns).issubset(self.table.index):
+            return None
+        rows = self.table.loc[list(columns), ['Min', 'Max']]
+        if rows.isna().any(axis=None):
+            return None
+        return rows['Min'].to_numpy(), rows['Max'].to_numpy()
+
+    def warnings(self):
+        """
+        Return a message for each problem found in the data, to be shown to the user.
+
+        :return: a list of strings.
+        """
+
+        messages = []
+        n_missing = self.n_missing()
+        if n_missing > 0:
+            columns = self.table.index[self.table['Missing'] > 0]
+            messages.append(f'Warning: {n_missing} missing values were found and dropped, from the columns '
+                            f'{", ".join(str(column) for column in columns)}.')
+
+        non_finite = self.table['Non-finite'].fillna(0)
+        for column, count in non_finite[non_finite > 0].items():
+            messages.append(f'Warning: the column {column} has {count} infinite values.')
+        return messages
+
+
+def validate_data(data, missing=None):
+    """
+    Validates the given dataframe by throwing an exception or warning if the data
+    does not meet the following criteria:
+    1). Dataframe contains atleast one missing value (warning).
+    2). Dataframe contains no rows (exception).
+    3). Dataframe contains only 1 column (exception).
+
+    A warning raised may also be accompanied by a correction to the data, such
+    as in the case of missing values (rows will be dropped).
+    The warnings are returned in the data's profile (see DataProfile::warnings) rather than raised.
+
+    :param data: The dataframe loaded in. It is not modified.
+    :param missing: if the rows with missing values have already been dropped (e.g. chunk by chunk, see
+    handlers.chunked), the number of missing values dropped from each column.
+    :return: a tuple (data, profile) of the validated data and its DataProfile.
+    """
+
+    validate_shape(data)
+
+    if missing is None:
+        data, missing = drop_missing(data)
+
+        # Re-check that the data is still of acceptable length.
+        if len(data) == 0:
+            raise ValueError('Data cannot be empty!')
+
+    return data, DataProfile(data, missing)
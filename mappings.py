@@ -1,4 +1,4 @@
-from analysers import accuracy, corr, mean_std, shape, f1, mse, r2, mae
+from analysers import accuracy, corr, mean_std, shape, f1, mse, r2, mae, precision_recall, residuals
 import pages.sections.accuracy as accuracy_sec
 import pages.sections.corr as corr_sec
 import pages.sections.mean_std as mean_std_sec
@@ -7,6 +7,8 @@ import pages.sections.f1 as f1_sec
 import pages.sections.mse as mse_sec
 import pages.sections.r2 as r2_sec
 import pages.sections.mae as mae_sec
+import pages.sections.precision_recall as precision_recall_sec
+import pages.sections.residuals as residuals_sec
 
 
 def analyser_to_section(analyst):
@@ -26,5 +28,9 @@ def analyser_to_section(analyst):
         return r2_sec.R2Section()
     elif isinstance(analyst, mae.MAEAnalyser):
         return mae_sec.MAESection()
+    elif isinstance(analyst, precision_recall.PrecisionRecallAnalyser):
+        return precision_recall_sec.PrecisionRecallSection()
+    elif isinstance(analyst, residuals.ResidualsAnalyser):
+        return residuals_sec.ResidualsSection()
     else:
         raise ValueError('Unknown type found.')
@@ -13,10 +13,13 @@ app.py will grab the current Page from the session state and call this method fo
 
 """
 from mappings import analyser_to_section
+from pages.results import ResultStore
 from pages.sections.metrics import MetricsSection
 from pages.sections.analysis_choice import AnalysisChoiceSection
 from pages.sections.file_uploader import FileSection
 from pages.sections.headers import InitialHeaderSection, AnalysisHeaderSection
+from pages.sections.sampling import SamplingSection
+from pages.sections.validation import ValidationSection
 
 
 class Page:
@@ -58,16 +61,25 @@ class AnalysisResultsPage(Page):
     It consists of a header, an analysis choice section, and the results of the analysis.
     """
 
-    def __init__(self, chosen_analysers):
+    def __init__(self, chosen_analysers, hdlr):
         """
-        Construct the analysis results page.
+        Construct the analysis results page, and start running the chosen analysers concurrently
+        (see pages.execution) so that their results are ready as soon as possible.
+        The results are kept in the page's result store (see pages.results), which the sections read from, so
+        reruns of the page do not run the analysers again.
+        The page shows any warnings raised while validating the data. If the handler only holds a sample of its
+        data, the page also shows a sampling section, which computes the exact results in the background.
 
         :param chosen_analysers: a list of analyser functions from the analysers package, these are the
         analysers the user has chosen.
+        :param hdlr: the handler to run the analysers against.
 
         """
         super(AnalysisResultsPage, self).__init__()
 
+        self.results = ResultStore(hdlr)
+        self.results.fill(chosen_analysers)
+
         # Separate the analysers from metrics and non metrics.
         metrics = []
         non_metrics = []
@@ -77,7 +89,9 @@ class AnalysisResultsPage(Page):
             else:
                 non_metrics.append(analyser)
 
-        self.sections = [AnalysisHeaderSection(), AnalysisChoiceSection()]
+        self.sections = [AnalysisHeaderSection(), AnalysisChoiceSection(), ValidationSection()]
+        if getattr(hdlr, 'sample_size', None) is not None:
+            self.sections.append(SamplingSection(chosen_analysers))
         if len(metrics) > 0:
             self.sections.append(MetricsSection(metrics))
 
@@ -0,0 +1,102 @@
+"""
+This module renders the charts shown on the results page, caching their output.
+
+Matplotlib charts are rendered once to PNG bytes, keyed by the fingerprint of the result they show and the chart's
+spec, and the figure is closed straight away so that figures do not pile up in server memory. Reruns then reuse
+the bytes rather than drawing the figure again.
+
+Charts with too many bars to render quickly (or read) instead show the largest bars, with the rest averaged into
+a single bar, using streamlit's own lightweight chart backend.
+"""
+import io
+import threading
+from collections import OrderedDict
+import pandas as pd
+from matplotlib import pyplot as plt
+from profiling import note_cache_miss, profiled
+
+MAX_BARS = 50  # Bar charts with more bars than this are drawn by the lightweight backend, with the bars reduced.
+CHART_CACHE_SIZE = 64  # The number of rendered charts kept in memory.
+
+_charts = OrderedDict()  # Maps each chart key to its PNG bytes, least recently used first.
+_charts_lock = threading.Lock()
+
+
+def top_bars(values, max_bars=MAX_BARS):
+    """
+    Reduce a series of bar heights to at most max_bars bars: the max_bars - 1 largest in magnitude, plus one bar
+    holding the mean of the rest.
+
+    :param values: the bar heights, as a Pandas series indexed by the bar labels.
+    :param max_bars: the maximum number of bars.
+    :return: a Pandas series of at most max_bars bar heights.
+    """
+
+    # Pre-condition checks.
+    if max_bars < 2:
+        raise ValueError(f'Precondition: max_bars must be at least 2, got {max_bars}')
+
+    if len(values) <= max_bars:
+        return values
+
+    order = values.abs().sort_values(ascending=False).index
+    top = values[order[:max_bars - 1]]
+    rest = values[order[max_bars - 1:]]
+    other = pd.Series([rest.mean()], index=[f'Other ({len(rest)} features, mean)'])
+    return pd.concat([top, other])
+
+
+def render_bar_chart(values, title, ylabel, color):
+    """
+    Draw a bar chart with matplotlib and return it as PNG bytes. The figure is closed before returning.
+
+    :param values: the bar heights, as a Pandas series indexed by the bar labels.
+    :param title: the title of the chart.
+    :param ylabel: the label of the y axis.
+    :param color: the colour of the bars.
+    :return: the PNG image as bytes.
+    """
+
+    fig, ax = plt.subplots(figsize=(8, 3))
+    try:
+        ax.set_title(title)
+        ax.set_ylabel(ylabel)
+        ax.bar([str(label) for label in values.index], values.to_numpy(), color=color)
+
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def cached_bar_chart(fingerprint, values, title, ylabel, color):
+    """
+    Return a bar chart as PNG bytes, rendering it only if the same chart of the same result has not been
+    rendered before.
+
+    :param fingerprint: identifies the result being charted, e.g. the handler's fingerprint.
+    :param values: the bar heights, as a Pandas series indexed by the bar labels.
+    :param title: the title of the chart.
+    :param ylabel: the label of the y axis.
+    :param color: the colour of the bars.
+    :return: the PNG image as bytes.
+    """
+
+    key = (fingerprint, title, ylabel, color)
+    with profiled('chart', 'bar_chart') as state:
+        state['cached'] = True
+        with _charts_lock:
+            if key in _charts:
+                _charts.move_to_end(key)
+                return _charts[key]
+
+        note_cache_miss()
+        png = render_bar_chart(values, title, ylabel, color)
+
+        with _charts_lock:
+            _charts[key] = png
+            while len(_charts) > CHART_CACHE_SIZE:
+                _charts.popitem(last=False)
+
+        return png
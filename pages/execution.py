@@ -0,0 +1,132 @@
+"""
+This module runs the analysers chosen by the user concurrently.
+
+As soon as an AnalysisResultsPage is created, each of its analysers is submitted to a process-wide thread pool.
+The page's sections then render from the futures (through the page's result store, see pages.results) as their
+results become ready, so the page takes as long as its slowest analyser, rather than the sum of all of them. Threads
+are used rather than processes because the handler (and its stored predictions) is shared between the analysers, and
+numpy, pandas and sklearn release the GIL for the heavy lifting.
+
+If the handler's data is a sample (see handlers.sampling), the confidence intervals of the results are computed on
+the pool in the same way.
+
+The analysers' results are cached with st.cache_resource (see analysers.analysis_cache), which only stores results
+computed on a thread with a session's script run context. The context of the session which submits an analyser is
+therefore attached to the pool thread before it runs the analyser, with streamlit's add_script_run_ctx. The pool
+threads never call st.* themselves: the page's sections render every result on the script thread.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from profiling import profiled
+
+MAX_WORKERS = min(8, (os.cpu_count() or 1) + 4)  # The number of analyses that can run at once across all sessions.
+
+POOL = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='analyser')
+
+
+def submit(func, *args):
+    """
+    Submit a function to the shared pool, to be run with the submitting session's script run context.
+
+    :param func: the function to run.
+    :param args: the arguments to call it with.
+    :return: the future of its result.
+    """
+
+    ctx = get_script_run_ctx(suppress_warning=True)
+
+    def run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+
+    return POOL.submit(run)
+
+
+class AnalysisExecutor:
+    """
+    Runs analysers against a handler on the shared thread pool, keeping one future per analyser type.
+    """
+
+    def __init__(self, hdlr):
+        """
+        :param hdlr: the handler the analysers are run against.
+        """
+        self.hdlr = hdlr
+        self.futures = {}  # Maps each analyser type to the future of its result.
+        self.interval_futures = {}  # Maps each analyser type to the future of its confidence interval.
+
+    def submit(self, analyser):
+        """
+        Start running the analyser in the background, unless it has already been started.
+
+        :param analyser: an Analyser.
+        :return: the future of the analyser's result.
+        """
+
+        key = type(analyser)
+        if key not in self.futures:
+            self.futures[key] = submit(self.run, analyser)
+        return self.futures[key]
+
+    def run(self, analyser):
+        """
+        Run the analyser against the handler, recording it with the profiler (see profiling).
+
+        :param analyser: an Analyser.
+        :return: the result of analyser.analyse(hdlr).
+        """
+
+        with profiled('analyser', type(analyser).__name__) as state:
+            state['cached'] = True
+            return analyser.analyse(self.hdlr)
+
+    def submit_interval(self, analyser):
+        """
+        Start computing the confidence interval of the analyser's result in the background, unless it has already
+        been started.
+
+        :param analyser: an Analyser.
+        :return: the future of the interval.
+        """
+
+        key = type(analyser)
+        if key not in self.interval_futures:
+            self.interval_futures[key] = submit(self.run_interval, analyser)
+        return self.interval_futures[key]
+
+    def run_interval(self, analyser):
+        """
+        Compute the confidence interval of the analyser's result, recording it with the profiler.
+
+        :param analyser: an Analyser.
+        :return: the result of analyser.interval(hdlr).
+        """
+
+        with profiled('interval', type(analyser).__name__) as state:
+            state['cached'] = True
+            return analyser.interval(self.hdlr)
+
+    def done(self, analyser):
+        """
+        Returns whether the result of the analyser is ready.
+
+        :param analyser: an Analyser.
+        :return: True if the analyser has been submitted and has finished, false otherwise.
+        """
+
+        key = type(analyser)
+        return key in self.futures and self.futures[key].done()
+
+    def result(self, analyser):
+        """
+        Wait for and return the result of the analyser, submitting it first if need be.
+        Any exception raised by the analyser is re-raised here.
+
+        :param analyser: an Analyser.
+        :return: the result of analyser.analyse(hdlr).
+        """
+
+        return self.submit(analyser).result()
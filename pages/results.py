@@ -0,0 +1,82 @@
+"""
+This module holds the analysis results shown on an AnalysisResultsPage.
+
+Streamlit reruns the whole script on every widget interaction, but the results of the page's analysers only depend
+on the page's handler. The page therefore owns a ResultStore, which is filled once per (handler, analyser) pair by
+running the analysers on the shared pool (see pages.execution). The sections only read results from the store, so
+a rerun which does not change the page's inputs only looks results up, and does no analysis (or hashing) at all.
+
+If the handler only holds a sample of its data file, the store also holds the confidence interval of each result.
+"""
+from pages.execution import AnalysisExecutor
+
+
+class ResultStore:
+    """
+    The results of a handler's analysers, held by the futures of the store's executor (one per analyser type), so a
+    finished future is the stored result.
+    """
+
+    def __init__(self, hdlr):
+        """
+        :param hdlr: the handler the analysers are run against.
+        """
+        self.hdlr = hdlr
+        self.executor = AnalysisExecutor(hdlr)
+
+    def fill(self, analysers):
+        """
+        Start running each analyser in the background, unless it has already been started.
+
+        :param analysers: a list of Analysers.
+        """
+
+        for analyser in analysers:
+            self.executor.submit(analyser)
+            if getattr(self.hdlr, 'sample_size', None) is not None:
+                self.executor.submit_interval(analyser)
+
+    def all_ready(self, analysers):
+        """
+        Returns whether the results of every analyser can be read without waiting.
+
+        :param analysers: a list of Analysers.
+        :return: True if every analyser has been submitted and has finished computing, false otherwise.
+        """
+
+        return all(self.ready(analyser) for analyser in analysers)
+
+    def ready(self, analyser):
+        """
+        Returns whether the analyser's result can be read without waiting.
+
+        :param analyser: an Analyser.
+        :return: True if the analyser has been submitted and has finished computing, false otherwise.
+        """
+
+        return self.executor.done(analyser)
+
+    def get(self, analyser):
+        """
+        Return the analyser's result, waiting for it to finish computing (or computing it) if need be.
+        Any exception raised by the analyser is re-raised here, on every read.
+
+        :param analyser: an Analyser.
+        :return: the result of analyser.analyse(hdlr).
+        """
+
+        return self.executor.result(analyser)
+
+    def interval(self, analyser):
+        """
+        Return the confidence interval of the analyser's result (see Analyser::interval), waiting for it to finish
+        computing (or computing it) the first time it is read.
+
+        :param analyser: an Analyser.
+        :return: the result of analyser.interval(hdlr), or None if the handler's data is not a sample.
+        """
+
+        if getattr(self.hdlr, 'sample_size', None) is None:
+            return None
+
+        return self.executor.submit_interval(analyser).result()
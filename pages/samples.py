@@ -0,0 +1,77 @@
+"""
+This module provides the bundled sample models and datasets, shared by every session.
+
+Each sample's handler is loaded at most once per server process and then handed to every session that picks it,
+so choosing a sample costs no file I/O. prewarm_samples() loads the samples in the background when the server
+starts, and runs every compatible analyser on them so that their results are already in the analysis cache
+(see analysers.analysis_cache) by the time a user asks for them. The shared handlers must not be mutated.
+"""
+import threading
+from warnings import warn
+from handlers.simple import StandardHandler
+from pages.execution import submit
+from pages.sections.analysis_choice import analyser_options
+
+# Maps the name of each sample to its (model file, data file).
+SAMPLES = {
+    'Iris dataset: LogisticRegression': ('testfiles/test_model_iris.sav', 'testfiles/Iris_test.csv'),
+    'Boston dataset: DecisionTreeRegressor': ('testfiles/test_model_boston.sav', 'testfiles/Boston_test.csv'),
+}
+
+_handlers = {}  # Maps the name of each loaded sample to its shared handler.
+_locks = {name: threading.Lock() for name in SAMPLES}  # Ensures each sample is only loaded once.
+_prewarm_lock = threading.Lock()
+_prewarmed = False  # Whether prewarm_samples() has already been called in this process.
+
+
+def sample_handler(name):
+    """
+    Return the shared handler of a sample, loading it first if this is the first time it has been asked for.
+
+    :param name: the name of the sample, a key of SAMPLES.
+    :return: the sample's StandardHandler.
+    """
+
+    # Pre-condition checks.
+    if name not in SAMPLES:
+        raise ValueError(f'Precondition: {name} is not a sample')
+
+    with _locks[name]:
+        if name not in _handlers:
+            model_path, data_path = SAMPLES[name]
+            with open(model_path, 'rb') as model_file, open(data_path) as data_file:
+                _handlers[name] = StandardHandler(data_file=data_file, model_file=model_file, target_idx=-1)
+
+    return _handlers[name]
+
+
+def prewarm_sample(name):
+    """
+    Load a sample's handler and run every analyser compatible with it, so that their results are cached.
+    A sample which fails to load is reported as a warning and left to be loaded (and fail) on demand instead.
+
+    :param name: the name of the sample, a key of SAMPLES.
+    """
+
+    try:
+        hdlr = sample_handler(name)
+        for analyser in analyser_options(hdlr.problem_type).values():
+            analyser.analyse(hdlr)
+    except Exception as e:
+        warn(f'Could not prewarm the sample {name}: {e}')
+
+
+def prewarm_samples():
+    """
+    Start prewarming every sample on the shared thread pool (see pages.execution).
+    Only the first call in a server process does anything, so this can be called on every script run.
+    """
+
+    global _prewarmed
+    with _prewarm_lock:
+        if _prewarmed:
+            return
+        _prewarmed = True
+
+    for name in SAMPLES:
+        submit(prewarm_sample, name)
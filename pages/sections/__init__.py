@@ -3,6 +3,86 @@ This package contains a collection of Section classes.
 Sections are just a section of content that can be displayed on the screen.
 When put together, Sections make up a 'Page' of content.
 """
+import time
+import streamlit as st
+from analysers.intervals import DEFAULT_CONFIDENCE
+
+POLL_INTERVAL = 0.1  # The number of seconds between updates of the data loading progress bar.
+
+
+def wait_for_data(hdlr):
+    """
+    Show a progress bar until the handler's data has finished loading in the background (see
+    handlers.simple.StandardHandler), so that the user can see how far along a large file is.
+
+    :param hdlr: the handler.
+    """
+
+    if not hasattr(hdlr, 'is_loaded') or hdlr.is_loaded():
+        return
+
+    progress_bar = st.progress(0.0, text='Loading dataset...')
+    while not hdlr.is_loaded():
+        progress_bar.progress(min(hdlr.load_progress, 1.0), text='Loading dataset...')
+        time.sleep(POLL_INTERVAL)
+    progress_bar.empty()
+
+
+def analysis_result(analyser):
+    """
+    Return the result of running the analyser on the session's handler.
+    If the current page has a result store (see pages.results), the result is read from it, waiting for the
+    analyser to finish if it is still running in the background, rather than computed again.
+
+    :param analyser: an Analyser.
+    :return: the result of analyser.analyse(hdlr).
+    """
+
+    wait_for_data(st.session_state.hdlr)
+
+    results = getattr(st.session_state.current_page, 'results', None)
+    if results is None:
+        return analyser.analyse(st.session_state.hdlr)
+
+    if results.ready(analyser):
+        return results.get(analyser)
+
+    with st.spinner('Running analysis...'):
+        return results.get(analyser)
+
+
+def analysis_interval(analyser):
+    """
+    Return the confidence interval of the analyser's result on the session's handler (see Analyser::interval), read
+    from the current page's result store.
+
+    :param analyser: an Analyser.
+    :return: the interval, or None if the handler's data is not a sample or the page has no result store.
+    """
+
+    results = getattr(st.session_state.current_page, 'results', None)
+    if results is None:
+        return None
+    return results.interval(analyser)
+
+
+def interval_caption(interval, digits=3, scale=1, unit=''):
+    """
+    Format a (low, high) confidence interval to be shown beneath its metric.
+
+    :param interval: a tuple (low, high), or None.
+    :param digits: the number of decimal places shown.
+    :param scale: multiplies the bounds, e.g. 100 for a percentage.
+    :param unit: appended to each bound, e.g. '%'.
+    :return: a string such as '95% CI: 0.912 to 0.953', or None if there is no interval.
+    """
+
+    if interval is None:
+        return None
+
+    low, high = interval
+    return (f'{round(DEFAULT_CONFIDENCE * 100)}% CI: {round(low * scale, digits)}{unit} to '
+            f'{round(high * scale, digits)}{unit}')
 
 
 class Section:
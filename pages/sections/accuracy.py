@@ -1,4 +1,4 @@
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 from analysers import accuracy
 import streamlit as st
 
@@ -9,19 +9,23 @@ class AccuracySection(Section):
     """
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         st.header('Accuracy')
 
-        acc = accuracy.AccuracyAnalyser().analyse(hdlr)
+        acc = analysis_result(accuracy.AccuracyAnalyser())
         acc = round(acc, 3) * 100  # Round to 3dp and convert to percentage.
 
         st.metric('Accuracy', f'{acc}%')
+        self.show_interval(st)
 
     def fill(self, container):
-        hdlr = st.session_state.hdlr
-
-        acc = accuracy.AccuracyAnalyser().analyse(hdlr)
+        acc = analysis_result(accuracy.AccuracyAnalyser())
         acc = round(acc, 3) * 100  # Round to 3dp and convert to percentage.
 
         container.metric('Accuracy', f'{acc}%')
+        self.show_interval(container)
+
+    def show_interval(self, container):
+        """Show the confidence interval of the accuracy beneath it, if the data is a sample."""
+        caption = interval_caption(analysis_interval(accuracy.AccuracyAnalyser()), digits=1, scale=100, unit='%')
+        if caption is not None:
+            container.caption(caption)
@@ -1,6 +1,6 @@
 import streamlit as st
 import pages as pages
-from analysers import accuracy, corr, f1, mean_std, mse, r2, shape, mae
+from analysers import accuracy, corr, f1, mean_std, mse, r2, shape, mae, precision_recall, residuals
 from pages.sections import Section
 
 
@@ -14,7 +14,7 @@ def transition(options):
     for name in st.session_state.analyser_selection:
         chosen_analysers.append(options[name])
 
-    st.session_state.current_page = pages.AnalysisResultsPage(chosen_analysers)
+    st.session_state.current_page = pages.AnalysisResultsPage(chosen_analysers, st.session_state.hdlr)
 
 
 def return_action():
@@ -31,6 +31,30 @@ def return_action():
         st.session_state.hdlr = None
 
 
+def analyser_options(problem_type):
+    """
+    Return the analysers which can be run on a model of the given problem type, by their display names.
+
+    :param problem_type: 'classification' or 'regression'.
+    :return: a dictionary which maps the selection box names to the analyser objects.
+    """
+
+    options_keys = ['Model Accuracy', 'Correlations', 'Mean and standard deviations.', 'Shape (samples per feature)',
+                    'F1 scores', 'Mean Squared Error (MSE)', 'R2 score', 'Mean Absolute Error (MAE)',
+                    'Precision and recall', 'Residuals']
+    options_values = [accuracy.AccuracyAnalyser(), corr.CorrAnalyser(), mean_std.MeanStdAnalyser(),
+                      shape.ShapeAnalyser(), f1.F1Analyser(), mse.MSEAnalyser(), r2.R2Analyser(), mae.MAEAnalyser(),
+                      precision_recall.PrecisionRecallAnalyser(), residuals.ResidualsAnalyser()]
+
+    # Remove any analysis options which aren't compatible with the model.
+    options_dict = {}
+    for key, value in zip(options_keys, options_values):
+        if value.model_type() == problem_type or value.model_type() == 'agnostic':
+            options_dict[key] = value
+
+    return options_dict
+
+
 class AnalysisChoiceSection(Section):
     """
     This section displays 3 elements.
@@ -41,29 +65,7 @@ class AnalysisChoiceSection(Section):
 
     def __init__(self):
         super().__init__()
-        # Create a dictionary which maps analyser names to their respective functions.
-        options_keys = ['Model Accuracy', 'Correlations', 'Mean and standard deviations.', 'Shape (samples per feature)',
-                        'F1 scores', 'Mean Squared Error (MSE)', 'R2 score', 'Mean Absolute Error (MAE)']
-        options_values = [accuracy.AccuracyAnalyser(), corr.CorrAnalyser(), mean_std.MeanStdAnalyser(),
-                          shape.ShapeAnalyser(), f1.F1Analyser(), mse.MSEAnalyser(), r2.R2Analyser(), mae.MAEAnalyser()]
-
-        # Remove any analysis options which aren't compatible with the current model.
-        # First, add all the values and keys to remove into the following lists.
-        remove_values = []
-        remove_keys = []
-        for i in range(len(options_values)):
-            if (options_values[i].model_type() != st.session_state.hdlr.problem_type) and (options_values[i].model_type() != 'agnostic'):
-                remove_values.append(options_values[i])
-                remove_keys.append(options_keys[i])
-
-        # Now, remove the values and keys from the respective list.
-        for i in range(len(remove_values)):
-            options_values.remove(remove_values[i])
-            options_keys.remove(remove_keys[i])
-
-        self.options_dict = {}
-        for idx, key in enumerate(options_keys):
-            self.options_dict[key] = options_values[idx]
+        self.options_dict = analyser_options(st.session_state.hdlr.problem_type)
 
     def display(self):
         """
@@ -1,24 +1,40 @@
 import streamlit as st
 
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 from analysers import corr
 
+WINDOW_SIZE = 50  # The number of features along each side of the displayed window of the correlation table.
+
 
 class CorrSection(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
-        tbl, strong_corrs = corr.CorrAnalyser().analyse(hdlr)
+        corr_matrix, strong_corrs = analysis_result(corr.CorrAnalyser())
 
         st.header('Correlations')
 
         corr_list = st.expander('Open to see the list of strong correlations.')
-        corr_list.subheader('Strong correlations (>0.7):')
+        corr_list.subheader(f'Strong correlations (|r| >= {corr.STRONG_CORRELATION}):')
 
-        for i, key in enumerate(strong_corrs.keys()):
-            rounded_corr = round(strong_corrs[key], 3)
-            corr_list.metric(label=key, value=rounded_corr)
+        intervals = analysis_interval(corr.CorrAnalyser())  # The bounds of each strong correlation, if a sample.
+        for i, (first, second, r) in enumerate(strong_corrs.itertuples(index=False)):
+            corr_list.metric(label=f'{first} & {second}', value=round(r, 3))
+            if intervals is not None:
+                corr_list.caption(interval_caption((intervals['low'].iloc[i], intervals['high'].iloc[i])))
 
         st.subheader('Correlation table')
-        st.dataframe(tbl)
+
+        # Only a window of the table is sent to the browser, as the full table can be too large to display.
+        n_features = corr_matrix.shape[0]
+        row_start = 0
+        col_start = 0
+        if n_features > WINDOW_SIZE:
+            st.caption(f'Showing a {WINDOW_SIZE} x {WINDOW_SIZE} window of the {n_features} x {n_features} table.')
+            cols = st.columns(2)
+            row_start = cols[0].number_input('First row feature', min_value=0, max_value=n_features - 1,
+                                             value=0, step=WINDOW_SIZE, key='corr_row_start')
+            col_start = cols[1].number_input('First column feature', min_value=0, max_value=n_features - 1,
+                                             value=0, step=WINDOW_SIZE, key='corr_col_start')
+
+        if n_features > 0:
+            st.dataframe(corr_matrix.window(int(row_start), int(col_start), WINDOW_SIZE))
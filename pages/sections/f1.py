@@ -1,18 +1,26 @@
 from analysers import f1
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 import streamlit as st
 
+MAX_TILES = 30  # Models with more classes than this have their F1 scores shown as a table, not a metric each.
+
 
 class F1Section(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         # NOTE: this method will only be called if the model is not a binary classifier.
         # If the model IS a binary classifier, then refer to pages.sections.metrics module for the implementation.
 
-        f1_tbl = f1.F1Analyser().analyse(hdlr)
+        f1_tbl = analysis_result(f1.F1Analyser())
         classes = f1_tbl.columns
+        intervals = analysis_interval(f1.F1Analyser())  # A table of the bounds of each class, if the data is a sample.
+
+        if len(classes) > MAX_TILES:
+            st.metric('F1 (macro average)', round(f1_tbl.iloc[0].mean(), 3))
+            st.caption(f'F1 score of each of the {len(classes)} classes.')
+            scores = f1_tbl.T.set_axis(['F1'], axis=1)
+            st.dataframe(scores if intervals is None else scores.join(intervals.T))
+            return
 
         # Now, we loop through and display the f1 score for each class.
         # We display them side-by-side in rows of 3.
@@ -23,6 +31,9 @@ class F1Section(Section):
             name = f'F1: {classes[i]}'
 
             cols[col_idx].metric(name, score)
+            if intervals is not None and classes[i] in intervals.columns:
+                bounds = intervals[classes[i]]
+                cols[col_idx].caption(interval_caption((bounds['low'], bounds['high'])))
 
             col_idx += 1
 
@@ -1,6 +1,12 @@
+import os
 import streamlit as st
-from handlers.simple import StandardHandler
+from handlers.simple import StandardHandler, DATA_EXTENSIONS, MODEL_EXTENSIONS, supported_file_extensions
+from handlers.chunked import DEFAULT_CHUNKSIZE, memory_limit_from_env
+from handlers.layout import spill_dir_from_env
+from handlers.parallel import jobs_from_env
+from handlers.sampling import sample_size_from_env
 import pages as pages
+from pages.samples import SAMPLES, sample_handler
 from pages.sections import Section
 
 
@@ -13,9 +19,10 @@ def transition():
         return
 
     for f in st.session_state.uploaded_files:
-        if f.name.endswith('.sav'):
+        extension = os.path.splitext(f.name)[1].lower()
+        if extension in MODEL_EXTENSIONS:
             model_file = f
-        elif f.name.endswith('.csv'):
+        elif extension in DATA_EXTENSIONS:
             data_file = f
         else:
             st.error(f'File extension not recognised. File name was {f.name}')
@@ -25,7 +32,14 @@ def transition():
     elif data_file is None:
         st.warning('Dataset file not found, please upload a dataset file to continue.')
     else:
-        hdlr = StandardHandler(data_file=data_file, model_file=model_file, target_idx=-1)
+        # Parse the upload in the background, in chunks so that large files stay within the memory limit.
+        # The analysis choice page only needs the model, so it is shown while the data is still loading.
+        # In approximate mode, only a random sample of the rows is kept (see handlers.sampling).
+        sample_size = sample_size_from_env() if st.session_state.get('approximate') else None
+        hdlr = StandardHandler(data_file=data_file, model_file=model_file, target_idx=-1,
+                               chunksize=DEFAULT_CHUNKSIZE, memory_limit=memory_limit_from_env(),
+                               n_jobs=jobs_from_env(), spill_dir=spill_dir_from_env(), lazy=True,
+                               sample_size=sample_size)
 
         # Store the handler in session.
         st.session_state.hdlr = hdlr
@@ -39,18 +53,12 @@ def transition():
 
 def submit():
     selected = st.session_state.file_selector
-    if selected == 'Iris dataset: LogisticRegression':
-        model_file = open('testfiles/test_model_iris.sav', 'rb')
-        data_file = open('testfiles/Iris_test.csv')
-    elif selected == 'Boston dataset: DecisionTreeRegressor':
-        model_file = open('testfiles/test_model_boston.sav', 'rb')
-        data_file = open('testfiles/Boston_test.csv')
-    else:
+    if selected not in SAMPLES:
         st.warning('Error: default model not found.')
         return
 
-    # Store the handler in session.
-    st.session_state.hdlr = StandardHandler(data_file=data_file, model_file=model_file, target_idx=-1)
+    # Store the sample's handler in session. It is shared with every other session that picked the same sample.
+    st.session_state.hdlr = sample_handler(selected)
 
     # Clear the uploaded files.
     st.session_state.uploaded_files.clear()
@@ -66,14 +74,14 @@ class FileSection(Section):
 
     def display(self):
         comma = ', '
-        allowed_files = ['.csv', '.sav']
+        allowed_files = supported_file_extensions()
+        st.checkbox(f'Approximate mode: analyse a random sample of {sample_size_from_env():,} rows of large '
+                    f'datasets first', key='approximate')
         st.file_uploader(f'Allowed files are: {comma.join(allowed_files)}', type=allowed_files,
                          accept_multiple_files=True,
                          on_change=transition, key='uploaded_files')
         st.subheader('Or choose a sample model')
         form = st.form("file_select_form")
-        form.selectbox('Choose sample model.',
-                       ['Iris dataset: LogisticRegression', 'Boston dataset: DecisionTreeRegressor'],
-                       key='file_selector')
+        form.selectbox('Choose sample model.', list(SAMPLES), key='file_selector')
 
         form.form_submit_button(on_click=submit)
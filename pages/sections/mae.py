@@ -1,24 +1,28 @@
 import streamlit as st
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 from analysers import mae
 
 
 class MAESection(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         st.header('MAE score')
 
-        score = mae.MAEAnalyser().analyse(hdlr)
+        score = analysis_result(mae.MAEAnalyser())
         score = round(score, 3)  # Round to 3dp
 
         st.metric('MAE', score)
+        self.show_interval(st)
 
     def fill(self, container):
-        hdlr = st.session_state.hdlr
-
-        score = mae.MAEAnalyser().analyse(hdlr)
+        score = analysis_result(mae.MAEAnalyser())
         score = round(score, 3)  # Round to 3dp
 
         container.metric('MAE', score)
+        self.show_interval(container)
+
+    def show_interval(self, container):
+        """Show the confidence interval of the MAE beneath it, if the data is a sample."""
+        caption = interval_caption(analysis_interval(mae.MAEAnalyser()))
+        if caption is not None:
+            container.caption(caption)
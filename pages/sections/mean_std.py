@@ -1,37 +1,35 @@
-from matplotlib import pyplot as plt
-
-from pages.sections import Section
+from pages.charts import MAX_BARS, cached_bar_chart, top_bars
+from pages.sections import Section, analysis_interval, analysis_result
 from analysers import mean_std
 
 import streamlit as st
 
+# The (row of the table, title, y axis label, colour) of each chart.
+CHARTS = [('Mean', 'Mean averages of each feature.', 'Mean', '#ff0000'),
+          ('Std', 'Standard deviations of each feature.', 'Standard deviation', '#008000')]
+
 
 class MeanStdSection(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         st.header('Mean and Standard deviations')
 
-        tbl = mean_std.MeanStdAnalyser().analyse(hdlr)
+        tbl = analysis_result(mean_std.MeanStdAnalyser())
         st.dataframe(tbl)  # Display the table as a dataframe element.
 
-        # Plot the means of each feature as a bar chart.
-        fig, ax = plt.subplots(figsize=(8, 3))
-        feature_names = tbl.columns
-        means = tbl.iloc[0, ::]
-        ax.set_title('Mean averages of each feature.')
-        ax.set_ylabel('Mean')
-        ax.bar(feature_names, means, color='red')
-
-        st.pyplot(fig)
-
-        # Plot the standard deviations of each feature as a bar chart.
-        fig, ax = plt.subplots(figsize=(8, 3))
-        feature_names = tbl.columns
-        stdevs = tbl.iloc[1, ::]
-        ax.set_title('Standard deviations of each feature.')
-        ax.set_ylabel('Standard deviation')
-        ax.bar(feature_names, stdevs, color='green')
-
-        st.pyplot(fig)
+        intervals = analysis_interval(mean_std.MeanStdAnalyser())
+        if intervals is not None:
+            st.caption('Confidence intervals of the mean and standard deviation of each feature, estimated from '
+                       'a sample of the data.')
+            st.dataframe(intervals)
+
+        # Plot the means and standard deviations of each feature as bar charts.
+        for row, title, ylabel, color in CHARTS:
+            values = tbl.loc[row]
+            if len(values) > MAX_BARS:
+                # Too many features to draw (or read) one bar each, so only the largest are drawn.
+                st.caption(f'{title} Showing the {MAX_BARS - 1} largest of {len(values)} features, '
+                           f'with the rest averaged into one bar.')
+                st.bar_chart(top_bars(values), color=color)
+            else:
+                st.image(cached_bar_chart(st.session_state.hdlr.fingerprint, values, title, ylabel, color))
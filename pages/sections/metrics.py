@@ -1,6 +1,6 @@
 import streamlit as st
 
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 from mappings import analyser_to_section
 from pages.sections.f1 import F1Section
 from analysers.f1 import F1Analyser
@@ -74,8 +74,11 @@ class MetricsSection(Section):
                 # There are 0 spaces left, so we must display them on new rows.
                 self.f1_sec.display()
                 return
-            f1_score = round(F1Analyser().analyse(st.session_state.hdlr), 3)
+            f1_score = round(analysis_result(F1Analyser()), 3)
             cols[next_space].metric('F1 score', f1_score)
+            caption = interval_caption(analysis_interval(F1Analyser()))
+            if caption is not None:
+                cols[next_space].caption(caption)
             return
 
         # There are multiple classes, so the F1 scores need to be displayed on new rows.
@@ -1,23 +1,28 @@
 import streamlit as st
+from pages.sections import analysis_interval, analysis_result, interval_caption
 from analysers.mse import MSEAnalyser
 
 
 class MSESection:
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         st.header('MSE')
 
-        score = MSEAnalyser().analyse(hdlr)
+        score = analysis_result(MSEAnalyser())
         score = round(score, 3)  # Round to 3dp.
 
         st.metric('Mean Squared Error (MSE)', score)
+        self.show_interval(st)
 
     def fill(self, container):
-        hdlr = st.session_state.hdlr
-
-        score = MSEAnalyser().analyse(hdlr)
+        score = analysis_result(MSEAnalyser())
         score = round(score, 3)  # Round to 3dp.
 
         container.metric('Mean Squared Error (MSE)', score)
+        self.show_interval(container)
+
+    def show_interval(self, container):
+        """Show the confidence interval of the MSE beneath it, if the data is a sample."""
+        caption = interval_caption(analysis_interval(MSEAnalyser()))
+        if caption is not None:
+            container.caption(caption)
@@ -0,0 +1,22 @@
+import streamlit as st
+from pages.sections import Section, analysis_result
+from analysers import precision_recall
+
+
+class PrecisionRecallSection(Section):
+
+    def display(self):
+        st.header('Precision and recall')
+
+        tbl = analysis_result(precision_recall.PrecisionRecallAnalyser())
+        per_class = tbl.iloc[:-2]
+        macro = tbl.loc['Macro average']
+
+        # Show the averages as metrics, as there can be too many classes to show each as a metric.
+        cols = st.columns(3)
+        cols[0].metric('Macro precision', round(macro['Precision'], 3))
+        cols[1].metric('Macro recall', round(macro['Recall'], 3))
+        cols[2].metric('Macro F1', round(macro['F1'], 3))
+
+        st.caption(f'Scores of each of the {len(per_class)} classes, and their averages.')
+        st.dataframe(tbl)
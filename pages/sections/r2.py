@@ -1,24 +1,28 @@
 import streamlit as st
-from pages.sections import Section
+from pages.sections import Section, analysis_interval, analysis_result, interval_caption
 from analysers import r2
 
 
 class R2Section(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         st.header('R2 score')
 
-        score = r2.R2Analyser().analyse(hdlr)
+        score = analysis_result(r2.R2Analyser())
         score = round(score, 3)  # Round to 3dp
 
         st.metric('R2', score)
+        self.show_interval(st)
 
     def fill(self, container):
-        hdlr = st.session_state.hdlr
-
-        score = r2.R2Analyser().analyse(hdlr)
+        score = analysis_result(r2.R2Analyser())
         score = round(score, 3)  # Round to 3dp
 
         container.metric('R2', score)
+        self.show_interval(container)
+
+    def show_interval(self, container):
+        """Show the confidence interval of the R2 beneath it, if the data is a sample."""
+        caption = interval_caption(analysis_interval(r2.R2Analyser()))
+        if caption is not None:
+            container.caption(caption)
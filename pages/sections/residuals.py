@@ -0,0 +1,19 @@
+import streamlit as st
+from pages.sections import Section, analysis_result
+from analysers import residuals
+
+
+class ResidualsSection(Section):
+
+    def display(self):
+        st.header('Residuals')
+
+        tbl = analysis_result(residuals.ResidualsAnalyser())
+
+        cols = st.columns(3)
+        cols[0].metric('Root Mean Squared Error (RMSE)', round(tbl['RMSE'], 3))
+        cols[1].metric('Max error', round(tbl['Max error'], 3))
+        cols[2].metric('Median residual', round(tbl['Residual quantile 0.5'], 3))
+
+        st.caption('Every regression metric, and the quantiles of the residuals (actual - predicted).')
+        st.dataframe(tbl)
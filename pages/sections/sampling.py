@@ -0,0 +1,46 @@
+import streamlit as st
+from analysers.intervals import DEFAULT_CONFIDENCE
+from pages.results import ResultStore
+from pages.sections import Section, wait_for_data
+
+
+class SamplingSection(Section):
+    """
+    Tells the user that the results are estimated from a sample of the data (see handlers.sampling), and computes
+    the exact results over the whole data file in the background. Once they are ready, the user can switch the page
+    over to them.
+    """
+
+    def __init__(self, chosen_analysers):
+        super().__init__()
+        self.chosen_analysers = chosen_analysers
+        self.exact_results = None  # The result store of the handler for the whole data file.
+
+    def display(self):
+        hdlr = st.session_state.hdlr
+        wait_for_data(hdlr)
+        if not hdlr.sampled:
+            return  # The data file had no more rows than the sample, so the results are already exact.
+
+        st.info(f'Approximate mode: these results are estimated from a random sample of {len(hdlr.y):,} of the '
+                f'{hdlr.population_size:,} rows, with {round(DEFAULT_CONFIDENCE * 100)}% confidence intervals.')
+
+        if self.exact_results is None:
+            self.exact_results = ResultStore(hdlr.exact())
+            self.exact_results.fill(self.chosen_analysers)
+
+        if self.exact_results.all_ready(self.chosen_analysers):
+            st.button('Show exact results', on_click=self.show_exact, key='show_exact_results')
+        else:
+            st.caption('The exact results are being computed in the background.')
+            st.button('Check again', key='check_exact_results')
+
+    def show_exact(self):
+        """
+        Switch the page over to the exact results, and the session over to the handler of the whole data file.
+        """
+
+        page = st.session_state.current_page
+        page.results = self.exact_results
+        st.session_state.hdlr = self.exact_results.hdlr
+        page.sections.remove(self)
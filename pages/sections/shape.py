@@ -1,4 +1,6 @@
-from pages.sections import Section
+import math
+from pandas.api.types import is_numeric_dtype
+from pages.sections import Section, analysis_result
 from analysers import shape, show_data
 import streamlit as st
 
@@ -6,10 +8,8 @@ import streamlit as st
 class ShapeSection(Section):
 
     def display(self):
-        hdlr = st.session_state.hdlr
-
         # Unpack the output from the analyser.
-        packed = shape.ShapeAnalyser().analyse(hdlr)
+        packed = analysis_result(shape.ShapeAnalyser())
         nrows = packed[0]
         ncols = packed[1]
         samples_per_feature = packed[2]
@@ -31,6 +31,58 @@ class ShapeSection(Section):
             cols[1].metric('Number of features', ncols)
             cols[2].metric('Samples per feature', samples_per_feature)
 
-        # Show the data as a table underneath.
-        tbl = show_data.ShowDataAnalyser().analyse(hdlr)
-        st.dataframe(tbl)
+        # Report the memory saved by loading the data with compact dtypes (see handlers.dtypes).
+        memory_saved = getattr(st.session_state.hdlr, 'memory_saved', 0)
+        if memory_saved >= 1024 * 1024:
+            st.caption(f'Loading the data with compact dtypes saved {memory_saved / (1024 * 1024):,.1f} MB of memory.')
+        elif memory_saved > 0:
+            st.caption(f'Loading the data with compact dtypes saved {memory_saved / 1024:,.1f} KB of memory.')
+
+        # Show the profile of each column, as computed when the data was validated (see handlers.validation).
+        profile = getattr(st.session_state.hdlr, 'profile', None)
+        if profile is not None:
+            with st.expander('Column profile'):
+                st.dataframe(profile.table)
+
+        # Show the data as a table underneath, one page at a time.
+        tbl = analysis_result(show_data.ShowDataAnalyser())
+        self.display_data(tbl)
+
+    def display_data(self, tbl):
+        """
+        Display one page of the data, with controls to sort, filter and page through it.
+        The sorting and filtering is done server side (see analysers.show_data), so only the visible page of rows is
+        sent to the browser.
+
+        :param tbl: the data, as a Pandas dataframe.
+        """
+
+        hdlr = st.session_state.hdlr
+        columns = list(tbl.columns)
+
+        cols = st.columns(3)
+        sort_by = cols[0].selectbox('Sort by', [None] + columns, key='data_view_sort_by')
+        ascending = cols[0].checkbox('Ascending', value=True, key='data_view_ascending')
+        filter_by = cols[1].selectbox('Filter on', [None] + columns, key='data_view_filter_by')
+
+        low = high = contains = None
+        if filter_by is not None:
+            if is_numeric_dtype(tbl[filter_by]):
+                low = cols[1].number_input('Minimum', value=None, key='data_view_low')
+                high = cols[1].number_input('Maximum', value=None, key='data_view_high')
+            else:
+                contains = cols[1].text_input('Contains', key='data_view_contains') or None
+
+        positions = show_data.view_positions(hdlr, sort_by, ascending, filter_by, low, high, contains)
+        n_rows = len(positions)
+        n_pages = max(1, math.ceil(n_rows / show_data.PAGE_SIZE))
+        page_number = cols[2].number_input('Page', min_value=1, max_value=n_pages, value=1,
+                                           key='data_view_page') - 1
+        page_number = min(page_number, n_pages - 1)  # The filter may have removed the page being viewed.
+
+        start = page_number * show_data.PAGE_SIZE
+        caption = f'Rows {min(start + 1, n_rows)} to {min(start + show_data.PAGE_SIZE, n_rows)} of {n_rows}'
+        if n_rows != len(tbl):
+            caption += f' (filtered from {len(tbl)})'
+        st.caption(caption)
+        st.dataframe(show_data.page(tbl, positions, page_number))
@@ -0,0 +1,20 @@
+import streamlit as st
+from pages.sections import Section, wait_for_data
+
+
+class ValidationSection(Section):
+    """
+    Shows the warnings raised while validating the data (see handlers.validation), such as the missing values that
+    were dropped, so that the user knows the results were computed from corrected data.
+    """
+
+    def display(self):
+        hdlr = st.session_state.hdlr
+        wait_for_data(hdlr)
+
+        profile = getattr(hdlr, 'profile', None)
+        if profile is None:
+            return
+
+        for msg in profile.warnings():
+            st.warning(msg)
@@ -0,0 +1,274 @@
+"""
+This module instruments the app, so that a slow results page can be traced to its cause.
+
+Timed blocks (see profiled()) wrap loading the data and model, model inference, every analyse() call, every
+Section.display() call and chart rendering. Each records its wall time, the CPU time of its thread, and, if
+PROFILE_MEMORY is set, the peak memory allocated while it ran (from tracemalloc, which slows everything down and
+counts allocations from every thread, so it is off by default). tracemalloc has a single, process-wide peak, so only
+the outermost block (one started while no other block was tracing) records a peak: blocks nested in it, or running
+alongside it on other threads, record none rather than a peak corrupted by each other's resets. Cache lookups record whether they hit or missed.
+
+The measurements are kept in a process-wide Profiler, and can be:
+ - shown in a debug sidebar, if PROFILING_PANEL is set (see app.py),
+ - written as JSON lines to the file named by PROFILE_LOG,
+ - scraped in the Prometheus text format from http://<METRICS_HOST>:<METRICS_PORT>/metrics, if METRICS_PORT is set.
+   The endpoint only listens on the loopback interface unless METRICS_HOST is set (e.g. to 0.0.0.0).
+"""
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_RECORDS = 1000  # The number of most recent measurements kept for the debug sidebar.
+DEFAULT_METRICS_HOST = '127.0.0.1'  # The address the metrics endpoint listens on if METRICS_HOST is not set.
+
+logger = logging.getLogger('profiling')
+
+
+class Profiler:
+    """
+    A thread-safe store of timing measurements and cache hit/miss counts.
+    """
+
+    def __init__(self, trace_memory=False):
+        """
+        :param trace_memory: whether to record the peak memory allocated by each timed block.
+        """
+        self.trace_memory = trace_memory
+        self.records = deque(maxlen=MAX_RECORDS)  # The most recent measurements, as dictionaries.
+        self.totals = {}  # Maps (kind, name) to [calls, wall seconds, cpu seconds, max peak bytes or None].
+        self.cache_counts = {}  # Maps each cache's name to [hits, misses].
+        self._lock = threading.Lock()
+        self._tracing = 0  # The number of timed blocks currently tracing memory.
+
+    def record(self, kind, name, wall, cpu, peak=None, cache_hit=None):
+        """
+        Record one measurement, and log it as a JSON line.
+
+        :param kind: what was measured, e.g. 'analyser', 'section' or 'handler'.
+        :param name: the name of what was measured, e.g. 'AccuracyAnalyser'.
+        :param wall: the wall time in seconds.
+        :param cpu: the CPU time of the measured thread in seconds.
+        :param peak: the peak memory allocated in bytes, or None if the block did not measure it (see start_trace).
+        :param cache_hit: whether the result came from a cache, or None if no cache was involved.
+        """
+
+        entry = {'time': time.time(), 'kind': kind, 'name': name, 'wall': wall, 'cpu': cpu, 'peak_bytes': peak,
+                 'cache_hit': cache_hit}
+        with self._lock:
+            self.records.append(entry)
+            totals = self.totals.setdefault((kind, name), [0, 0.0, 0.0, None])
+            totals[0] += 1
+            totals[1] += wall
+            totals[2] += cpu
+            if peak is not None:
+                totals[3] = peak if totals[3] is None else max(totals[3], peak)
+        if cache_hit is not None:
+            self.count_cache(f'{kind}:{name}', cache_hit)
+
+        logger.info(json.dumps(entry))
+
+    def count_cache(self, cache, hit):
+        """
+        Count a cache lookup.
+
+        :param cache: the name of the cache.
+        :param hit: True if the lookup hit, false if it missed.
+        """
+
+        with self._lock:
+            counts = self.cache_counts.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def start_trace(self):
+        """
+        Start tracing memory for a timed block. Only a block started while no other block is tracing measures the
+        peak, as tracemalloc's peak is process-wide; it starts tracemalloc afresh, so its peak starts from 0.
+
+        :return: None if memory is not traced, otherwise whether this block measures the peak.
+        """
+
+        if not self.trace_memory:
+            return None
+        with self._lock:
+            outermost = self._tracing == 0
+            if outermost:
+                tracemalloc.start()
+            self._tracing += 1
+        return outermost
+
+    def stop_trace(self, outermost):
+        """
+        Stop tracing memory for a timed block.
+
+        :param outermost: what start_trace() returned for the block.
+        :return: the peak allocated since the block's start_trace(), or None if the block did not measure it.
+        """
+
+        with self._lock:
+            peak = tracemalloc.get_traced_memory()[1] if outermost else None
+            self._tracing -= 1
+            if self._tracing == 0:
+                tracemalloc.stop()
+        return peak
+
+    def summary(self):
+        """
+        Summarise the measurements per (kind, name).
+
+        :return: a list of dictionaries with kind, name, calls, mean wall, total wall, total cpu and max peak (None if
+        no call measured its peak).
+        """
+
+        with self._lock:
+            items = list(self.totals.items())
+        return [{'kind': kind, 'name': name, 'calls': calls, 'mean_wall': wall / calls, 'total_wall': wall,
+                 'total_cpu': cpu, 'max_peak_bytes': peak}
+                for (kind, name), (calls, wall, cpu, peak) in sorted(items)]
+
+    def cache_summary(self):
+        """
+        Summarise the cache lookups.
+
+        :return: a list of dictionaries with the cache name, hits, misses and hit rate.
+        """
+
+        with self._lock:
+            items = list(self.cache_counts.items())
+        return [{'cache': cache, 'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+                for cache, (hits, misses) in sorted(items)]
+
+    def prometheus(self):
+        """
+        Render the totals in the Prometheus text exposition format.
+
+        :return: a string.
+        """
+
+        lines = ['# TYPE app_calls_total counter', '# TYPE app_wall_seconds_total counter',
+                 '# TYPE app_cpu_seconds_total counter', '# TYPE app_peak_bytes gauge',
+                 '# TYPE app_cache_hits_total counter', '# TYPE app_cache_misses_total counter']
+        for row in self.summary():
+            labels = f'kind="{row["kind"]}",name="{row["name"]}"'
+            lines.append(f'app_calls_total{{{labels}}} {row["calls"]}')
+            lines.append(f'app_wall_seconds_total{{{labels}}} {row["total_wall"]}')
+            lines.append(f'app_cpu_seconds_total{{{labels}}} {row["total_cpu"]}')
+            if row['max_peak_bytes'] is not None:
+                lines.append(f'app_peak_bytes{{{labels}}} {row["max_peak_bytes"]}')
+        for row in self.cache_summary():
+            lines.append(f'app_cache_hits_total{{cache="{row["cache"]}"}} {row["hits"]}')
+            lines.append(f'app_cache_misses_total{{cache="{row["cache"]}"}} {row["misses"]}')
+        return '\n'.join(lines) + '\n'
+
+
+PROFILER = Profiler(trace_memory=bool(os.environ.get('PROFILE_MEMORY')))  # The process-wide profiler.
+
+_local = threading.local()  # Holds the cache misses noticed by the current thread's innermost timed block.
+
+
+@contextmanager
+def profiled(kind, name):
+    """
+    Time the enclosed block and record it with the process-wide profiler.
+    If a cached function is called within the block (see note_cache_miss()), the block is recorded as a cache
+    miss; if the block is marked as cached but nothing was computed, it is recorded as a hit.
+
+    :param kind: what is being measured, e.g. 'analyser'.
+    :param name: the name of what is being measured.
+    """
+
+    outer_misses = getattr(_local, 'misses', None)
+    _local.misses = 0
+    outermost = PROFILER.start_trace()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    state = {'cached': False}
+    try:
+        yield state
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        peak = PROFILER.stop_trace(outermost) if outermost is not None else None
+        cache_hit = (_local.misses == 0) if state['cached'] else None
+        _local.misses = outer_misses
+        PROFILER.record(kind, name, wall, cpu, peak, cache_hit)
+
+
+def note_cache_miss():
+    """
+    Note that a cached function had to compute its result, for the enclosing profiled() block of this thread.
+    """
+
+    if getattr(_local, 'misses', None) is not None:
+        _local.misses += 1
+
+
+def configure_log(path=None):
+    """
+    Write the measurements as JSON lines to a file, if a path is given or PROFILE_LOG is set.
+    Only the first call with a path has any effect.
+
+    :param path: the file to append to, or None to use PROFILE_LOG.
+    """
+
+    path = path or os.environ.get('PROFILE_LOG')
+    if path is None or any(isinstance(h, logging.FileHandler) for h in logger.handlers):
+        return
+
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the profiler's totals at /metrics."""
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = PROFILER.prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are frequent, so they are not logged.
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host=None):
+    """
+    Serve the metrics endpoint on a background thread, if a port is given or METRICS_PORT is set.
+    Only the first call in a process starts a server, so this can be called on every script run.
+
+    :param port: the port to listen on, or None to use METRICS_PORT.
+    :param host: the address to listen on, or None to use METRICS_HOST (by default, only the loopback interface).
+    :return: the server, or None if no port is configured.
+    """
+
+    global _server
+    if port is None:
+        port = os.environ.get('METRICS_PORT')
+    if port is None or port == '':
+        return None
+    if host is None:
+        host = os.environ.get('METRICS_HOST') or DEFAULT_METRICS_HOST
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), MetricsRequestHandler)
+            threading.Thread(target=_server.serve_forever, name='metrics', daemon=True).start()
+    return _server
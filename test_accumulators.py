@@ -0,0 +1,106 @@
+"""
+Check the mergeable accumulators of analysers.accumulators against numpy and sklearn on fixed random data.
+The data is split into uneven chunks, accumulated on separate "workers" and merged, so the Chan et al. merges are
+exercised as they are in a streaming or distributed pass.
+"""
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import max_error, mean_absolute_error, mean_squared_error, r2_score
+from analysers.accumulators import MomentsAccumulator, RegressionAccumulator, accumulate, accumulate_moments
+from analysers.mae import MAEAnalyser
+from analysers.mse import MSEAnalyser
+from analysers.r2 import R2Analyser
+
+RANDOM_STATE = 0
+
+
+def uneven_chunks(n_rows, rng, n_chunks=7):
+    """Return the bounds of n_chunks contiguous chunks of random sizes covering n_rows rows (some may be empty)."""
+    bounds = np.sort(rng.integers(0, n_rows, n_chunks - 1))
+    return list(zip(np.concatenate([[0], bounds]), np.concatenate([bounds, [n_rows]])))
+
+
+def test_moments_merge():
+    rng = np.random.default_rng(RANDOM_STATE)
+
+    # A large offset and a small spread, where subtracting sums of squares would lose most of the digits.
+    values = 1e6 + rng.normal(scale=1e-2, size=(10_000, 4)) * np.array([1, 10, 100, 1000])
+
+    # Accumulate each chunk on its own, then merge the partial accumulators in pairs.
+    partials = []
+    for start, end in uneven_chunks(len(values), rng):
+        acc = MomentsAccumulator(values.shape[1])
+        acc.update(values[start:end])
+        partials.append(acc)
+    while len(partials) > 1:
+        partials = [partials[i].merge(partials[i + 1]) if i + 1 < len(partials) else partials[i]
+                    for i in range(0, len(partials), 2)]
+    acc = partials[0]
+
+    assert acc.count() == len(values)
+    np.testing.assert_allclose(acc.mean, values.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(acc.std(), values.std(axis=0), rtol=1e-8)
+    np.testing.assert_array_equal(acc.min, values.min(axis=0))
+    np.testing.assert_array_equal(acc.max, values.max(axis=0))
+
+
+def test_accumulate_moments():
+    rng = np.random.default_rng(RANDOM_STATE)
+    tbl = pd.DataFrame({'a': rng.normal(size=1000), 'b': rng.integers(-100, 100, 1000).astype(np.int8),
+                        'c': rng.exponential(size=1000).astype(np.float32), 'label': rng.choice(['x', 'y'], 1000)})
+
+    columns, acc = accumulate_moments(tbl, chunksize=97)
+    expected = tbl[columns].astype(np.float64)
+
+    assert list(columns) == ['a', 'b', 'c']
+    np.testing.assert_allclose(acc.mean, expected.mean(), rtol=1e-12)
+    np.testing.assert_allclose(acc.std(), expected.std(ddof=0), rtol=1e-12)
+
+
+def test_regression_merge():
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true = 1e4 + rng.normal(size=5000)
+    y_pred = y_true + rng.normal(scale=0.5, size=5000)
+
+    acc = RegressionAccumulator()
+    for start, end in uneven_chunks(len(y_true), rng):
+        chunk = RegressionAccumulator()
+        chunk.update(y_true[start:end], y_pred[start:end])
+        acc.merge(chunk)
+
+    assert acc.count() == len(y_true)
+    np.testing.assert_allclose(acc.mse(), mean_squared_error(y_true, y_pred), rtol=1e-10)
+    np.testing.assert_allclose(acc.rmse(), np.sqrt(mean_squared_error(y_true, y_pred)), rtol=1e-10)
+    np.testing.assert_allclose(acc.mae(), mean_absolute_error(y_true, y_pred), rtol=1e-10)
+    np.testing.assert_allclose(acc.r2(), r2_score(y_true, y_pred), rtol=1e-8)
+    assert acc.max_error() == max_error(y_true, y_pred)
+
+
+def test_regression_constant_target():
+    y_true = np.full(10, 3.0)
+
+    for y_pred in [y_true.copy(), y_true + 1]:
+        acc = RegressionAccumulator()
+        acc.update(y_true[:4], y_pred[:4])
+        acc.update(y_true[4:], y_pred[4:])
+        assert acc.r2() == r2_score(y_true, y_pred)
+
+
+def test_accumulate_workers():
+    rng = np.random.default_rng(RANDOM_STATE)
+    X = rng.normal(size=(3000, 3))
+    data = pd.DataFrame(X, columns=['f0', 'f1', 'f2'])
+    data['target'] = X @ np.array([1.0, -2.0, 0.5]) + rng.normal(size=3000)
+    model = LinearRegression().fit(data.iloc[:1000, :-1], data.iloc[:1000, -1])
+
+    # Two workers, each accumulating its own half of the chunks.
+    analysers = [MSEAnalyser(), MAEAnalyser(), R2Analyser()]
+    chunks = [data.iloc[start:end] for start, end in uneven_chunks(len(data), rng)]
+    acc = accumulate(analysers, model, chunks[:3])[RegressionAccumulator]
+    acc.merge(accumulate(analysers, model, chunks[3:])[RegressionAccumulator])
+
+    y_pred = model.predict(data.iloc[:, :-1])
+    np.testing.assert_allclose(acc.mse(), mean_squared_error(data['target'], y_pred), rtol=1e-10)
+    np.testing.assert_allclose(acc.mae(), mean_absolute_error(data['target'], y_pred), rtol=1e-10)
+    np.testing.assert_allclose(acc.r2(), r2_score(data['target'], y_pred), rtol=1e-10)
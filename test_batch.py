@@ -0,0 +1,120 @@
+"""
+Tests for batch.py: reading manifests, running the jobs of a manifest in worker processes and writing their results,
+and streaming a dataset which exceeds the memory limit rather than loading it, with the same metrics as when loaded.
+"""
+import json
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from batch import group_jobs, main, read_manifest, run_group, to_jsonable
+
+RANDOM_STATE = 0
+
+
+def write_job(directory, classify):
+    """Write a dataset of 2000 rows and a model fitted on part of it, and return their job."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    data = pd.DataFrame(rng.normal(size=(2000, 4)), columns=['a', 'b', 'c', 'd'])
+    data['target'] = data @ np.array([1.0, -2.0, 0.5, 0.0]) + rng.normal(size=2000)
+    if classify:
+        data['target'] = np.digitize(data['target'], [-1.0, 1.0])
+    model = (LogisticRegression() if classify else LinearRegression()).fit(data.iloc[:500, :-1], data['target'][:500])
+
+    data_path, model_path = os.path.join(directory, 'data.csv'), os.path.join(directory, 'model.sav')
+    data.to_csv(data_path, index=False)
+    with open(model_path, 'wb') as f:
+        pickle.dump(model, f)
+    return {'model': model_path, 'data': data_path, 'target_idx': -1}
+
+
+def results(records):
+    return {record['analyser']: record for record in records}
+
+
+def check_streamed(classify, metrics):
+    with tempfile.TemporaryDirectory() as directory:
+        job = write_job(directory, classify)
+        job['analysers'] = metrics + ['mean_std', 'corr']
+        loaded = results(run_group([(0, dict(job))], 256, None))
+        streamed = results(run_group([(0, dict(job)), (1, dict(job))], 256, 10_000))
+
+    assert len(streamed) == len(job['analysers'])
+    for name in metrics:
+        assert loaded[name]['error'] is None and streamed[name]['error'] is None
+        expected = loaded[name]['result']
+        if isinstance(expected, dict):  # A table, such as the F1 score of each class.
+            assert streamed[name]['result']['columns'] == expected['columns']
+            expected, streamed[name]['result'] = expected['data'], streamed[name]['result']['data']
+        np.testing.assert_allclose(streamed[name]['result'], expected, rtol=1e-9)
+
+    assert streamed['mean_std']['result']['columns'] == loaded['mean_std']['result']['columns']
+    np.testing.assert_allclose(streamed['mean_std']['result']['data'], loaded['mean_std']['result']['data'],
+                               rtol=1e-9)
+    assert streamed['corr']['result'] is None and 'memory limit' in streamed['corr']['error']
+
+
+def test_streamed_regression():
+    check_streamed(False, ['mse', 'mae', 'r2'])
+
+
+def test_streamed_classification():
+    check_streamed(True, ['accuracy', 'f1'])
+
+
+def test_read_manifest():
+    jobs = [{'model': 'a.sav', 'data': 'x.csv'}, {'model': 'b.sav', 'data': 'x.csv', 'target_idx': 0,
+                                                  'analysers': ['mse']}]
+    with tempfile.TemporaryDirectory() as directory:
+        for name, text in [('jobs.json', json.dumps(jobs)), ('jobs.jsonl', '\n'.join(map(json.dumps, jobs)) + '\n\n')]:
+            path = os.path.join(directory, name)
+            with open(path, 'w') as f:
+                f.write(text)
+            assert read_manifest(path) == [{'model': 'a.sav', 'data': 'x.csv', 'target_idx': -1, 'analysers': None},
+                                           jobs[1]]
+
+        for bad in [{'model': 'a.sav'}, {'model': 'a.sav', 'data': 'x.csv', 'analysers': ['median']}]:
+            path = os.path.join(directory, 'bad.json')
+            with open(path, 'w') as f:
+                json.dump([bad], f)
+            try:
+                read_manifest(path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f'the job {bad} was accepted')
+
+
+def test_group_jobs():
+    jobs = [{'data': 'x.csv', 'target_idx': -1}, {'data': 'y.csv', 'target_idx': -1},
+            {'data': os.path.abspath('x.csv'), 'target_idx': -1}, {'data': 'x.csv', 'target_idx': 0}]
+    assert [[i for i, _ in group] for group in group_jobs(jobs)] == [[0, 2], [1], [3]]
+
+
+def test_to_jsonable():
+    table = pd.DataFrame({'a': [1.0, np.nan]}, index=['Mean', 'Std'])
+    assert to_jsonable(table) == {'columns': ['a'], 'index': ['Mean', 'Std'], 'data': [[1.0], [None]]}
+    assert to_jsonable((np.float32(0.5), np.int64(3), np.array([np.inf, 2.0]))) == [0.5, 3, [None, 2.0]]
+    assert to_jsonable(pd.Series({'x': np.int8(1)})) == {'x': 1}
+    json.dumps(to_jsonable(table))
+
+
+def test_main():
+    with tempfile.TemporaryDirectory() as directory:
+        job = write_job(directory, True)
+        other_model = os.path.join(directory, 'other.sav')
+        with open(other_model, 'wb') as f:
+            pickle.dump(LogisticRegression(C=0.01).fit(np.eye(4), [0, 1, 2, 0]), f)
+
+        manifest, output = os.path.join(directory, 'jobs.jsonl'), os.path.join(directory, 'results.parquet')
+        with open(manifest, 'w') as f:
+            f.write(json.dumps({**job, 'analysers': ['accuracy', 'mse']}) + '\n')
+            f.write(json.dumps({'model': other_model, 'data': job['data'], 'analysers': ['accuracy']}) + '\n')
+        assert main([manifest, output, '--jobs', '1']) == 1  # MSE does not support classifiers.
+
+        records = pd.read_parquet(output)
+        assert list(records['job']) == [0, 0, 1] and list(records['analyser']) == ['accuracy', 'mse', 'accuracy']
+        assert records['error'].isna().tolist() == [True, False, True]
+        assert 0 <= json.loads(records['result'][0]) <= 1 and 0 <= json.loads(records['result'][2]) <= 1
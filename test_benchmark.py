@@ -0,0 +1,52 @@
+"""
+Tests for benchmark.py: timing with an untimed warm-up and setup, regression detection against a baseline, and a run
+over a tiny grid.
+"""
+import json
+import os
+import tempfile
+import numpy as np
+from benchmark import compare, main, measure
+
+
+def test_measure():
+    calls = []
+    result = measure(lambda arr: calls.append(arr.sum()), 3, setup=lambda: np.ones(1 << 20, dtype=np.uint8))
+
+    assert len(calls) == 5  # The warm-up, three timed runs and the traced run.
+    assert 0 <= result['seconds_min'] <= result['seconds_median']
+    assert result['peak_bytes'] < 1 << 20  # The setup's array is not counted against the function.
+
+
+def make_results(seconds):
+    return {'results': [{'benchmark': name, 'problem': 'regression', 'rows': 10, 'features': 2, 'classes': None,
+                         'seconds_median': s} for name, s in seconds.items()]}
+
+
+def test_compare():
+    baseline = make_results({'a': 1.0, 'b': 1.0, 'c': 1.0})
+    results = make_results({'a': 1.2, 'b': 1.3, 'd': 9.0})
+    assert compare(results, baseline, 0.25) == [(('b', 'regression', 10, 2, None), 1.0, 1.3)]
+    assert compare(results, baseline, 0.1) == [(('a', 'regression', 10, 2, None), 1.0, 1.2),
+                                               (('b', 'regression', 10, 2, None), 1.0, 1.3)]
+
+
+def test_tiny_grid():
+    with tempfile.TemporaryDirectory() as directory:
+        output, baseline = os.path.join(directory, 'results.json'), os.path.join(directory, 'baseline.json')
+        args = ['--rows', '200', '--features', '3', '--classes', '2', '--repeat', '1', '--output', output]
+        assert main(args) == 0
+        with open(output) as f:
+            results = json.load(f)
+
+        names = {(result['problem'], result['benchmark']) for result in results['results']}
+        assert ('classification', 'analyse:AccuracyAnalyser') in names and ('regression', 'analyse:MSEAnalyser') in names
+        assert ('classification', 'analyse:MSEAnalyser') not in names
+        assert results['meta']['repeat'] == 1
+
+        # A baseline which was impossibly fast makes every benchmark a regression.
+        for result in results['results']:
+            result['seconds_median'] = 0.0
+        with open(baseline, 'w') as f:
+            json.dump(results, f)
+        assert main(args + ['--baseline', baseline]) == 1
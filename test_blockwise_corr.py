@@ -0,0 +1,102 @@
+"""
+Tests for analysers.blockwise_corr. The tiles are small enough that the matrix spans several of them, and each
+window and strong pair must match DataFrame.corr() whether the matrix is kept, spilled to disk or recomputed.
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from analysers import blockwise_corr
+from analysers.blockwise_corr import blockwise_correlation
+
+RANDOM_STATE = 0
+THRESHOLD = 0.5
+
+
+def make_table():
+    """A table of 43 numeric features, with some strongly correlated pairs, a constant and non-numeric columns."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    tbl = pd.DataFrame(rng.normal(size=(400, 40)), columns=[f'f{i}' for i in range(40)])
+    for i in range(0, 40, 8):
+        tbl[f'f{i + 1}'] = tbl[f'f{i}'] * (i - 20) + rng.normal(scale=i + 1, size=400)
+    tbl['constant'] = 2.0
+    tbl['small'] = rng.integers(0, 5, 400).astype(np.int8)
+    tbl['flag'] = tbl['f0'] > 0
+    tbl['label'] = rng.choice(['a', 'b'], 400)
+    tbl['f40'] = rng.normal(size=400).astype(np.float32)
+    return tbl
+
+
+def expected_pairs(corr_tbl, threshold):
+    """Return the strong pairs below the diagonal of a DataFrame.corr() table, as a set of (name, name, r)."""
+    values = corr_tbl.to_numpy()
+    rows, cols = np.nonzero(np.tril(np.abs(values) >= threshold, k=-1))
+    return {(corr_tbl.index[i], corr_tbl.columns[j]): values[i, j] for i, j in zip(rows, cols)}
+
+
+def check_result(corr_matrix, expected):
+    """Check every window and the strong pairs of a CorrelationMatrix against DataFrame.corr()."""
+    assert list(corr_matrix.columns) == list(expected.columns)
+    np.testing.assert_allclose(corr_matrix.window().to_numpy(), expected.to_numpy(), atol=1e-12)
+    np.testing.assert_allclose(corr_matrix.window(17, 3, 11).to_numpy(), expected.iloc[17:28, 3:14].to_numpy(),
+                               atol=1e-12)
+    np.testing.assert_allclose(corr_matrix.window(40, 40).to_numpy(), expected.iloc[40:, 40:].to_numpy(), atol=1e-12)
+
+    pairs = expected_pairs(expected, THRESHOLD)
+    got = {(first, second): r for first, second, r in corr_matrix.pairs.itertuples(index=False)}
+    assert got.keys() == pairs.keys()
+    np.testing.assert_allclose([got[key] for key in pairs], list(pairs.values()), atol=1e-12)
+
+    strengths = np.abs(corr_matrix.pairs['r'].to_numpy())
+    assert np.all(strengths[:-1] >= strengths[1:])
+
+
+def test_dense():
+    tbl = make_table()
+    corr_matrix = blockwise_correlation(tbl, THRESHOLD, block_size=8)
+    assert corr_matrix.matrix is not None
+    check_result(corr_matrix, tbl.select_dtypes('number').corr())
+
+
+def test_recomputed_windows():
+    tbl = make_table()
+    dense_limit = blockwise_corr.DENSE_LIMIT
+    blockwise_corr.DENSE_LIMIT = 10
+    try:
+        corr_matrix = blockwise_correlation(tbl, THRESHOLD, block_size=8)
+    finally:
+        blockwise_corr.DENSE_LIMIT = dense_limit
+
+    assert corr_matrix.matrix is None
+    check_result(corr_matrix, tbl.select_dtypes('number').corr())
+
+
+def test_spilled():
+    tbl = make_table()
+    with tempfile.TemporaryDirectory() as directory:
+        corr_matrix = blockwise_correlation(tbl, THRESHOLD, block_size=8, spill_path=os.path.join(directory, 'c.npy'))
+        check_result(corr_matrix, tbl.select_dtypes('number').corr())
+        del corr_matrix  # Release the memory map before the directory is removed.
+
+
+def test_large_offset():
+    # DataFrame.corr() loses digits on columns far from 0, so compare against a long double computation instead.
+    tbl = make_table()
+    tbl['offset'] = 1e8 + tbl['f3']
+
+    values = tbl.select_dtypes('number').to_numpy(dtype=np.longdouble)
+    values -= values.mean(axis=0)
+    norms = np.sqrt((values * values).sum(axis=0))
+    with np.errstate(invalid='ignore'):
+        expected = (values.T @ values / np.outer(norms, norms)).astype(np.float64)
+
+    got = blockwise_correlation(tbl, THRESHOLD, block_size=8).window().to_numpy()
+    np.testing.assert_allclose(got, expected, atol=1e-12)
+
+
+def test_top_k():
+    tbl = make_table()
+    expected = blockwise_correlation(tbl, THRESHOLD, block_size=1024).pairs
+    for block_size in [3, 8]:
+        top = blockwise_correlation(tbl, THRESHOLD, top_k=4, block_size=block_size).pairs
+        pd.testing.assert_frame_equal(top, expected.iloc[:4], atol=1e-12)
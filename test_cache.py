@@ -0,0 +1,69 @@
+"""
+Tests for the caching of analyses: handlers are keyed by a fingerprint of their content, and cached results are only
+shared between handlers with the same fingerprint.
+"""
+import os
+import tempfile
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from analysers import hash_handler
+from analysers.accuracy import AccuracyAnalyser
+from handlers.simple import StandardHandler
+
+DATA = 'testfiles/Iris_test.csv'
+MODEL = 'testfiles/test_model_iris.sav'
+
+
+def load(data=DATA, target_idx=-1, **kwargs):
+    with open(data) as data_file, open(MODEL, 'rb') as model_file:
+        return StandardHandler(data_file, model_file, target_idx, **kwargs)
+
+
+def test_fingerprint_identifies_content():
+    hdlr = load()
+    assert hash_handler(hdlr) == hdlr.fingerprint == load().fingerprint
+    assert load(target_idx=4).fingerprint != hdlr.fingerprint  # The same column, but a different index.
+    assert load(sample_size=20).fingerprint != hdlr.fingerprint
+    assert load(sample_size=20).fingerprint != load(sample_size=20, stratify=False).fingerprint
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'head.csv')
+        pd.read_csv(DATA).head(30).to_csv(path, index=False)
+        assert load(path).fingerprint != hdlr.fingerprint
+
+    with open(MODEL, 'rb') as model_file:
+        assert hdlr.with_model(model_file).fingerprint != hdlr.fingerprint
+
+
+def cached_views():
+    """Run as a streamlit script, so that results are cached."""
+    import pandas as pd
+    import streamlit as st
+    from analysers.accuracy import AccuracyAnalyser
+    from analysers.show_data import view_positions
+    from handlers.simple import StandardHandler
+
+    def load(data):
+        with open(data) as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+            return StandardHandler(data_file, model_file, -1)
+
+    first, same, other = load(st.session_state.data), load(st.session_state.data), load(st.session_state.other)
+    views = [view_positions(hdlr, 'SepalLengthCm') for hdlr in [first, same, other]]
+    accuracies = [AccuracyAnalyser().analyse(hdlr) for hdlr in [first, same, other]]
+    st.session_state.results = views, accuracies
+
+
+def test_results_are_shared_by_fingerprint():
+    with tempfile.TemporaryDirectory() as directory:
+        other = os.path.join(directory, 'head.csv')
+        pd.read_csv(DATA).head(30).to_csv(other, index=False)
+
+        app = AppTest.from_function(cached_views, default_timeout=60)
+        app.session_state.data, app.session_state.other = DATA, other
+        app.run()
+        assert not app.exception
+        expected = AccuracyAnalyser().analyse(load(other))  # Not cached, as this is not a streamlit script.
+
+    views, accuracies = app.session_state.results
+    assert views[1] is views[0] and len(views[2]) == 30
+    assert accuracies[1] == accuracies[0] and accuracies[2] == expected
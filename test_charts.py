@@ -0,0 +1,41 @@
+"""
+Tests for pages.charts: wide charts are reduced to their largest bars, and rendered charts are reused from the cache.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+from pages import charts
+from pages.charts import cached_bar_chart, top_bars
+
+
+def test_top_bars():
+    values = pd.Series(np.arange(-60, 60, dtype=np.float64), index=[f'f{i}' for i in range(120)])
+    bars = top_bars(values, max_bars=10)
+
+    assert len(bars) == 10
+    assert set(bars.index[:9]) == {'f0', 'f1', 'f2', 'f3', 'f4', 'f119', 'f118', 'f117', 'f116'}
+    assert bars.index[-1] == 'Other (111 features, mean)'
+    assert bars.iloc[-1] == values.drop(bars.index[:9]).mean()
+
+    small = values.head(10)
+    assert top_bars(small, max_bars=10) is small
+
+
+def test_charts_are_cached():
+    values = pd.Series([1.0, -2.0, 3.0], index=['a', 'b', 'c'])
+    charts._charts.clear()
+
+    png = cached_bar_chart('fingerprint', values, 'Mean', 'mean', 'blue')
+    assert png.startswith(b'\x89PNG') and plt.get_fignums() == []  # The figure is closed once rendered.
+    assert cached_bar_chart('fingerprint', values * 2, 'Mean', 'mean', 'blue') is png  # Keyed by the result.
+    assert cached_bar_chart('other', values, 'Mean', 'mean', 'blue') is not png
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(charts, 'CHART_CACHE_SIZE', 2)
+    monkeypatch.setattr(charts, 'render_bar_chart', lambda values, *args: bytes(args[0], 'utf-8'))
+    charts._charts.clear()
+
+    for title in ['a', 'b', 'a', 'c']:
+        cached_bar_chart('fingerprint', None, title, 'mean', 'blue')
+    assert [key[1] for key in charts._charts] == ['a', 'c']  # 'b' was the least recently used.
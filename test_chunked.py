@@ -0,0 +1,63 @@
+"""
+Tests for handlers.chunked: reading a .csv file in chunks gives the same data as reading it whole, and stops with a
+MemoryLimitException once the data outgrows the memory limit.
+"""
+import io
+import numpy as np
+import pandas as pd
+from exceptions import FileLoadingException, MemoryLimitException
+from handlers.chunked import ColumnarStore, read_csv_chunked
+from handlers.simple import StandardHandler
+
+RANDOM_STATE = 0
+
+
+def make_csv(n_rows=500):
+    """A table with integers that only need a wide dtype late in the file, and some missing values."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    data = pd.DataFrame({'small': rng.integers(0, 100, n_rows), 'x': rng.normal(size=n_rows),
+                         'name': rng.choice(['a', 'b', 'c'], n_rows)})
+    data.loc[n_rows - 3, 'small'] = 100_000
+    data.loc[[5, 17, 260], 'x'] = np.nan
+    data.loc[[40], 'name'] = None
+    return data.to_csv(index=False)
+
+
+def test_chunked_equals_whole():
+    text = make_csv()
+    progress = []
+    data, missing, n_saved = read_csv_chunked(io.StringIO(text), chunksize=64, progress=progress.append)
+
+    expected = pd.read_csv(io.StringIO(text)).dropna().reset_index(drop=True)
+    pd.testing.assert_frame_equal(data, expected, check_dtype=False)
+    np.testing.assert_array_equal(missing, [0, 3, 1])
+    assert n_saved > 0 and data['small'].max() == 100_000
+    assert progress == sorted(progress) and progress[-1] == 1.0
+
+
+def test_handler_chunked_equals_whole():
+    def load(**kwargs):
+        with open('testfiles/Iris.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+            return StandardHandler(data_file, model_file, -1, **kwargs)
+
+    whole, chunked = load(), load(chunksize=40)
+    pd.testing.assert_frame_equal(chunked.get_data(), whole.get_data())
+    np.testing.assert_array_equal(chunked.get_predictions(), whole.get_predictions())
+
+
+def test_memory_limit():
+    store = ColumnarStore(memory_limit=1000)
+    store.append(pd.DataFrame({'x': np.zeros(100)}))  # 800 bytes.
+    try:
+        store.append(pd.DataFrame({'x': np.zeros(100)}))
+    except MemoryLimitException as e:
+        assert isinstance(e, FileLoadingException) and 'after 100 rows' in str(e)
+    else:
+        raise AssertionError('the memory limit was exceeded')
+
+    try:
+        read_csv_chunked(io.StringIO(make_csv()), chunksize=64, memory_limit=2000)
+    except MemoryLimitException:
+        pass
+    else:
+        raise AssertionError('the memory limit was exceeded')
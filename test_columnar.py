@@ -0,0 +1,75 @@
+"""
+Tests for handlers.columnar: Parquet, Feather and Arrow files only have the model's features and the target read from
+them, from disk or from an uploaded buffer.
+"""
+import io
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from sklearn.linear_model import LogisticRegression
+from handlers.columnar import projected_columns, read_columnar
+from handlers.simple import StandardHandler
+
+RANDOM_STATE = 0
+
+
+def make_data():
+    """A table with two features the model uses, two it does not, and the target in the middle."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    data = pd.DataFrame({'a': rng.normal(size=200), 'unused': rng.normal(size=200), 'label': rng.integers(0, 2, 200),
+                         'b': rng.normal(size=200), 'notes': rng.choice(['x', 'y'], 200)})
+    model = LogisticRegression().fit(data[['a', 'b']], data['label'])
+    return data, model
+
+
+def write(data, path):
+    if path.endswith('.parquet'):
+        data.to_parquet(path, index=False)
+    elif path.endswith('.feather'):
+        data.to_feather(path)
+    else:
+        feather.write_feather(pa.Table.from_pandas(data, preserve_index=False), path, compression='uncompressed')
+
+
+def test_projected_columns():
+    names = ['a', 'unused', 'label', 'b', 'notes']
+    _, model = make_data()
+    assert projected_columns(names, model, 2) == ['a', 'b', 'label']
+    assert projected_columns(names, model, -3) == ['label', 'a', 'b']
+    assert projected_columns(names, model, 4) is None  # 4 cannot index the target among three columns.
+    assert projected_columns(names, LogisticRegression(), 2) is None  # No feature names, so every column is read.
+
+
+def test_read_projected():
+    data, model = make_data()
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in ['.parquet', '.feather', '.arrow']:
+            path = os.path.join(directory, 'data' + extension)
+            write(data, path)
+            with open(path, 'rb') as file:
+                from_disk = read_columnar(file, model, 2)
+            with open(path, 'rb') as file:
+                upload = io.BytesIO(file.read())
+            upload.name = 'upload' + extension
+            from_upload = read_columnar(upload, model, -3)
+
+            pd.testing.assert_frame_equal(from_disk, data[['a', 'b', 'label']])
+            pd.testing.assert_frame_equal(from_upload, data[['label', 'a', 'b']])
+
+
+def test_handler_reads_projection():
+    data, model = make_data()
+    with tempfile.TemporaryDirectory() as directory:
+        data_path, model_path = os.path.join(directory, 'data.parquet'), os.path.join(directory, 'model.sav')
+        write(data, data_path)
+        with open(model_path, 'wb') as file:
+            pickle.dump(model, file)
+        with open(data_path, 'rb') as data_file, open(model_path, 'rb') as model_file:
+            hdlr = StandardHandler(data_file, model_file, 2)
+
+    assert list(hdlr.X.columns) == ['a', 'b'] and hdlr.y.name == 'label'
+    np.testing.assert_array_equal(hdlr.get_predictions(), model.predict(data[['a', 'b']]))
@@ -0,0 +1,90 @@
+"""
+Tests for the confusion matrix metrics of analysers.accumulators, compared with sklearn.metrics. Includes labels the
+model knows but which never occur, labels seen in only some chunks, and string labels.
+"""
+import numpy as np
+from sklearn.metrics import (accuracy_score, classification_report, confusion_matrix, f1_score, precision_score,
+                             recall_score)
+from analysers.accumulators import ConfusionAccumulator, confusion
+from analysers.precision_recall import report_table
+
+RANDOM_STATE = 0
+
+
+def make_labels(labels, n, rng, p=None):
+    """Return actual labels, and predictions which are correct about 70% of the time and otherwise random."""
+    y_true = rng.choice(labels, n, p=p)
+    y_pred = np.where(rng.random(n) < 0.7, y_true, rng.choice(labels, n))
+    return y_true, y_pred
+
+
+def chunked(y_true, y_pred, known_labels, chunksize):
+    """Accumulate the labels chunk by chunk on two workers, then merge them."""
+    workers = [ConfusionAccumulator(known_labels), ConfusionAccumulator()]
+    for i, start in enumerate(range(0, len(y_true), chunksize)):
+        workers[i % 2].update(y_true[start:start + chunksize], y_pred[start:start + chunksize])
+    return workers[0].merge(workers[1])
+
+
+def check_scores(acc, y_true, y_pred):
+    """Check every score of a filled ConfusionAccumulator against sklearn's."""
+    seen = np.union1d(y_true, y_pred)
+    present = acc.present()
+    np.testing.assert_array_equal(acc.labels[present], seen)
+    np.testing.assert_array_equal(acc.matrix[np.ix_(present, present)], confusion_matrix(y_true, y_pred, labels=seen))
+    np.testing.assert_allclose(acc.accuracy(), accuracy_score(y_true, y_pred), rtol=1e-12)
+
+    for method, score in [(acc.precision, precision_score), (acc.recall, recall_score), (acc.f1, f1_score)]:
+        np.testing.assert_allclose(method()[present], score(y_true, y_pred, labels=seen, average=None,
+                                                            zero_division=0), rtol=1e-12)
+        for average in ['macro', 'weighted', 'micro']:
+            np.testing.assert_allclose(method(average), score(y_true, y_pred, average=average, zero_division=0),
+                                       rtol=1e-12)
+
+
+def test_multiclass():
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true, y_pred = make_labels([0, 1, 2, 3, 4], 5000, rng, p=[0.5, 0.3, 0.15, 0.049, 0.001])
+    check_scores(confusion(y_true, y_pred), y_true, y_pred)
+
+
+def test_unseen_known_labels():
+    # The model knows classes 5 and 9, which never occur, so they must not count towards the averages.
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true, y_pred = make_labels([0, 1, 2], 1000, rng)
+    acc = confusion(y_true, y_pred, labels=[0, 1, 2, 5, 9])
+    assert list(acc.labels) == [0, 1, 2, 5, 9]
+    check_scores(acc, y_true, y_pred)
+
+
+def test_predicted_only_label():
+    # Class 3 is predicted but never occurs, so it has a precision of 0 and counts towards the macro average.
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true, y_pred = make_labels([0, 1, 2], 1000, rng)
+    y_pred[:20] = 3
+    check_scores(confusion(y_true, y_pred), y_true, y_pred)
+
+
+def test_chunked_merge():
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true, y_pred = make_labels(['cat', 'dog', 'eel', 'fox'], 3000, rng, p=[0.4, 0.4, 0.19, 0.01])
+
+    # Sort by label, so that each chunk only sees some of the labels, and only one worker knows of gnu.
+    order = np.argsort(y_true, kind='stable')
+    y_true, y_pred = y_true[order], y_pred[order]
+    check_scores(chunked(y_true, y_pred, ['cat', 'dog', 'eel', 'fox', 'gnu'], 250), y_true, y_pred)
+
+
+def test_report_table():
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true, y_pred = make_labels(['a', 'b', 'c'], 2000, rng)
+    table = report_table(confusion(y_true, y_pred, labels=['a', 'b', 'c', 'd']))
+    report = classification_report(y_true, y_pred, output_dict=True, zero_division=0)
+
+    assert list(table.index) == ['a', 'b', 'c', 'Macro average', 'Weighted average']
+    for row, name in [('a', 'a'), ('b', 'b'), ('c', 'c'), ('Macro average', 'macro avg'),
+                      ('Weighted average', 'weighted avg')]:
+        expected = report[name]
+        np.testing.assert_allclose(table.loc[row, ['Precision', 'Recall', 'F1']].to_numpy(dtype=float),
+                                   [expected['precision'], expected['recall'], expected['f1-score']], rtol=1e-12)
+        assert table.loc[row, 'Support'] == expected['support']
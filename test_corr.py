@@ -0,0 +1,41 @@
+"""
+Tests for the strong correlations reported by analysers.corr, compared with the pairs of DataFrame.corr().
+"""
+import numpy as np
+import pandas as pd
+from analysers.corr import CorrAnalyser, correlations
+from handlers.simple import StandardHandler
+
+
+def load():
+    with open('testfiles/Iris_test.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        return StandardHandler(data_file, model_file, -1)
+
+
+def test_strong_pairs():
+    hdlr = load()
+    corr_matrix, strong = CorrAnalyser().analyse(hdlr)  # The string target is left out, rather than failing.
+    expected = hdlr.get_tabular().select_dtypes('number').corr()
+
+    assert list(strong.columns) == ['feature_1', 'feature_2', 'r'] and 'Species' not in corr_matrix.columns
+    for first, second, r in strong.itertuples(index=False):
+        assert abs(r) >= 0.7 and np.isclose(r, expected.loc[first, second])
+
+    n_strong = int((np.abs(np.tril(expected.to_numpy(), k=-1)) >= 0.7).sum())
+    assert len(strong) == n_strong > 0
+    assert np.all(np.diff(np.abs(strong['r'].to_numpy())) <= 0)
+
+
+def test_threshold_and_top_k():
+    rng = np.random.default_rng(0)
+    tbl = pd.DataFrame(rng.normal(size=(200, 6)), columns=list('abcdef'))
+    tbl['g'] = tbl['a'] + 0.1 * rng.normal(size=200)
+    tbl['h'] = -tbl['b'] + 0.5 * rng.normal(size=200)
+
+    _, everything = correlations(tbl, threshold=0.0)
+    assert len(everything) == 8 * 7 // 2
+
+    _, top = correlations(tbl, threshold=0.0, top_k=2)
+    pd.testing.assert_frame_equal(top, everything.iloc[:2])
+    assert {frozenset(pair) for pair in top[['feature_1', 'feature_2']].to_numpy()} == {frozenset('ag'),
+                                                                                       frozenset('bh')}
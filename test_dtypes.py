@@ -0,0 +1,52 @@
+"""
+Tests for handlers.dtypes: every column is narrowed only to a dtype which holds each of its values exactly.
+"""
+import numpy as np
+import pandas as pd
+from handlers.dtypes import ARROW_STRING, compact_frame, compact_numeric
+from handlers.validation import validate_data
+
+RANDOM_STATE = 0
+
+
+def make_frame():
+    rng = np.random.default_rng(RANDOM_STATE)
+    return pd.DataFrame({
+        'tiny': rng.integers(-128, 128, 400),
+        'medium': np.r_[rng.integers(0, 100, 399), 40_000],
+        'halves': rng.integers(-50, 50, 400) / 2,  # Every value fits float32 exactly.
+        'decimals': rng.normal(size=400),  # These do not.
+        'flag': rng.random(400) > 0.5,
+        'species': rng.choice(['setosa', 'virginica'], 400),
+        'id': [f'row{i}' for i in range(400)],
+    })
+
+
+def test_compact_numeric():
+    assert compact_numeric(np.array([-129, 127])).dtype == np.int16
+    assert compact_numeric(np.array([0, 2 ** 31])).dtype == np.int64
+    assert compact_numeric(np.array([1, 2], dtype=np.int16), low=-1, high=300).dtype == np.int16
+    assert compact_numeric(np.array([0.1, 0.5])).dtype == np.float64
+    assert compact_numeric(np.array([0.25, np.nan, np.inf])).dtype == np.float32
+
+
+def test_compact_frame_is_exact():
+    data = make_frame()
+    compact, n_saved = compact_frame(data)
+
+    assert list(compact.dtypes) == [np.int8, np.int32, np.float32, np.float64, np.bool_, 'category', ARROW_STRING]
+    for col in data.columns:
+        np.testing.assert_array_equal(compact[col].astype(object), data[col].astype(object))
+    assert n_saved == data.memory_usage(deep=True).sum() - compact.memory_usage(deep=True).sum() > 0
+    assert data['tiny'].dtype == np.int64  # The input is left as it was.
+
+    # The profile's statistics give the same result without scanning the columns again.
+    checked, profile = validate_data(data)
+    with_profile, saved = compact_frame(checked, profile=profile)
+    pd.testing.assert_frame_equal(with_profile, compact.loc[checked.index])
+    assert saved == n_saved
+
+
+def test_numeric_only():
+    compact, _ = compact_frame(make_frame(), strings=False)
+    assert compact['species'].dtype == object and compact['tiny'].dtype == np.int8
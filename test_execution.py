@@ -0,0 +1,54 @@
+"""
+Tests for pages.execution: analysers run on the shared thread pool give the results they give when run directly,
+and the pool threads run with the submitting session's script run context.
+"""
+from streamlit.testing.v1 import AppTest
+from analysers.accuracy import AccuracyAnalyser
+from analysers.f1 import F1Analyser
+from analysers.mse import MSEAnalyser
+from analysers.shape import ShapeAnalyser
+from exceptions import UnsupportedMethodException
+from handlers.simple import StandardHandler
+from pages.execution import AnalysisExecutor
+
+
+def load():
+    with open('testfiles/Iris_test.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        return StandardHandler(data_file, model_file, -1)
+
+
+def test_results_match_direct_calls():
+    hdlr = load()
+    executor = AnalysisExecutor(hdlr)
+    analysers = [AccuracyAnalyser(), F1Analyser(), ShapeAnalyser()]
+    futures = [executor.submit(analyser) for analyser in analysers]
+
+    assert executor.submit(AccuracyAnalyser()) is futures[0]  # One future per analyser type.
+    assert executor.result(analysers[0]) == AccuracyAnalyser().analyse(load())
+    assert executor.result(analysers[2]) == ShapeAnalyser().analyse(load())
+    f1 = executor.result(analysers[1])
+    assert f1.equals(F1Analyser().analyse(load())) and executor.done(analysers[1])
+
+
+def test_errors_are_reraised():
+    executor = AnalysisExecutor(load())
+    try:
+        executor.result(MSEAnalyser())  # MSE does not support classifiers.
+    except UnsupportedMethodException as e:
+        assert 'non-regression' in str(e)
+    else:
+        raise AssertionError('the analyser did not fail')
+
+
+def submit_from_session():
+    """Run as a streamlit script, so that the script thread has a script run context."""
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    from pages.execution import submit
+
+    st.session_state.same_context = submit(get_script_run_ctx).result() is get_script_run_ctx()
+
+
+def test_session_context_is_attached():
+    app = AppTest.from_function(submit_from_session).run()
+    assert not app.exception and app.session_state.same_context
@@ -0,0 +1,89 @@
+"""
+Check the confidence intervals of analysers.intervals against scipy's, and check by simulation that the intervals
+with the finite population correction cover the population's value at close to their confidence level when samples
+are drawn without replacement from a file.
+"""
+import numpy as np
+from scipy import stats
+from analysers.intervals import (correlation_interval, finite_population_correction, mean_interval,
+                                 proportion_interval, std_interval, z_value)
+
+RANDOM_STATE = 0
+N_SIMULATIONS = 2000
+
+
+def test_z_value():
+    for confidence in [0.5, 0.9, 0.95, 0.99]:
+        np.testing.assert_allclose(z_value(confidence), stats.norm.ppf(0.5 + confidence / 2), rtol=1e-12)
+
+
+def test_wilson_interval():
+    for successes, n in [(0, 10), (1, 10), (30, 100), (99, 100), (100, 100), (4567, 10_000)]:
+        for confidence in [0.9, 0.95, 0.99]:
+            expected = stats.binomtest(successes, n).proportion_ci(confidence, method='wilson')
+            np.testing.assert_allclose(proportion_interval(successes, n, confidence=confidence),
+                                       (expected.low, expected.high), rtol=1e-12, atol=1e-15)
+
+
+def test_mean_interval():
+    rng = np.random.default_rng(RANDOM_STATE)
+    values = rng.exponential(size=(200, 3))
+    low, high = mean_interval(values)
+
+    expected_low, expected_high = stats.norm.interval(0.95, loc=values.mean(axis=0), scale=stats.sem(values))
+    np.testing.assert_allclose(low, expected_low, rtol=1e-12)
+    np.testing.assert_allclose(high, expected_high, rtol=1e-12)
+
+
+def test_correlation_interval():
+    rng = np.random.default_rng(RANDOM_STATE)
+    x = rng.normal(size=50)
+    y = x + rng.normal(scale=2, size=50)
+    result = stats.pearsonr(x, y)
+
+    for confidence in [0.9, 0.95]:
+        expected = result.confidence_interval(confidence)
+        np.testing.assert_allclose(correlation_interval(result.statistic, len(x), confidence),
+                                   (expected.low, expected.high), rtol=1e-10)
+
+
+def test_finite_population_correction():
+    np.testing.assert_allclose(finite_population_correction(100, 1000), np.sqrt(900 / 999), rtol=1e-15)
+    assert finite_population_correction(100, None) == 1.0
+    assert finite_population_correction(1000, 1000) == 0.0
+
+    # A sample of the whole file has no sampling error at all.
+    values = np.random.default_rng(RANDOM_STATE).normal(size=1000)
+    low, high = mean_interval(values, population_size=1000)
+    assert low == high == values.mean()
+    assert proportion_interval(400, 1000, population_size=1000) == (0.4, 0.4)
+
+
+def coverage(population, sample_size, interval, target):
+    """
+    Return the fraction of samples drawn without replacement from the population whose interval covers the target.
+    """
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    covered = 0
+    for _ in range(N_SIMULATIONS):
+        low, high = interval(rng.choice(population, sample_size, replace=False))
+        covered += low <= target <= high
+    return covered / N_SIMULATIONS
+
+
+def test_coverage_without_replacement():
+    # Half of the file is sampled, so intervals without the correction would cover ~99.5% of the time rather than 95%.
+    rng = np.random.default_rng(RANDOM_STATE)
+    population = rng.gamma(2.0, size=2000)
+    sample_size = len(population) // 2
+    correct = population > 1.5
+
+    # The standard error of a coverage estimated from N_SIMULATIONS samples is about 0.005.
+    checks = [
+        (population, lambda sample: mean_interval(sample, len(population)), population.mean()),
+        (population, lambda sample: std_interval(sample, len(population)), population.std(ddof=1)),
+        (correct, lambda sample: proportion_interval(sample.sum(), len(sample), len(correct)), correct.mean()),
+    ]
+    for values, interval, target in checks:
+        assert abs(coverage(values, sample_size, interval, target) - 0.95) < 0.02
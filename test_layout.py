@@ -0,0 +1,105 @@
+"""
+Tests for handlers.layout: the data, X and y built for a model share a single copy of the values, and X reaches the
+model's predict method without another copy whenever the model's dtype holds the features exactly.
+"""
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from handlers.layout import block_dtype, build_views, model_input
+
+RANDOM_STATE = 0
+
+
+def make_frame(float_dtype=np.float64):
+    rng = np.random.default_rng(RANDOM_STATE)
+    return pd.DataFrame({
+        'label': rng.integers(0, 2, 300),
+        'x': rng.normal(size=300).astype(float_dtype),
+        'small': rng.integers(-5, 5, 300).astype(np.int8),
+        'z': rng.normal(size=300).astype(float_dtype),
+    })
+
+
+def fit(model, data):
+    return model.fit(data[['x', 'small', 'z']].to_numpy(), data['label'])
+
+
+def shares(a, b):
+    return np.shares_memory(np.asarray(a), np.asarray(b))
+
+
+def test_block_dtype():
+    frame = make_frame()
+    forest = fit(RandomForestClassifier(n_estimators=2, random_state=RANDOM_STATE), frame)
+    linear = fit(LogisticRegression(), frame)
+    assert block_dtype([np.int8, np.float32]) is np.float32
+    assert block_dtype([np.int8, np.float32], linear) is np.float64
+    assert block_dtype([np.float64], forest) is np.float64
+    assert block_dtype([np.int16, np.float32], forest) is np.float32
+
+
+def test_views_of_one_block():
+    frame = make_frame()
+    model = fit(LogisticRegression(), frame)
+    data, X, y = build_views(frame, 0, model=model)
+
+    assert list(data.columns) == ['x', 'small', 'z', 'label'] and list(X.columns) == ['x', 'small', 'z']
+    assert X.dtypes.eq(np.float64).all() and y.dtype == frame['label'].dtype
+    assert shares(X['x'], data['x']) and shares(X['z'], data['z'])
+    pd.testing.assert_frame_equal(X, frame[['x', 'small', 'z']].astype(np.float64))
+    pd.testing.assert_series_equal(y, frame['label'])
+    assert model_input(model, X) is X
+
+
+def test_model_dtype_block():
+    # Features which fit float32 exactly are held as float32 for a forest, so predict reads them in place.
+    frame = make_frame(np.float32)
+    model = fit(RandomForestClassifier(n_estimators=5, random_state=RANDOM_STATE), frame)
+    _, X, _ = build_views(frame, 0, model=model)
+
+    assert X.dtypes.eq(np.float32).all()
+    assert model_input(model, X) is X
+    np.testing.assert_array_equal(model.predict(X.to_numpy()), model.predict(frame[['x', 'small', 'z']].to_numpy()))
+
+
+def test_inexact_features_keep_their_values():
+    frame = make_frame()
+    model = fit(RandomForestClassifier(n_estimators=5, random_state=RANDOM_STATE), frame)
+    data, X, _ = build_views(frame, 0, model=model)
+
+    np.testing.assert_array_equal(data['x'], frame['x'])
+    assert model_input(model, X).dtypes.eq(np.float32).all()
+
+
+def test_target_in_block():
+    frame = make_frame()
+    frame['label'] = frame['label'].astype(np.float64)
+    data, X, y = build_views(frame, 0)
+
+    assert shares(y, data['label']) and shares(X['x'], data['x'])
+    assert np.asarray(data).flags['F_CONTIGUOUS'] and np.asarray(X).flags['F_CONTIGUOUS']
+
+
+def test_non_numeric_features():
+    frame = make_frame()
+    frame['colour'] = pd.Categorical(np.random.default_rng(RANDOM_STATE).choice(['red', 'blue'], len(frame)))
+    data, X, y = build_views(frame, 0)
+
+    assert list(data.columns) == ['x', 'small', 'z', 'colour', 'label']
+    for col in ['x', 'small', 'z']:
+        assert shares(X[col], frame[col]) and shares(data[col], frame[col])
+    assert shares(y, frame['label'])
+
+
+def test_spilled_block():
+    frame = make_frame()
+    with tempfile.TemporaryDirectory() as directory:
+        data, X, _ = build_views(frame, 0, spill_dir=directory)
+        base = np.asarray(X)
+        while not isinstance(base, np.memmap) and base.base is not None:
+            base = base.base
+        assert isinstance(base, np.memmap)
+        pd.testing.assert_frame_equal(X, frame[['x', 'small', 'z']].astype(np.float64))
+        del data, X
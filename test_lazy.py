@@ -0,0 +1,61 @@
+"""
+Tests for lazily loaded handlers: the constructor returns once the model and the data file's header are read, the
+data is parsed on the loader thread, and an error hit by the loader is raised where the data is first used.
+"""
+import io
+import threading
+import pandas as pd
+from handlers.simple import StandardHandler
+
+DATA = 'testfiles/Iris_test.csv'
+MODEL = 'testfiles/test_model_iris.sav'
+
+
+class GatedFile(io.StringIO):
+    """A text file which the loader thread can only read once the gate is opened."""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.name = 'data.csv'
+        self.gate = threading.Event()
+
+    def read(self, *args):
+        if threading.current_thread().name == 'data-loader':
+            self.gate.wait()
+        return super().read(*args)
+
+
+def load(data_file, **kwargs):
+    # The loader thread reads the files after the constructor returns, so they are held in memory, like uploads.
+    with open(MODEL, 'rb') as file:
+        model_file = io.BytesIO(file.read())
+    model_file.name = 'model.sav'
+    return StandardHandler(data_file, model_file, -1, **kwargs)
+
+
+def test_data_waits_for_the_loader():
+    with open(DATA) as file:
+        data_file = GatedFile(file.read())
+    hdlr = load(data_file, lazy=True)
+
+    # The model and header are available while the data is still being read.
+    assert hdlr.problem_type == 'classification' and hdlr.columns[-1] == 'Species'
+    assert not hdlr.is_loaded()
+
+    data_file.gate.set()
+    with open(DATA) as file:
+        eager = load(file)
+    pd.testing.assert_frame_equal(hdlr.get_data(), eager.get_data())
+    assert hdlr.is_loaded() and hdlr.fingerprint == eager.fingerprint
+
+
+def test_load_error_is_reraised():
+    hdlr = load(io.StringIO('SepalLengthCm,Species\n'), lazy=True)  # A header, but no rows.
+    for _ in range(2):  # Every use of the data raises the loader's error, not just the first.
+        try:
+            hdlr.X
+        except ValueError as e:
+            assert 'empty' in str(e)
+        else:
+            raise AssertionError('the load error was not raised')
+    assert hdlr.is_loaded() and hdlr.problem_type == 'classification'
@@ -0,0 +1,36 @@
+"""
+Tests for analysers.mean_std: the single pass table agrees with pandas, whether the data is loaded or streamed.
+"""
+import numpy as np
+import pandas as pd
+from analysers.accumulators import stream_moments
+from analysers.mean_std import MeanStdAnalyser, moments_table
+from handlers.simple import StandardHandler
+
+DATA = 'testfiles/Iris_test.csv'
+
+
+def test_loaded_table():
+    with open(DATA) as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        hdlr = StandardHandler(data_file, model_file, -1)
+    table = MeanStdAnalyser().analyse(hdlr)
+    expected = pd.read_csv(DATA).select_dtypes('number')
+
+    assert list(table.index) == ['Mean', 'Std', 'Count', 'Min', 'Max']
+    assert list(table.columns) == list(expected.columns)
+    np.testing.assert_allclose(table.loc['Mean'], expected.mean(), rtol=1e-6)
+    np.testing.assert_allclose(table.loc['Std'], expected.std(ddof=0), rtol=1e-6)
+    np.testing.assert_array_equal(table.loc['Count'], len(expected))
+    np.testing.assert_allclose(table.loc['Min'], expected.min(), rtol=1e-6)
+    np.testing.assert_allclose(table.loc['Max'], expected.max(), rtol=1e-6)
+
+
+def test_streamed_table():
+    expected = pd.read_csv(DATA).select_dtypes('number')
+    with open(DATA) as data_file:
+        columns, acc = stream_moments(data_file, chunksize=10)
+    table = moments_table(columns, acc)
+
+    np.testing.assert_allclose(table.loc['Mean'], expected.mean(), rtol=1e-12)
+    np.testing.assert_allclose(table.loc['Std'], expected.std(ddof=0), rtol=1e-12)
+    np.testing.assert_array_equal(table.loc[['Min', 'Max']], [expected.min(), expected.max()])
@@ -0,0 +1,95 @@
+"""
+Tests for the shared model cache of handlers.models: eviction, the loading locks, and the removal of uploaded model
+files from MODEL_DIR once their model leaves the cache.
+"""
+import io
+import os
+import tempfile
+import threading
+import time
+import joblib
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from handlers import models
+from handlers.models import ModelCache, load_shared_model, mapped_model_path, model_digest
+
+
+def test_least_recently_used_eviction():
+    evicted = []
+    cache = ModelCache(100, on_evict=evicted.append)
+    cache.get_or_load('a', 40, lambda: 'A')
+    cache.get_or_load('b', 40, lambda: 'B')
+    assert cache.get_or_load('a', 40, lambda: 'not loaded') == 'A'
+
+    cache.get_or_load('c', 40, lambda: 'C')  # Evicts b, the least recently used.
+    assert 'a' in cache and 'b' not in cache and 'c' in cache
+    assert cache.total_bytes == 80 and (cache.hits, cache.misses) == (1, 3)
+
+    cache.get_or_load('huge', 101, lambda: 'H')  # Too large to be cached at all.
+    assert 'huge' not in cache and len(cache) == 2
+
+    cache.clear()
+    assert evicted == ['b', 'huge', 'a', 'c'] and cache.total_bytes == 0
+
+
+def test_failed_load_releases_its_lock():
+    cache = ModelCache(100)
+
+    def fail():
+        raise OSError('corrupt model')
+
+    try:
+        cache.get_or_load('a', 10, fail)
+    except OSError:
+        pass
+    else:
+        raise AssertionError('the failed load did not raise')
+
+    assert cache._loading == {} and 'a' not in cache
+    assert cache.get_or_load('a', 10, lambda: 'A') == 'A'
+
+
+def test_concurrent_loads_share_one_load():
+    cache = ModelCache(100)
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'A'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('a', 10, slow_loader)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['A'] * 4 and len(calls) == 1 and cache._loading == {}
+
+
+def test_uploaded_file_removed_on_eviction():
+    model = LinearRegression().fit(np.arange(10.0).reshape(5, 2), np.arange(5.0))
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+
+    model_dir = models.MODEL_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        models.MODEL_DIR = directory
+        try:
+            upload = io.BytesIO(buffer.getvalue())
+            upload.name = 'model.joblib'  # As a streamlit UploadedFile has.
+            cache = ModelCache(len(buffer.getvalue()), on_evict=models.remove_model_file)
+
+            loaded = load_shared_model(upload, cache)
+            path = os.path.join(directory, model_digest(upload) + '.joblib')
+            assert mapped_model_path(upload) == path and os.listdir(directory) == [os.path.basename(path)]
+            np.testing.assert_array_equal(loaded.coef_, model.coef_)
+
+            cache.get_or_load('other', 1, lambda: 'other model')  # Evicts the uploaded model.
+            assert os.listdir(directory) == [] and mapped_model_path(upload) is None
+            np.testing.assert_array_equal(loaded.coef_, model.coef_)  # The loaded model is still usable.
+            del loaded
+        finally:
+            models.MODEL_DIR = model_dir
@@ -0,0 +1,63 @@
+"""
+Sharded prediction (handlers.parallel) must give exactly the predictions of a single call of the model, whether the
+workers receive a pickled model or memory-map it from a .joblib file, and must reuse one pool per model.
+"""
+import os
+import tempfile
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LinearRegression
+from handlers import parallel
+from handlers.parallel import effective_jobs, parallel_predict, should_parallelize
+
+RANDOM_STATE = 0
+
+
+def make_data(n_rows=3000):
+    rng = np.random.default_rng(RANDOM_STATE)
+    X = rng.normal(size=(n_rows, 6))
+    return X, (X[:, 0] + X[:, 1] > 0).astype(int)
+
+
+def test_heuristic():
+    model = LinearRegression()
+    assert effective_jobs(None) == 1 and effective_jobs(3) == 3 and effective_jobs(-1) == (os.cpu_count() or 1)
+    assert not should_parallelize(model, 10 ** 6, None)
+    assert not should_parallelize(model, 150, 2, min_rows_per_shard=100)
+    assert should_parallelize(model, 200, 2, min_rows_per_shard=100)
+    assert not should_parallelize(RandomForestClassifier(n_jobs=-1), 200, 2, min_rows_per_shard=100)
+
+
+def test_parallel_matches_serial():
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=RANDOM_STATE).fit(X, y)
+
+    np.testing.assert_array_equal(parallel_predict(model, X, 3, min_rows_per_shard=500), model.predict(X))
+    pool = parallel._pools[(id(model), 3)]
+    np.testing.assert_array_equal(parallel_predict(model, X, 3, method='predict_proba', min_rows_per_shard=500),
+                                  model.predict_proba(X))
+    assert parallel._pools[(id(model), 3)] is pool and pool.users == 0
+
+
+def test_memory_mapped_model():
+    X, y = make_data()
+    model = LinearRegression().fit(X, X @ np.arange(6.0))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'model.joblib')
+        joblib.dump(model, path)
+        mapped = joblib.load(path, mmap_mode='r')
+
+        np.testing.assert_array_equal(parallel_predict(mapped, X, 2, min_rows_per_shard=500, model_path=path),
+                                      model.predict(X))
+        parallel._pools.pop((path, 2)).shutdown()
+
+
+def test_pools_are_evicted():
+    X, y = make_data(1000)
+    models = [LinearRegression().fit(X, X[:, i]) for i in range(parallel.MAX_POOLS + 1)]
+    for model in models:
+        np.testing.assert_allclose(parallel_predict(model, X, 2, min_rows_per_shard=100), model.predict(X))
+
+    assert len(parallel._pools) == parallel.MAX_POOLS
+    assert (id(models[0]), 2) not in parallel._pools
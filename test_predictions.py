@@ -0,0 +1,69 @@
+"""
+Tests for the predictions stored by StandardHandler: every metric analyser shares a single inference pass, even when
+the analysers run concurrently.
+"""
+import threading
+import time
+import numpy as np
+from analysers.accuracy import AccuracyAnalyser
+from analysers.f1 import F1Analyser
+from handlers.simple import StandardHandler
+
+
+class CountingModel:
+    """Wraps a model, counting the calls of its predict method."""
+
+    def __init__(self, model, delay=0.0):
+        self.model = model
+        self.delay = delay
+        self.calls = 0
+
+    def predict(self, X):
+        self.calls += 1
+        time.sleep(self.delay)  # Gives concurrent callers time to arrive while the prediction is running.
+        return self.model.predict(X)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+def load(delay=0.0):
+    with open('testfiles/Iris_test.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        hdlr = StandardHandler(data_file, model_file, -1)
+    hdlr.model = CountingModel(hdlr.model, delay)  # The loaded model is shared, so it is wrapped rather than patched.
+    return hdlr
+
+
+def test_analysers_share_predictions():
+    hdlr = load()
+    accuracy, f1 = AccuracyAnalyser().analyse(hdlr), F1Analyser().analyse(hdlr)
+
+    assert hdlr.model.calls == 1
+    np.testing.assert_array_equal(hdlr.get_predictions(), hdlr.model.model.predict(hdlr.X))
+    assert accuracy == np.mean(hdlr.y.to_numpy() == hdlr.get_predictions())
+    assert f1 is not None and hdlr.model.calls == 1
+
+    hdlr.invalidate_predictions()
+    AccuracyAnalyser().analyse(hdlr)
+    assert hdlr.model.calls == 2
+
+
+def test_concurrent_callers_wait_for_one_prediction():
+    hdlr = load(delay=0.2)
+    results = [None] * 4
+
+    def run(i):
+        results[i] = hdlr.get_predictions()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert hdlr.model.calls == 1
+    assert all(result is results[0] for result in results)
+
+    predicted = hdlr.predict()
+    np.testing.assert_array_equal(predicted['predicted'], results[0])
+    assert list(predicted.columns) == ['actual', 'predicted'] and hdlr.model.calls == 1
@@ -0,0 +1,100 @@
+"""
+Tests for profiling: memory peaks of nested and concurrent timed blocks, cache hit counting and the metrics text.
+"""
+import threading
+import numpy as np
+import profiling
+from profiling import Profiler, note_cache_miss, profiled
+
+MB = 1 << 20
+
+
+def with_profiler(profiler, test):
+    """Run a test with the process-wide profiler replaced."""
+    previous = profiling.PROFILER
+    profiling.PROFILER = profiler
+    try:
+        test()
+    finally:
+        profiling.PROFILER = previous
+
+
+def peaks(profiler):
+    return {record['name']: record['peak_bytes'] for record in profiler.records}
+
+
+def test_nested_peak():
+    profiler = Profiler(trace_memory=True)
+
+    def run():
+        with profiled('section', 'outer'):
+            big = np.ones(8 * MB, dtype=np.uint8)
+            del big
+            with profiled('analyser', 'inner'):
+                small = np.ones(MB, dtype=np.uint8)
+                del small
+
+    with_profiler(profiler, run)
+
+    # The inner block must not reset the outer block's peak, and does not measure its own.
+    assert peaks(profiler) == {'inner': None, 'outer': peaks(profiler)['outer']}
+    assert peaks(profiler)['outer'] >= 8 * MB
+    assert [row['max_peak_bytes'] for row in profiler.summary()] == [None, peaks(profiler)['outer']]
+
+
+def test_concurrent_peak():
+    profiler = Profiler(trace_memory=True)
+    started, allocated = threading.Event(), threading.Event()
+
+    def other():
+        started.wait()
+        with profiled('analyser', 'other'):
+            allocated.wait()
+
+    def run():
+        thread = threading.Thread(target=other)
+        thread.start()
+        with profiled('analyser', 'first'):
+            started.set()
+            big = np.ones(8 * MB, dtype=np.uint8)
+            del big
+            allocated.set()
+            thread.join()
+
+    with_profiler(profiler, run)
+    assert peaks(profiler)['other'] is None and peaks(profiler)['first'] >= 8 * MB
+
+
+def test_untraced():
+    profiler = Profiler()
+
+    def run():
+        with profiled('handler', 'load_data'):
+            with profiled('handler', 'predict'):
+                pass
+
+    with_profiler(profiler, run)
+    assert peaks(profiler) == {'predict': None, 'load_data': None}
+    assert [row['max_peak_bytes'] for row in profiler.summary()] == [None, None]
+
+
+def test_cache_hits():
+    profiler = Profiler()
+
+    def run():
+        for computed in [True, False, False]:
+            with profiled('analyser', 'Accuracy') as state:
+                state['cached'] = True
+                if computed:
+                    note_cache_miss()
+        with profiled('section', 'Metrics'):
+            note_cache_miss()
+
+    with_profiler(profiler, run)
+    assert profiler.cache_summary() == [{'cache': 'analyser:Accuracy', 'hits': 2, 'misses': 1, 'hit_rate': 2 / 3}]
+    assert [record['cache_hit'] for record in profiler.records] == [False, True, True, None]
+
+    text = profiler.prometheus()
+    assert 'app_calls_total{kind="analyser",name="Accuracy"} 3\n' in text
+    assert 'app_cache_misses_total{cache="analyser:Accuracy"} 1\n' in text
+    assert 'app_peak_bytes' not in text.replace('# TYPE app_peak_bytes gauge', '')
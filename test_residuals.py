@@ -0,0 +1,59 @@
+"""
+Tests for analysers.residuals: every regression metric reduced from the one residual vector agrees with sklearn, and
+the MSE, MAE, R^2 and residuals analysers share a single summary per handler.
+"""
+import os
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import max_error, mean_absolute_error, mean_squared_error, r2_score
+from analysers.mae import MAEAnalyser
+from analysers.mse import MSEAnalyser
+from analysers.r2 import R2Analyser
+from analysers.residuals import QUANTILES, ResidualsAnalyser, ResidualSummary, residual_summary
+from handlers.simple import StandardHandler
+
+RANDOM_STATE = 0
+
+
+def test_summary_matches_sklearn():
+    rng = np.random.default_rng(RANDOM_STATE)
+    y_true = rng.integers(-128, 128, 5000).astype(np.int8)  # y - pred must not be computed in the target's dtype.
+    y_pred = y_true + rng.normal(scale=20, size=5000)
+    table = ResidualSummary(y_true, y_pred).table()
+    y_true = y_true.astype(np.float64)
+
+    np.testing.assert_allclose(table['MSE'], mean_squared_error(y_true, y_pred), rtol=1e-12)
+    np.testing.assert_allclose(table['RMSE'], np.sqrt(mean_squared_error(y_true, y_pred)), rtol=1e-12)
+    np.testing.assert_allclose(table['MAE'], mean_absolute_error(y_true, y_pred), rtol=1e-12)
+    np.testing.assert_allclose(table['R2'], r2_score(y_true, y_pred), rtol=1e-12)
+    assert table['Max error'] == max_error(y_true, y_pred)
+    np.testing.assert_allclose(table[[f'Residual quantile {q:g}' for q in QUANTILES]],
+                               np.quantile(y_true - y_pred, QUANTILES), rtol=1e-12)
+
+
+def test_analysers_share_one_summary():
+    rng = np.random.default_rng(RANDOM_STATE)
+    data = pd.DataFrame(rng.normal(size=(300, 3)), columns=['a', 'b', 'c'])
+    data['target'] = data @ np.array([2.0, -1.0, 0.5]) + rng.normal(size=300)
+    model = LinearRegression().fit(data.iloc[:100, :3], data['target'][:100])
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_path, model_path = os.path.join(directory, 'data.csv'), os.path.join(directory, 'model.sav')
+        data.to_csv(data_path, index=False)
+        with open(model_path, 'wb') as f:
+            pickle.dump(model, f)
+        with open(data_path) as data_file, open(model_path, 'rb') as model_file:
+            hdlr = StandardHandler(data_file, model_file, -1)
+
+    y_pred = model.predict(data.iloc[:, :3])
+    np.testing.assert_allclose(MSEAnalyser().analyse(hdlr), mean_squared_error(data['target'], y_pred), rtol=1e-9)
+    np.testing.assert_allclose(MAEAnalyser().analyse(hdlr), mean_absolute_error(data['target'], y_pred), rtol=1e-9)
+    np.testing.assert_allclose(R2Analyser().analyse(hdlr), r2_score(data['target'], y_pred), rtol=1e-9)
+
+    summary = residual_summary(hdlr)
+    assert ResidualsAnalyser().analyse(hdlr).equals(summary.table()) and residual_summary(hdlr) is summary
+    hdlr.invalidate_predictions()
+    assert residual_summary(hdlr) is not summary
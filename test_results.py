@@ -0,0 +1,53 @@
+"""
+Tests for pages.results: a ResultStore runs each analyser once, however many times the page is rerun, and holds the
+confidence intervals of results computed on a sample.
+"""
+import threading
+from analysers import Analyser
+from analysers.accuracy import AccuracyAnalyser
+from handlers.simple import StandardHandler
+from pages.results import ResultStore
+
+
+class CountingAnalyser(Analyser):
+    """Counts its runs, and only finishes once released."""
+
+    def __init__(self):
+        super().__init__()
+        self.runs = 0
+        self.release = threading.Event()
+
+    def analyse(self, hdlr):
+        self.runs += 1
+        self.release.wait()
+        return len(hdlr.y)
+
+
+def load(**kwargs):
+    with open('testfiles/Iris.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        return StandardHandler(data_file, model_file, -1, **kwargs)
+
+
+def test_reruns_do_no_work():
+    store = ResultStore(load())
+    analyser = CountingAnalyser()
+
+    for _ in range(3):  # The page is rerun while the analyser is still running.
+        store.fill([analyser])
+        assert not store.ready(analyser) and not store.all_ready([analyser])
+    analyser.release.set()
+
+    assert store.get(analyser) == 150 and store.all_ready([analyser])
+    store.fill([analyser])
+    assert store.get(analyser) == 150 and analyser.runs == 1
+    assert store.interval(analyser) is None  # The data is not a sample.
+
+
+def test_sample_intervals():
+    store = ResultStore(load(sample_size=60))
+    analyser = AccuracyAnalyser()
+    store.fill([analyser])
+
+    low, high = store.interval(analyser)
+    assert 0 <= low <= store.get(analyser) <= high <= 1
+    assert store.interval(analyser) == (low, high)
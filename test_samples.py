@@ -0,0 +1,48 @@
+"""
+Tests for pages.samples: each bundled sample is loaded once per process and shared, and prewarming only starts once.
+"""
+import threading
+import warnings
+from pages import samples
+
+IRIS = 'Iris dataset: LogisticRegression'
+
+
+def test_sample_is_loaded_once():
+    handlers = [None] * 4
+
+    def run(i):
+        handlers[i] = samples.sample_handler(IRIS)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(handlers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(hdlr is handlers[0] for hdlr in handlers) and samples.sample_handler(IRIS) is handlers[0]
+    assert handlers[0].problem_type == 'classification'
+
+
+def test_unknown_sample():
+    try:
+        samples.sample_handler('Titanic dataset')
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('an unknown sample was loaded')
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        samples.prewarm_sample('Titanic dataset')  # Reported, rather than raised on the pool.
+    assert len(caught) == 1 and 'Titanic dataset' in str(caught[0].message)
+
+
+def test_prewarm_starts_once(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(samples, 'submit', lambda func, *args: submitted.append(args))
+    monkeypatch.setattr(samples, '_prewarmed', False)
+
+    samples.prewarm_samples()
+    samples.prewarm_samples()
+    assert submitted == [(name,) for name in samples.SAMPLES]
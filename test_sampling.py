@@ -0,0 +1,91 @@
+"""
+Check the streaming samplers of handlers.sampling on fixed seeds: that the reservoir keeps each row of a stream with
+equal probability, and that the stratified sample is close to proportional, bounded in memory, and reports pandas'
+counts of the whole stream.
+"""
+import numpy as np
+import pandas as pd
+from handlers.chunked import validate_chunk
+from handlers.sampling import StratifiedSampler, proportional_allocation, sample_chunks
+
+N_SEEDS = 2000
+
+
+def make_chunks(data, chunksize):
+    """Split a dataframe into validated chunks, as handlers.chunked.iter_csv_chunks would."""
+    return [validate_chunk(data.iloc[start:start + chunksize]) for start in range(0, len(data), chunksize)]
+
+
+def test_sample_is_ordered_subset():
+    data = pd.DataFrame({'row': np.arange(1000), 'x': np.random.default_rng(0).normal(size=1000)})
+    sample, population_size, _, class_counts = sample_chunks(make_chunks(data, 64), 100, seed=0)
+
+    assert population_size == len(data) and class_counts is None
+    assert len(sample) == 100 and sample['row'].is_unique and sample['row'].is_monotonic_increasing
+    pd.testing.assert_frame_equal(sample, data.iloc[sample['row']].reset_index(drop=True))
+
+
+def test_reservoir_is_uniform():
+    # Each of 50 rows should be kept in 10 / 50 of the samples, wherever it falls in the stream and its chunks.
+    n_rows, size = 50, 10
+    data = pd.DataFrame({'row': np.arange(n_rows)})
+    counts = np.zeros(n_rows)
+    for seed in range(N_SEEDS):
+        sample, _, _, _ = sample_chunks(make_chunks(data, 7), size, seed=seed)
+        counts[sample['row']] += 1
+
+    # Compare each row's count with its binomial expectation, allowing 4.5 standard deviations.
+    expected = N_SEEDS * size / n_rows
+    std = np.sqrt(N_SEEDS * size / n_rows * (1 - size / n_rows))
+    assert np.abs(counts - expected).max() < 4.5 * std
+
+
+def test_stratified_proportions():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'x': rng.normal(size=10_000), 'label': rng.choice(['a', 'b', 'c', 'rare'], 10_000,
+                                                                         p=[0.6, 0.3, 0.0995, 0.0005])})
+    data.loc[rng.choice(10_000, 50, replace=False), 'x'] = np.nan
+
+    sample, population_size, missing, class_counts = sample_chunks(make_chunks(data, 1000), 500, stratify_idx=1)
+
+    complete = data.dropna()
+    pd.testing.assert_series_equal(class_counts, complete['label'].value_counts().sort_index(), check_names=False)
+    np.testing.assert_array_equal(missing, data.isna().sum().to_numpy())
+    assert population_size == len(complete)
+
+    # Each class is sampled close to its proportional share, as the whole stream's counts give it: a class is only
+    # short of its share by chance (by a few standard deviations at most), and the sample has exactly 500 rows.
+    expected = proportional_allocation(class_counts.to_numpy(), 500)
+    got = sample['label'].value_counts().reindex(class_counts.index).to_numpy()
+    assert got.sum() == 500 and got.min() >= 1 and got[-1] == expected[-1] == 1
+    assert np.all(np.abs(got - expected) <= 4 * np.sqrt(expected))
+
+
+def test_stratified_memory_is_bounded():
+    # 30 classes and a sample of 20 rows: the sampler holds at most 20 rows plus one per class, and so does the
+    # sample, which has one row for each of the 20 largest classes.
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({'x': rng.normal(size=6000), 'label': np.repeat(np.arange(30), np.arange(1, 31) * 13)[:6000]})
+    sampler = StratifiedSampler(20, 'label', np.random.default_rng(0))
+    for chunk in make_chunks(data, 500):
+        sampler.update(chunk[0])
+        assert len(sampler.reservoir.keys) + sum(len(stratum.keys) for stratum in sampler.strata.values()) <= 50
+
+    rows, positions = sampler.take()
+    assert len(rows) == len(positions) == 20 and rows['label'].is_unique
+    assert set(rows['label']) == set(range(10, 30))
+
+
+def test_proportional_allocation():
+    np.testing.assert_array_equal(proportional_allocation([600, 300, 99, 1], 100), [59, 30, 10, 1])
+    np.testing.assert_array_equal(proportional_allocation([1, 1, 3], 10), [1, 1, 3])
+    np.testing.assert_array_equal(proportional_allocation([5, 5, 5], 10), [4, 3, 3])
+    np.testing.assert_array_equal(proportional_allocation([90, 5, 5], 10, minimum=2), [6, 2, 2])
+    assert proportional_allocation(np.arange(1, 31), 20).sum() == 20
+
+
+def test_seed_fixes_sample():
+    data = pd.DataFrame({'row': np.arange(500)})
+    first, _, _, _ = sample_chunks(make_chunks(data, 50), 40, seed=3)
+    second, _, _, _ = sample_chunks(make_chunks(data, 50), 40, seed=3)
+    pd.testing.assert_frame_equal(first, second)
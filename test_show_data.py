@@ -0,0 +1,62 @@
+"""
+Tests for the paged data viewer of analysers.show_data: sorting, filtering and paging against pandas.
+"""
+import numpy as np
+import pandas as pd
+from analysers.show_data import filter_mask, page, sorted_positions, view_positions
+from handlers.simple import StandardHandler
+
+
+def make_table():
+    return pd.DataFrame({'value': [2.0, np.nan, 1.0, 2.0, np.nan, 3.0, 1.0],
+                         'name': ['b', None, 'a', 'B', 'cab', 'a', None],
+                         'count': [5, 3, 5, 1, 3, 5, 0]})
+
+
+def test_sort_is_stable_with_missing_values_last():
+    tbl = make_table()
+    for column in ['value', 'name', 'count']:
+        np.testing.assert_array_equal(sorted_positions(tbl, column), np.argsort(tbl[column].rank(method='first',
+                                                                                                  na_option='bottom')))
+
+    # Equal values keep their order when sorting in descending order too, and missing values stay at the end.
+    np.testing.assert_array_equal(sorted_positions(tbl, 'value', ascending=False), [5, 0, 3, 2, 6, 1, 4])
+    np.testing.assert_array_equal(sorted_positions(tbl, 'count', ascending=False), [0, 2, 5, 1, 4, 3, 6])
+    np.testing.assert_array_equal(sorted_positions(tbl, None), np.arange(len(tbl)))
+
+
+def test_filter_mask():
+    tbl = make_table()
+    np.testing.assert_array_equal(filter_mask(tbl['count'], low=1, high=3), [False, True, False, True, True, False,
+                                                                              False])
+    np.testing.assert_array_equal(filter_mask(tbl['value'], low=2), tbl['value'] >= 2)
+    np.testing.assert_array_equal(filter_mask(tbl['name'], contains='B'), [True, False, False, True, True, False,
+                                                                          False])
+    assert filter_mask(tbl['name'], contains='').all()
+
+
+def test_pages():
+    tbl = pd.DataFrame({'x': np.arange(250)})
+    positions = np.arange(250)[::-1]
+    pd.testing.assert_frame_equal(page(tbl, positions, 0), tbl.iloc[249:149:-1])
+    pd.testing.assert_frame_equal(page(tbl, positions, 2), tbl.iloc[49::-1])
+    assert len(page(tbl, positions, 3)) == 0
+
+    for page_number, page_size in [(-1, 10), (0, 0)]:
+        try:
+            page(tbl, positions, page_number, page_size)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('an invalid page was accepted')
+
+
+def test_view_positions():
+    with open('testfiles/Iris_test.csv') as data_file, open('testfiles/test_model_iris.sav', 'rb') as model_file:
+        hdlr = StandardHandler(data_file, model_file, -1)
+    tbl = hdlr.get_data()
+
+    positions = view_positions(hdlr, 'SepalLengthCm', False, 'Species', contains='versicolor')
+    expected = tbl[tbl['Species'].str.contains('versicolor')].sort_values('SepalLengthCm', ascending=False,
+                                                                           kind='stable')
+    pd.testing.assert_frame_equal(tbl.iloc[positions], expected)
@@ -0,0 +1,108 @@
+"""
+Tests for handlers.validation: the rows dropped, the column profile and the warnings agree with pandas, for a frame
+with missing and infinite values in columns of several dtypes.
+"""
+import numpy as np
+import pandas as pd
+from handlers.validation import drop_missing, validate_data
+
+RANDOM_STATE = 0
+
+
+def make_frame():
+    """A frame of floats, integers, booleans and text, with missing values in three columns and infinities in one."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    n = 2000
+    data = pd.DataFrame({
+        'normal': rng.normal(size=n),
+        'counts': rng.integers(-50, 50, n),
+        'ratio': rng.exponential(size=n).astype(np.float32),
+        'flag': rng.random(n) < 0.3,
+        'colour': rng.choice(['red', 'green', 'blue'], n),
+        'label': rng.integers(0, 4, n),
+    })
+    data.loc[rng.choice(n, 40, replace=False), 'normal'] = np.nan
+    data.loc[rng.choice(n, 25, replace=False), 'colour'] = None
+    data.loc[rng.choice(n, 10, replace=False), 'ratio'] = np.nan
+    data.loc[rng.choice(n, 3, replace=False), 'normal'] = np.inf
+    data.loc[rng.choice(n, 2, replace=False), 'normal'] = -np.inf
+    return data
+
+
+def test_drop_missing():
+    data = make_frame()
+    kept, missing = drop_missing(data)
+
+    pd.testing.assert_frame_equal(kept, data.dropna())
+    np.testing.assert_array_equal(missing, data.isna().sum().to_numpy())
+
+
+def test_profile():
+    data = make_frame()
+    kept, profile = validate_data(data)
+    expected = data.dropna()
+    table = profile.table
+
+    pd.testing.assert_frame_equal(kept, expected)
+    assert profile.n_rows == len(expected)
+    assert profile.n_missing() == data.isna().sum().sum()
+    assert list(table.index) == list(data.columns)
+    assert list(table['Dtype']) == [str(dtype) for dtype in data.dtypes]
+    np.testing.assert_array_equal(table['Missing'], data.isna().sum())
+
+    # Minimums and maximums of the numeric columns, including infinities, as pandas gives them.
+    numeric = expected.select_dtypes('number').columns
+    np.testing.assert_array_equal(table.loc[numeric, 'Min'], expected[numeric].min().astype(float))
+    np.testing.assert_array_equal(table.loc[numeric, 'Max'], expected[numeric].max().astype(float))
+    assert table.loc['flag', 'Min'] == 0 and table.loc['flag', 'Max'] == 1
+    assert pd.isna(table.loc['colour', 'Min'])
+
+    # Infinite values are counted in float columns only.
+    for column in ['normal', 'ratio']:
+        assert table.loc[column, 'Non-finite'] == np.isinf(expected[column]).sum()
+    assert table['Non-finite'].isna().tolist() == [False, True, False, True, True, True]
+
+    # Distinct values are counted in every column but the floats.
+    for column in ['counts', 'flag', 'colour', 'label']:
+        assert table.loc[column, 'Distinct'] == expected[column].nunique()
+    assert table.loc[['normal', 'ratio'], 'Distinct'].isna().all()
+
+
+def test_profile_lookups():
+    data = make_frame()
+    _, profile = validate_data(data)
+
+    assert profile.stat('label', 'Distinct') == 4
+    assert profile.stat('normal', 'Distinct') is None
+    assert profile.stat('missing column', 'Min') is None
+
+    minimums, maximums = profile.extremes(['counts', 'label'])
+    np.testing.assert_array_equal(minimums, data.dropna()[['counts', 'label']].min())
+    np.testing.assert_array_equal(maximums, data.dropna()[['counts', 'label']].max())
+    assert profile.extremes(['colour']) is None
+
+
+def test_warnings():
+    data = make_frame()
+    _, profile = validate_data(data)
+    messages = profile.warnings()
+
+    assert len(messages) == 2
+    assert str(data.isna().sum().sum()) in messages[0]
+    assert 'normal, ratio, colour' in messages[0]
+    assert messages[1] == f'Warning: the column normal has {np.isinf(data.dropna()["normal"]).sum()} infinite values.'
+
+    _, clean = validate_data(data.dropna().replace([np.inf, -np.inf], 0))
+    assert clean.warnings() == []
+
+
+def test_invalid_shapes():
+    for data, message in [(pd.DataFrame({'a': [], 'b': []}), 'empty'),
+                          (pd.DataFrame({'a': [1, 2]}), 'greater than 1 column'),
+                          (pd.DataFrame({'a': [np.nan], 'b': [1]}), 'empty')]:
+        try:
+            validate_data(data)
+        except ValueError as e:
+            assert message in str(e)
+        else:
+            raise AssertionError(f'{message} data was accepted')